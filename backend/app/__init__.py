@@ -4,7 +4,12 @@ from flask_migrate import Migrate
 from flask_cors import CORS
 from dotenv import load_dotenv
 from .extensions import db
-from .routes import user_bp, deck_bp, auth_bp, card_bp, frontend_bp
+from .commands import recount_decks_command, seed_command
+from .util.cache import SizedCache, TTLCache
+from .util.hashing import HashingExecutor
+from .util import instrumentation
+from .util.json_provider import ORJSONProvider, orjson
+from .routes import user_bp, deck_bp, auth_bp, card_bp, review_bp, transfer_bp, frontend_bp
 
 load_dotenv()
 
@@ -17,12 +22,51 @@ if uri is not None: # pragma: no cover
     os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = uri
 
 
+POOL_OPTIONS = ['pool_size', 'max_overflow', 'pool_timeout',
+                'pool_recycle', 'pool_pre_ping']
+
+
 def create_app():
     app = Flask(__name__)
     app.config.from_prefixed_env()
 
+    # Pool settings come from FLASK_SQLALCHEMY_POOL_SIZE and so on
+    engine_options = app.config.setdefault('SQLALCHEMY_ENGINE_OPTIONS', {})
+
+    for option in POOL_OPTIONS:
+        if 'SQLALCHEMY_' + option.upper() in app.config:
+            engine_options.setdefault(
+                option, app.config['SQLALCHEMY_' + option.upper()])
+
+    if orjson is not None and app.config.get('ORJSON', True):
+        app.json = ORJSONProvider(app)
+
     db.init_app(app)
 
+    if app.config.get('QUERY_TIMING', False):
+        with app.app_context():
+            instrumentation.init_app(app, db.engine)
+
+    app.extensions['principals'] = TTLCache(
+        app.config.get('PRINCIPAL_CACHE_SIZE', 4096),
+        app.config.get('PRINCIPAL_CACHE_TTL', 60))
+    # Deck summaries by user, with the state of the decks they were made from
+    app.extensions['summaries'] = TTLCache(
+        app.config.get('SUMMARY_CACHE_SIZE', 1024),
+        app.config.get('SUMMARY_CACHE_TTL', 60))
+    # Due card forecasts of decks and users, with the state they were made from
+    app.extensions['forecasts'] = TTLCache(
+        app.config.get('FORECAST_CACHE_SIZE', 1024),
+        app.config.get('FORECAST_CACHE_TTL', 60))
+    # Serialized card lists of shared decks, by size in bytes
+    app.extensions['cards'] = SizedCache(
+        app.config.get('CARD_CACHE_SIZE', 32 * 1024 * 1024))
+    # Contents of index.html, by frontend directory
+    app.extensions['frontend'] = {}
+    app.extensions['hashing'] = HashingExecutor(
+        app.config.get('HASHING_WORKERS', 1),
+        app.config.get('HASHING_MAX_PENDING', 8))
+
     migrate = Migrate(app, db)
 
     CORS(app)
@@ -31,6 +75,11 @@ def create_app():
     app.register_blueprint(user_bp)
     app.register_blueprint(deck_bp)
     app.register_blueprint(card_bp)
+    app.register_blueprint(review_bp)
+    app.register_blueprint(transfer_bp)
     app.register_blueprint(frontend_bp)
 
+    app.cli.add_command(recount_decks_command)
+    app.cli.add_command(seed_command)
+
     return app
@@ -0,0 +1,39 @@
+import time
+import click
+from flask.cli import with_appcontext
+from .extensions import db
+from .models import recount_decks, synthetic
+
+
+@click.command('recount-decks')
+@click.argument('deck_ids', nargs=-1, type=int)
+@with_appcontext
+def recount_decks_command(deck_ids):
+    """Rebuild the card counters of the given decks, or of every deck."""
+    recount_decks(db.session.connection(), deck_ids or None)
+    db.session.commit()
+    click.echo('Deck counters rebuilt')
+
+
+@click.command('seed')
+@click.option('--users', default=10, show_default=True,
+              help='Number of users to add.')
+@click.option('--decks', default=10, show_default=True,
+              help='Number of decks of each user.')
+@click.option('--cards', default=100, show_default=True,
+              help='Number of cards of each deck.')
+@click.option('--seed', default=0, show_default=True,
+              help='Seed of the generated rows.')
+@click.option('--password', default='password', show_default=True,
+              help='Password of every user.')
+@click.option('--batch-size', default=50000, show_default=True,
+              help='Number of rows written per statement.')
+@with_appcontext
+def seed_command(users, decks, cards, seed, password, batch_size):
+    """Add generated users, decks and cards, for load testing."""
+    started = time.monotonic()
+    synthetic.generate(db.session.connection(), users, decks, cards,
+                       seed, password, batch_size)
+    db.session.commit()
+    click.echo('Added {} users, {} decks and {} cards in {:.1f}s'.format(
+        users, users * decks, users * decks * cards, time.monotonic() - started))
@@ -1,3 +1,6 @@
 from .user import User
 from .deck import Deck
 from .card import Card
+from .deck_due import DeckDue
+from .counters import update_counters, recount_decks
+from . import search, bulk, synthetic
@@ -0,0 +1,132 @@
+from sqlalchemy import Date, Integer, String, bindparam, cast, column, delete, insert, literal, select, update, values
+from .card import Card
+from .deck import Deck
+from .deck_due import DeckDue
+from .counters import add_to_counters, update_counters
+
+card_table = Card.__table__
+deck_table = Deck.__table__
+due_table = DeckDue.__table__
+
+CARD_COLUMNS = ['front', 'back', 'knowledge_level', 'last_revised', 'revision_due']
+COLUMN_TYPES = {
+    'front': String,
+    'back': String,
+    'knowledge_level': Integer,
+    'last_revised': Date,
+    'revision_due': Date,
+}
+SCHEDULING_COLUMNS = ['knowledge_level', 'last_revised', 'revision_due']
+
+
+# Writes cards, where old is a list of dicts holding the id, deck_id and
+# CARD_COLUMNS of each card before the write, and new a list in the same
+# order of dicts holding the id and the CARD_COLUMNS to set, the others
+# being left as they are. Cards setting the same columns are written in a
+# single statement. Mapper events are bypassed, so the deck counters are
+# updated from old and new here.
+def update_cards(connection, old, new):
+    groups = {}
+
+    for card in new:
+        columns = tuple(key for key in CARD_COLUMNS if key in card)
+
+        if columns:
+            groups.setdefault(columns, []).append(card)
+
+    for columns, cards in groups.items():
+        if connection.dialect.name == 'postgresql':  # pragma: no cover
+            rows = values(column('id', Integer),
+                          *(column(key, COLUMN_TYPES[key]) for key in columns),
+                          name='new_card') \
+                .data([tuple(card[key] for key in ('id',) + columns)
+                       for card in cards])
+            # All-NULL columns of a VALUES list are typed as text
+            connection.execute(
+                update(card_table)
+                .where(card_table.c.id == rows.c.id)
+                .values({key: cast(rows.c[key], Date)
+                         if COLUMN_TYPES[key] is Date else rows.c[key]
+                         for key in columns})
+            )
+        else:
+            connection.execute(
+                update(card_table)
+                .where(card_table.c.id == bindparam('b_id'))
+                .values({key: bindparam('b_' + key) for key in columns}),
+                [{'b_' + key: card[key] for key in ('id',) + columns}
+                 for card in cards]
+            )
+
+    changes = []
+
+    for old_card, new_card in zip(old, new):
+        new_card = dict(old_card, **new_card)
+        changes.append((
+            old_card['deck_id'],
+            (old_card['knowledge_level'], old_card['revision_due']),
+            (new_card['knowledge_level'], new_card['revision_due'])
+        ))
+
+    update_counters(connection, changes)
+
+
+# Inserts cards, dicts holding their deck_id, front, back and optionally the
+# other CARD_COLUMNS, in multi-row INSERT statements, returning their ids in
+# the same order. Cards are new unless they say otherwise.
+def insert_cards(connection, cards):
+    if not cards:
+        return []
+
+    rows = [dict({'knowledge_level': 0, 'last_revised': None,
+                  'revision_due': None}, **card) for card in cards]
+
+    if connection.dialect.name == 'postgresql':  # pragma: no cover
+        # PostgreSQL does not promise RETURNING rows in the order of the
+        # VALUES rows, which the sentinel column puts back
+        result = connection.execute(
+            insert(card_table).returning(card_table.c.id,
+                                         sort_by_parameter_order=True), rows)
+        ids = result.scalars().all()
+    elif connection.dialect.insert_executemany_returning:
+        result = connection.execute(
+            insert(card_table).returning(card_table.c.id), rows)
+        # Ids are generated in the order of the VALUES rows, which saves
+        # asking for sort_by_parameter_order, done one row at a time on
+        # SQLite for lack of a sentinel column.
+        ids = sorted(result.scalars().all())
+    else:  # pragma: no cover
+        ids = [connection.execute(insert(card_table), row).inserted_primary_key[0]
+               for row in rows]
+
+    update_counters(connection, [
+        (row['deck_id'], None, (row['knowledge_level'], row['revision_due']))
+        for row in rows
+    ])
+
+    return ids
+
+
+# Copies the front and back of every card of a deck into another deck as new
+# cards with one INSERT ... SELECT, returning the number of cards copied.
+def copy_cards(connection, source_deck_id, deck_id):
+    cards = select(card_table.c.front, card_table.c.back,
+                   literal(deck_id), literal(0)) \
+        .where(card_table.c.deck_id == source_deck_id) \
+        .order_by(card_table.c.id)
+    result = connection.execute(insert(card_table).from_select(
+        ['front', 'back', 'deck_id', 'knowledge_level'], cards))
+
+    # The copies are new and not due, so only the deck counts grow
+    add_to_counters(connection, {deck_id: (result.rowcount, result.rowcount)}, {})
+
+    return result.rowcount
+
+
+# Deletes decks, given as a list of ids or a select of them, with their
+# cards and due counts, in one DELETE statement each. Mapper events are
+# bypassed, as the counters of decks going away need no upkeep.
+def delete_decks(connection, deck_ids):
+    connection.execute(delete(due_table).where(due_table.c.deck_id.in_(deck_ids)))
+    connection.execute(delete(card_table).where(card_table.c.deck_id.in_(deck_ids)))
+    connection.execute(delete(deck_table).where(deck_table.c.id.in_(deck_ids)))
@@ -1,5 +1,24 @@
 from ..extensions import db
-from sqlalchemy import event
+from sqlalchemy import String, event, func
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
+
+
+# A date as text in isoformat, which a cast would leave to the settings
+# of the database, such as DateStyle on PostgreSQL
+class iso_date(FunctionElement):
+    type = String()
+    inherit_cache = True
+
+
+@compiles(iso_date)
+def compile_iso_date(element, compiler, **kw):
+    return compiler.process(func.strftime('%Y-%m-%d', *element.clauses), **kw)
+
+
+@compiles(iso_date, 'postgresql')
+def compile_iso_date_postgresql(element, compiler, **kw):
+    return compiler.process(func.to_char(*element.clauses, 'YYYY-MM-DD'), **kw)
 
 
 class Card(db.Model):
@@ -10,9 +29,29 @@ class Card(db.Model):
         'deck.id', name='fk_card_deck_id'), nullable=False)
     deck = db.relationship(
         'Deck', back_populates='cards', foreign_keys=[deck_id])
-    revision_due = db.Column(db.Date())
+    # Deck counters are maintained from the previous values of these
+    # columns, so they are always loaded before being overwritten.
+    revision_due = db.column_property(
+        db.Column(db.Date()), active_history=True)
     last_revised = db.Column(db.Date())
-    knowledge_level = db.Column(db.Integer, default=0)
+    knowledge_level = db.column_property(
+        db.Column(db.Integer, default=0), active_history=True)
+
+    __table_args__ = (
+        db.Index('ix_card_deck_id_revision_due', 'deck_id', 'revision_due'),
+        db.Index('ix_card_deck_id_knowledge_level',
+                 'deck_id', 'knowledge_level'),
+        db.Index('ix_card_deck_id_last_revised', 'deck_id', 'last_revised'),
+    )
+
+    # Columns giving get_json as rows, for listings that need no Card
+    # objects. Dates are formatted as text by the database.
+    @staticmethod
+    def json_columns():
+        return [Card.id, Card.front, Card.back,
+                iso_date(Card.revision_due).label('revision_due'),
+                iso_date(Card.last_revised).label('last_revised'),
+                Card.knowledge_level]
 
     def get_json(self):
         return {
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from datetime import datetime
+from sqlalchemy import bindparam, delete, event, func, insert, inspect, select, update
+from sqlalchemy.dialects import postgresql, sqlite
+from .card import Card
+from .deck import Deck
+from .deck_due import DeckDue
+
+card_table = Card.__table__
+deck_table = Deck.__table__
+due_table = DeckDue.__table__
+
+upserts = {
+    'postgresql': postgresql.insert,
+    'sqlite': sqlite.insert,
+}
+
+
+def card_state(knowledge_level, revision_due):
+    if isinstance(revision_due, datetime):
+        revision_due = revision_due.date()
+
+    return knowledge_level, revision_due
+
+
+# Every element of changes is a tuple (deck_id, old, new), where old and new
+# are the (knowledge_level, revision_due) of a card before and after the
+# write, or None if the card did not exist before or does not exist after.
+def update_counters(connection, changes):
+    decks = defaultdict(lambda: [0, 0])
+    due = defaultdict(int)
+
+    for deck_id, old, new in changes:
+        for state, sign in ((old, -1), (new, 1)):
+            if state is None:
+                continue
+
+            knowledge_level, revision_due = card_state(*state)
+            decks[deck_id][0] += sign
+
+            if knowledge_level == 0:
+                decks[deck_id][1] += sign
+
+            if revision_due is not None:
+                due[deck_id, revision_due] += sign
+
+    add_to_counters(connection, decks, due)
+
+
+# Adds to the counters of decks, where decks maps deck ids to the deltas
+# (all_count, new_count) and due maps (deck_id, revision_due) keys to the
+# delta of their card count.
+def add_to_counters(connection, decks, due):
+    # Decks are updated even when their counts stay, to bump their version
+    deck_rows = [{'b_id': deck_id, 'b_all': all_delta, 'b_new': new_delta}
+                 for deck_id, (all_delta, new_delta) in decks.items()]
+
+    if deck_rows:
+        connection.execute(
+            update(deck_table)
+            .where(deck_table.c.id == bindparam('b_id'))
+            .values(all_count=deck_table.c.all_count + bindparam('b_all'),
+                    new_count=deck_table.c.new_count + bindparam('b_new')),
+            deck_rows
+        )
+
+    due_rows = [{'deck_id': deck_id, 'revision_due': revision_due, 'card_count': delta}
+                for (deck_id, revision_due), delta in due.items() if delta]
+
+    if due_rows:
+        statement = upserts[connection.dialect.name](due_table)
+        statement = statement.on_conflict_do_update(
+            index_elements=[due_table.c.deck_id, due_table.c.revision_due],
+            set_={'card_count': due_table.c.card_count +
+                  statement.excluded.card_count}
+        )
+        connection.execute(statement, due_rows)
+
+    # Dates whose cards have all moved or gone are not kept at zero
+    emptied = {deck_id for (deck_id, _), delta in due.items() if delta < 0}
+
+    if emptied:
+        connection.execute(
+            delete(due_table)
+            .where(due_table.c.deck_id.in_(emptied))
+            .where(due_table.c.card_count == 0)
+        )
+
+
+def recount_decks(connection, deck_ids=None):
+    all_count = select(func.count(card_table.c.id)) \
+        .where(card_table.c.deck_id == deck_table.c.id) \
+        .scalar_subquery()
+    new_count = select(func.count(card_table.c.id)) \
+        .where(card_table.c.deck_id == deck_table.c.id) \
+        .where(card_table.c.knowledge_level == 0) \
+        .scalar_subquery()
+    histogram = select(card_table.c.deck_id, card_table.c.revision_due,
+                       func.count(card_table.c.id)) \
+        .where(card_table.c.revision_due != None) \
+        .group_by(card_table.c.deck_id, card_table.c.revision_due)
+
+    update_decks = update(deck_table).values(
+        all_count=all_count, new_count=new_count)
+    delete_due = delete(due_table)
+
+    if deck_ids is not None:
+        update_decks = update_decks.where(deck_table.c.id.in_(deck_ids))
+        delete_due = delete_due.where(due_table.c.deck_id.in_(deck_ids))
+        histogram = histogram.where(card_table.c.deck_id.in_(deck_ids))
+
+    connection.execute(update_decks)
+    connection.execute(delete_due)
+    connection.execute(insert(due_table).from_select(
+        ['deck_id', 'revision_due', 'card_count'], histogram))
+
+
+def previous(target, key):
+    history = inspect(target).attrs[key].history
+
+    if history.deleted:
+        return history.deleted[0]
+
+    return getattr(target, key)
+
+
+@event.listens_for(Card, 'after_insert')
+def card_inserted(mapper, connection, target):
+    new = (target.knowledge_level, target.revision_due)
+    update_counters(connection, [(target.deck_id, None, new)])
+
+
+@event.listens_for(Card, 'after_update')
+def card_updated(mapper, connection, target):
+    old = (previous(target, 'knowledge_level'),
+           previous(target, 'revision_due'))
+    new = (target.knowledge_level, target.revision_due)
+    update_counters(connection, [
+        (previous(target, 'deck_id'), old, None),
+        (target.deck_id, None, new)
+    ])
+
+
+@event.listens_for(Card, 'after_delete')
+def card_deleted(mapper, connection, target):
+    old = (previous(target, 'knowledge_level'),
+           previous(target, 'revision_due'))
+    update_counters(connection, [(target.deck_id, old, None)])
+
+
+@event.listens_for(Deck, 'before_delete')
+def deck_deleted(mapper, connection, target):
+    # The deck's cards have already been deleted at this point
+    connection.execute(
+        delete(due_table).where(due_table.c.deck_id == target.id))
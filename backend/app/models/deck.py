@@ -1,12 +1,50 @@
 from datetime import date, datetime, timedelta
+from sqlalchemy import Integer, Sequence, case, column, func, select, table, update
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.sql.expression import FunctionElement
 from .card import Card
+from .deck_due import DeckDue
 from ..extensions import db
 
+# Versions are drawn from one sequence shared by every deck, so each write
+# lifts a deck's version above all others, and the highest version of a
+# set of decks changes whenever any of them does.
+version_sequence = Sequence('deck_version_seq', metadata=db.metadata)
+latest = table('deck', column('version')).alias('latest')
+
+
+class next_version(FunctionElement):
+    type = Integer()
+    inherit_cache = True
+
+
+# SQLite lets one transaction write at a time, so the highest version so
+# far plus one is never drawn twice. Transactions running at once on
+# PostgreSQL would read the same highest version, so it has a sequence.
+@compiles(next_version)
+def compile_next_version(element, compiler, **kw):
+    return compiler.process(
+        select(func.coalesce(func.max(latest.c.version), 0) + 1)
+        .correlate(None).scalar_subquery(), **kw)
+
+
+@compiles(next_version, 'postgresql')
+def compile_next_version_postgresql(element, compiler, **kw):
+    return compiler.process(version_sequence.next_value(), **kw)
+
 
 class Deck(db.Model):
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(100), nullable=False)
     shared = db.Column(db.Boolean, default=False)
+    # Maintained by the card mapper events in counters.py
+    all_count = db.Column(db.Integer, nullable=False,
+                          default=0, server_default='0')
+    new_count = db.Column(db.Integer, nullable=False,
+                          default=0, server_default='0')
+    # Changes on every write to the deck or to its cards
+    version = db.Column(db.Integer, nullable=False, server_default='0',
+                        default=next_version(), onupdate=next_version())
     user_id = db.Column(db.Integer, db.ForeignKey(
         'user.id', name='fk_deck_user_id'), nullable=False)
     user = db.relationship(
@@ -14,7 +52,108 @@ class Deck(db.Model):
     cards = db.relationship('Card', back_populates='deck', foreign_keys=[
                             Card.deck_id], cascade='all, delete-orphan')
 
-    def get_json(self, cards_count=None, tzutcdelta=None):
+    __table_args__ = (
+        db.Index('ix_deck_user_id', 'user_id'),
+        db.Index('ix_deck_shared_id', 'shared', 'id'),
+        db.Index('ix_deck_version', 'version'),
+        db.Index('ix_deck_shared_version', 'shared', 'version'),
+    )
+
+    # Gives every deck of a user a new version, for changes to the user
+    # that show in their decks.
+    @staticmethod
+    def bump_versions(user_id):
+        db.session.execute(update(Deck).where(Deck.user_id == user_id)
+                           .values(version=next_version()))
+
+    # Decks given to count_cards may as well be rows holding id, all_count,
+    # new_count and owner_tzutcdelta.
+    @staticmethod
+    def count_cards(decks, cards_count, tzutcdelta=None):
+        counts = {deck.id: {} for deck in decks}
+
+        for deck in decks:
+            if 'all' in cards_count:
+                counts[deck.id]['all_count'] = deck.all_count
+
+            if 'new' in cards_count:
+                counts[deck.id]['new_count'] = deck.new_count
+
+        if 'due' not in cards_count or not decks:
+            return counts
+
+        now = datetime.utcnow()
+        cutoffs = {}
+
+        for deck in decks:
+            if tzutcdelta == None:
+                delta = timedelta(seconds=deck.owner_tzutcdelta)
+            else:
+                delta = timedelta(seconds=tzutcdelta)
+
+            cutoffs.setdefault((now + delta).date(), []).append(deck.id)
+            counts[deck.id]['due_count'] = 0
+
+        if len(cutoffs) == 1:
+            cutoff = next(iter(cutoffs))
+        else:
+            cutoff = case(*((DeckDue.deck_id.in_(ids), day)
+                            for day, ids in cutoffs.items()))
+
+        query = db.session.query(DeckDue.deck_id, func.sum(DeckDue.card_count)) \
+                          .filter(DeckDue.deck_id.in_(counts)) \
+                          .filter(DeckDue.revision_due <= cutoff) \
+                          .group_by(DeckDue.deck_id)
+
+        for deck_id, due_count in query:
+            counts[deck_id]['due_count'] = due_count
+
+        return counts
+
+    # Rows of id, name, all_count, new_count and the cards due by today,
+    # becoming due tomorrow and over the seven days after today, for every
+    # deck of a user, from one grouped query of the due counters.
+    @staticmethod
+    def summarize(user_id, today):
+        tomorrow = today + timedelta(days=1)
+        week = today + timedelta(days=7)
+
+        def due_sum(condition):
+            return func.coalesce(func.sum(case((condition, DeckDue.card_count))), 0)
+
+        return db.session.query(
+            Deck.id, Deck.name, Deck.all_count, Deck.new_count,
+            due_sum(DeckDue.revision_due <= today).label('due_count'),
+            due_sum(DeckDue.revision_due == tomorrow).label('due_tomorrow_count'),
+            due_sum(DeckDue.revision_due > today).label('due_week_count')
+        ).outerjoin(DeckDue, (DeckDue.deck_id == Deck.id) &
+                    (DeckDue.revision_due <= week)) \
+         .filter(Deck.user_id == user_id) \
+         .group_by(Deck.id) \
+         .order_by(Deck.id) \
+         .all()
+
+    @property
+    def owner_tzutcdelta(self):
+        return self.user.tzutcdelta
+
+    # get_json of a row holding id, name, user (the owner's username)
+    # and shared, with the counts of count_cards
+    @staticmethod
+    def row_json(row, counts=None):
+        value = {
+            'id': row.id,
+            'name': row.name,
+            'user': row.user,
+            'shared': row.shared,
+        }
+
+        if counts:
+            value.update(counts[row.id])
+
+        return value
+
+    def get_json(self, cards_count=None, tzutcdelta=None, counts=None):
         value = {
             'id': self.id,
             'name': self.name,
@@ -23,25 +162,9 @@ class Deck(db.Model):
         }
 
         if cards_count:
-            if 'due' in cards_count:
-                now = datetime.utcnow()
-
-                if tzutcdelta == None:
-                    delta = timedelta(seconds=self.user.tzutcdelta)
-                else:
-                    delta = timedelta(seconds=tzutcdelta)
+            if counts is None:
+                counts = Deck.count_cards([self], cards_count, tzutcdelta)
 
-                query = Card.query.filter(Card.deck_id == self.id) \
-                                  .filter(Card.revision_due <= now + delta)
-                value['due_count'] = query.count()
-
-            if 'all' in cards_count:
-                query = Card.query.filter(Card.deck_id == self.id)
-                value['all_count'] = query.count()
-
-            if 'new' in cards_count:
-                query = Card.query.filter(Card.deck_id == self.id) \
-                                  .filter(Card.knowledge_level == 0)
-                value['new_count'] = query.count()
+            value.update(counts[self.id])
 
         return value
@@ -0,0 +1,31 @@
+from datetime import timedelta
+from sqlalchemy import case, func
+from ..extensions import db
+
+
+class DeckDue(db.Model):
+    # Number of cards of a deck due on each date, so that due counts
+    # can be summed without scanning the card table
+    deck_id = db.Column(db.Integer, db.ForeignKey(
+        'deck.id', name='fk_deck_due_deck_id'), primary_key=True)
+    revision_due = db.Column(db.Date(), primary_key=True)
+    card_count = db.Column(db.Integer, nullable=False, default=0)
+
+    # Number of cards due on each of the given number of days from today
+    # on, in the decks matching condition, from one grouped query. Cards
+    # overdue are due today.
+    @staticmethod
+    def forecast(condition, today, days):
+        day = case((DeckDue.revision_due < today, today),
+                   else_=DeckDue.revision_due)
+        rows = db.session.query(day, func.sum(DeckDue.card_count)) \
+                         .filter(condition) \
+                         .filter(DeckDue.revision_due < today + timedelta(days=days)) \
+                         .group_by(day)
+        counts = dict.fromkeys((today + timedelta(days=i) for i in range(days)), 0)
+
+        for due, card_count in rows:
+            counts[due] = card_count
+
+        return [{'date': due.isoformat(), 'due_count': card_count}
+                for due, card_count in counts.items()]
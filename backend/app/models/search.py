@@ -0,0 +1,119 @@
+from contextlib import contextmanager
+from flask import current_app
+from sqlalchemy import DDL, column, event, func, table
+from ..extensions import db
+from .card import Card
+from .deck import Deck
+
+# Searched columns of each table, kept in an FTS5 trigram table on
+# SQLite and indexed with pg_trgm on PostgreSQL
+SEARCHABLE = [(Card, 'front'), (Deck, 'name')]
+
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5({column}, "
+    "content='{table}', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts(rowid, {column}) "
+    "VALUES (new.id, new.{column}); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, {column}) "
+    "VALUES ('delete', old.id, old.{column}); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {column} ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, {column}) "
+    "VALUES ('delete', old.id, old.{column}); "
+    "INSERT INTO {table}_fts(rowid, {column}) "
+    "VALUES (new.id, new.{column}); END",
+]
+
+POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX ix_{table}_{column}_trgm ON {table} "
+    "USING gin ({column} gin_trgm_ops)",
+]
+
+for model, column_name in SEARCHABLE:
+    names = {'table': model.__tablename__, 'column': column_name}
+
+    for dialect, statements in (('sqlite', SQLITE_DDL),
+                                ('postgresql', POSTGRESQL_DDL)):
+        for statement in statements:
+            event.listen(model.__table__, 'after_create',
+                         DDL(statement.format(**names)).execute_if(dialect=dialect))
+
+    event.listen(model.__table__, 'before_drop',
+                 DDL('DROP TABLE IF EXISTS {table}_fts'.format(**names))
+                 .execute_if(dialect='sqlite'))
+
+
+# Bulk inserts into a searchable table run several times faster without
+# indexing each row as it comes, so the SQLite insert trigger or the
+# PostgreSQL index is dropped meanwhile and the index built anew after.
+@contextmanager
+def deferred_indexing(connection, model):
+    names = {'table': model.__tablename__, 'column': dict(SEARCHABLE)[model]}
+    dialect = connection.dialect.name
+
+    if dialect == 'sqlite':
+        connection.exec_driver_sql('DROP TRIGGER {table}_fts_insert'.format(**names))
+    elif dialect == 'postgresql':  # pragma: no cover
+        connection.exec_driver_sql('DROP INDEX ix_{table}_{column}_trgm'.format(**names))
+
+    yield
+
+    if dialect == 'sqlite':
+        connection.exec_driver_sql(SQLITE_DDL[1].format(**names))
+        connection.exec_driver_sql(
+            "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')".format(**names))
+    elif dialect == 'postgresql':  # pragma: no cover
+        connection.exec_driver_sql(POSTGRESQL_DDL[1].format(**names))
+
+
+class LikeSearch:
+    def filter(self, query, attribute, q):
+        return query.filter(attribute.ilike(f'%{q}%')), False
+
+
+class TrigramSearch(LikeSearch):  # pragma: no cover
+    # pg_trgm's GIN index serves the ILIKE filter, and
+    # similarity() ranks the matching rows.
+    def filter(self, query, attribute, q):
+        query, _ = super().filter(query, attribute, q)
+        rank = func.similarity(attribute, q).desc()
+        return query.order_by(None).order_by(rank, attribute.class_.id), True
+
+
+class FTS5Search(LikeSearch):
+    # Matches against the FTS5 trigram table, which cannot
+    # match strings shorter than a trigram.
+    def filter(self, query, attribute, q):
+        if len(q) < 3:
+            return super().filter(query, attribute, q)
+
+        model = attribute.class_
+        fts = table(model.__tablename__ + '_fts',
+                    column('rowid'), column(attribute.key), column('rank'))
+        phrase = '"{}"'.format(q.replace('"', '""'))
+
+        query = query.join(fts, fts.c.rowid == model.id) \
+                     .filter(fts.c[attribute.key].match(phrase))
+        return query.order_by(None).order_by(fts.c.rank, model.id), True
+
+
+backends = {
+    'like': LikeSearch(),
+    'trigram': TrigramSearch(),
+    'fts5': FTS5Search(),
+}
+
+defaults = {
+    'postgresql': 'trigram',
+    'sqlite': 'fts5',
+}
+
+
+# Filters query to the rows whose attribute contains q, returning
+# the new query and whether it is ordered by relevance.
+def filter(query, attribute, q):
+    name = current_app.config.get('SEARCH_BACKEND') or \
+        defaults.get(db.engine.dialect.name, 'like')
+    return backends[name].filter(query, attribute, q)
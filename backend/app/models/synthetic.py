@@ -0,0 +1,134 @@
+import io
+import itertools
+import random
+from datetime import date, timedelta
+from sqlalchemy import func, insert, select
+from werkzeug.security import generate_password_hash
+from ..scheduler import DAYS_TO_SUM, MAX_KNOWLEDGE_LEVEL
+from .card import Card
+from .counters import recount_decks
+from .deck import Deck
+from .user import User
+from . import search
+
+CARD_COLUMNS = ['deck_id', 'front', 'back', 'knowledge_level',
+                'last_revised', 'revision_due']
+# Share of cards at each knowledge level, from new cards up
+LEVEL_WEIGHTS = [30, 25, 20, 15, 10]
+# Decks are recounted, and usernames checked, this many at a time, to keep
+# within the number of parameters a statement may have
+RECOUNT_BATCH_SIZE = 5000
+
+
+# The (last_revised, revision_due) pairs a card of each knowledge level
+# may have. A card reaching a level was last graded good and is due the
+# interval of its previous level later. Reviews lag behind, so up to half
+# of that interval may have passed since the card was due.
+def review_dates(today):
+    dates = [[(None, None)]]
+
+    for level in range(1, MAX_KNOWLEDGE_LEVEL + 1):
+        interval = DAYS_TO_SUM[level - 1]
+        dates.append([(today - timedelta(days=days),
+                       today - timedelta(days=days) + timedelta(days=interval))
+                      for days in range(interval * 3 // 2 + 1)])
+
+    return dates
+
+
+# Yields the cards of each deck as tuples of CARD_COLUMNS, the same ones
+# for the same generator state.
+def generate_cards(generator, deck_ids, cards_per_deck, today):
+    dates = review_dates(today)
+    levels = range(MAX_KNOWLEDGE_LEVEL + 1)
+
+    for deck_id in deck_ids:
+        for i, level in enumerate(generator.choices(
+                levels, LEVEL_WEIGHTS, k=cards_per_deck)):
+            last_revised, revision_due = generator.choice(dates[level])
+            yield (deck_id, 'front {} of deck {}'.format(i, deck_id),
+                   'back {}'.format(generator.randrange(10 ** 6)), level,
+                   last_revised, revision_due)
+
+
+def insert_cards(connection, rows):
+    if connection.dialect.name == 'postgresql':  # pragma: no cover
+        # Generated text holds no tabs, newlines or backslashes to escape
+        data = io.StringIO(''.join(
+            '\t'.join('\\N' if value is None else str(value) for value in row) + '\n'
+            for row in rows))
+        cursor = connection.connection.cursor()
+        cursor.copy_expert('COPY card ({}) FROM STDIN'.format(
+            ', '.join(CARD_COLUMNS)), data)
+    else:
+        connection.execute(insert(Card.__table__),
+                           [dict(zip(CARD_COLUMNS, row)) for row in rows])
+
+
+def batches(rows, size):
+    while True:
+        batch = list(itertools.islice(rows, size))
+
+        if not batch:
+            return
+
+        yield batch
+
+
+# Yields count usernames user<n>, numbered on from first and skipping the
+# ones taken, say by a real user.
+def free_usernames(connection, first, count):
+    numbers = itertools.count(first)
+
+    while count:
+        names = ['user{}'.format(n) for n in itertools.islice(
+            numbers, min(count, RECOUNT_BATCH_SIZE))]
+        taken = set(connection.execute(
+            select(User.username).where(User.username.in_(names))).scalars())
+        names = [name for name in names if name not in taken]
+        count -= len(names)
+        yield from names
+
+
+# Adds users named user<n>, numbered on from the highest user id so that
+# earlier seeded users are never clashed with, each owning decks_per_user
+# decks of cards_per_deck cards, every other deck shared. Rows are written
+# batch_size at a time with core INSERTs, or COPY on PostgreSQL, and the
+# same seed generates the same rows. Returns the ids of the users.
+def generate(connection, users, decks_per_user, cards_per_deck, seed=0,
+             password='password', batch_size=50000):
+    generator = random.Random(seed)
+    last = connection.execute(select(func.max(User.id))).scalar() or 0
+    password_hash = generate_password_hash(password)
+    rows = ({'username': username, 'password_hash': password_hash,
+             'admin': False, 'tzutcdelta': 0}
+            for username in free_usernames(connection, last, users))
+
+    for batch in batches(rows, batch_size):
+        connection.execute(insert(User.__table__), batch)
+
+    # The new users have the highest ids, and so their decks
+    new_users = connection.execute(
+        select(User.id, User.username).where(User.id > last).order_by(User.id)
+    ).all()
+    rows = ({'name': 'Deck {} of {}'.format(i, username), 'user_id': user_id,
+             'shared': i % 2 == 0}
+            for user_id, username in new_users
+            for i in range(decks_per_user))
+
+    for batch in batches(rows, batch_size):
+        connection.execute(insert(Deck.__table__), batch)
+
+    deck_ids = connection.execute(
+        select(Deck.id).where(Deck.user_id > last).order_by(Deck.id)
+    ).scalars().all()
+    cards = generate_cards(generator, deck_ids, cards_per_deck, date.today())
+
+    with search.deferred_indexing(connection, Card):
+        for batch in batches(cards, batch_size):
+            insert_cards(connection, batch)
+
+    for i in range(0, len(deck_ids), RECOUNT_BATCH_SIZE):
+        recount_decks(connection, deck_ids[i:i + RECOUNT_BATCH_SIZE])
+
+    return [user_id for user_id, _ in new_users]
@@ -24,6 +24,11 @@ class User(db.Model):
     def check_password(self, password):
         return check_password_hash(self.password_hash, password)
 
+    # Columns giving get_json as rows, for listings that need no User objects
+    @staticmethod
+    def json_columns():
+        return [User.id, User.username, User.admin]
+
     def get_json(self):
         return {
             'id': self.id,
@@ -2,4 +2,6 @@ from .user import user_bp
 from .deck import deck_bp
 from .auth import auth_bp
 from .card import card_bp
+from .review import review_bp
+from .transfer import transfer_bp
 from .frontend import frontend_bp
@@ -1,7 +1,9 @@
 from flask import Blueprint, request, jsonify, current_app
 import jwt
-from ..models import User
+from ..models import Deck, User
 from ..extensions import db
+from ..util.auth import remember_principal
+from ..util.hashing import Busy
 
 auth_bp = Blueprint('auth', __name__)
 
@@ -32,12 +34,26 @@ def auth():
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    if user.check_password(password):
-        user.tzutcdelta = tzutcdelta
-        db.session.commit()
+    try:
+        valid, queue_time = current_app.extensions['hashing'].check_password(
+            user.password_hash, password)
+    except Busy:
+        return jsonify({'message': 'Too many logins at once, please retry'}), 503, {'Retry-After': '1'}
+
+    if valid:
+        if user.tzutcdelta != tzutcdelta:
+            # Shifts the day their decks count due cards up to
+            Deck.bump_versions(user.id)
+            user.tzutcdelta = tzutcdelta
+            db.session.commit()
+
+        remember_principal(user)
         payload = {'user_id': user.id}
         token = jwt.encode(
             payload, current_app.config['SECRET_KEY'], algorithm='HS256')
-        return jsonify({'token': token.decode('utf-8'), 'user': user.get_json()})
+        response = jsonify({'token': token.decode('utf-8'), 'user': user.get_json()})
+        response.headers['Server-Timing'] = 'hash-queue;dur={:.1f}'.format(
+            queue_time * 1000)
+        return response
     else:
         return jsonify({'message': 'Authentication failed'}), 401
@@ -1,75 +1,102 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app
-from ..models import Deck, Card, User
+from sqlalchemy import func, literal, or_, select, union_all
+from ..models import Deck, Card, bulk, search
 from ..extensions import db
 from ..util.auth import token_required
-from ..util import date
+from ..util import date, etag, pagination
 
 card_bp = Blueprint('card', __name__)
 
 
 @card_bp.route('/api/decks/<int:deck_id>/cards', methods=['POST'])
 @token_required
-def create_card(jwt_data, deck_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def create_card(principal, deck_id):
     deck = db.session.get(Deck, deck_id)
 
     if not deck:
         return jsonify({'message': 'Deck not found'}), 404
 
-    if deck.user_id != user.id:
+    if deck.user_id != principal.id:
         return jsonify({'message': 'You do not own this deck'}), 403
 
     data = request.json
-    front = data.get('front')
-    back = data.get('back')
-    reverse = data.get('reverse') or False
 
-    if not front or not back:
-        return jsonify({'message': 'Please provide card front and back'}), 400
+    if not isinstance(data, list):
+        data = [data]
 
-    card = Card(front=front, back=back, deck=deck)
-    db.session.add(card)
-    db.session.commit()
-    data = [card.get_json()]
+    max_batch = current_app.config.get('MAX_CARD_BATCH', 1000)
+    cards = []
+
+    for new_card in data:
+        if not isinstance(new_card, dict):
+            return jsonify({'message': 'Expected a card object'}), 400
+
+        front = new_card.get('front')
+        back = new_card.get('back')
+        reverse = new_card.get('reverse') or False
+
+        if not front or not back:
+            return jsonify({'message': 'Please provide card front and back'}), 400
 
-    if reverse:
-        reverse_card = Card(front=back, back=front, deck=deck)
-        db.session.add(reverse_card)
-        db.session.commit()
-        data.append(reverse_card.get_json())
+        cards.append({'deck_id': deck.id, 'front': front, 'back': back})
+
+        if reverse:
+            cards.append({'deck_id': deck.id, 'front': back, 'back': front})
+
+        # Reverse cards count towards the limit
+        if len(cards) > max_batch:
+            return jsonify({'message': 'At most {} cards can be created at once'.format(max_batch)}), 400
+
+    ids = bulk.insert_cards(db.session.connection(), cards)
+    db.session.commit()
+    data = [Card(id=id, front=card['front'], back=card['back'],
+                 knowledge_level=0).get_json()
+            for id, card in zip(ids, cards)]
 
     return jsonify({'message': 'Cards created successfully', 'data': data}), 201
 
 
 @card_bp.route('/api/decks/<int:deck_id>/cards', methods=['GET'])
 @token_required
-def search_cards(jwt_data, deck_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def search_cards(principal, deck_id):
     deck = db.session.get(Deck, deck_id)
 
     if not deck:
         return jsonify({'message': 'Deck not found'}), 404
-    if not deck.shared and deck.user_id != user.id:
+    if not deck.shared and deck.user_id != principal.id:
         return jsonify({'message': 'You do not own this deck'}), 403
 
+    tag = etag.compute(deck.id, deck.version, request.query_string)
+    response = etag.not_modified(tag)
+
+    if response:
+        return response
+
+    # Shared decks are read by everyone alike, so their serialized pages are
+    # kept along with the tag they were sent with. Writes to the deck change
+    # the tag, so stale pages are never sent and are replaced once read.
+    cache = current_app.extensions['cards']
+    cache_key = (deck.id, request.query_string)
+
+    if deck.shared:
+        cached = cache.get(cache_key)
+
+        if cached and cached[0] == tag:
+            return etag.tag(current_app.response_class(
+                cached[1], mimetype='application/json'), tag), 200
+
     q = request.args.get('q')
     limit = request.args.get('limit')
     offset = request.args.get('offset')
+    cursor = request.args.get('cursor')
     count = request.args.get('count') != None
     new = request.args.get('new') != None
     due = request.args.get('due')
     revised = request.args.get('revised')
 
-    query = Card.query.filter(Card.deck_id == deck.id)
+    query = db.session.query(*Card.json_columns()) \
+                      .filter(Card.deck_id == deck.id).order_by(Card.id)
 
     if new:
         query = query.filter(Card.knowledge_level == 0)
@@ -90,8 +117,18 @@ def search_cards(jwt_data, deck_id):
 
         query = query.filter(Card.last_revised == revised)
 
+    ranked = False
+
     if q is not None:
-        query = query.filter(Card.front.ilike(f'%{q}%'))
+        query, ranked = search.filter(query, Card.front, q)
+
+    if cursor is not None:
+        try:
+            cursor = pagination.decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'message': 'Cursor is invalid'}), 400
+
+        query = pagination.seek(query, Card.id, cursor)
 
     if limit is not None:
         try:
@@ -110,28 +147,77 @@ def search_cards(jwt_data, deck_id):
             query = query.offset(offset)
 
     if count:
-        return jsonify({'data': query.count()}), 200
+        response = jsonify({'data': query.count()})
+    else:
+        cards, next_cursor = pagination.fetch_page(
+            query, limit, pagination.page_offset(cursor, offset) if ranked else None)
 
-    cards = query.all()
+        card_list = [card._asdict() for card in cards]
+        response = jsonify({'data': card_list, 'next_cursor': next_cursor})
 
-    card_list = [card.get_json() for card in cards]
-    return jsonify({'data': card_list}), 200
+    if deck.shared:
+        body = response.get_data()
+        cache.set(cache_key, (tag, body), len(body))
 
+    return etag.tag(response, tag), 200
 
-@card_bp.route('/api/cards/<int:card_id>', methods=['GET'])
+
+@card_bp.route('/api/decks/<int:deck_id>/queue', methods=['GET'])
 @token_required
-def get_card(jwt_data, card_id):
-    user = db.session.get(User, jwt_data['user_id'])
+def get_queue(principal, deck_id):
+    deck = db.session.get(Deck, deck_id)
+
+    if not deck:
+        return jsonify({'message': 'Deck not found'}), 404
+    if not deck.shared and deck.user_id != principal.id:
+        return jsonify({'message': 'You do not own this deck'}), 403
+
+    try:
+        new_limit = max(int(request.args.get('new', 10)), 0)
+        due_limit = max(int(request.args.get('due', 20)), 0)
+    except:
+        return jsonify({'message': 'Fields "new" and "due" must be integers'}), 400
+
+    today = (datetime.utcnow() + timedelta(seconds=principal.tzutcdelta)).date()
 
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
+    new_order = (Card.id,)
+    new_cards = select(Card.id, literal('new').label('kind'),
+                       func.row_number().over(order_by=new_order).label('position')) \
+        .where(Card.deck_id == deck.id) \
+        .where(Card.knowledge_level == 0) \
+        .order_by(*new_order) \
+        .limit(new_limit) \
+        .subquery()
 
+    # New cards that were failed also have a due date, but are queued as new
+    due_order = (Card.revision_due, Card.id)
+    due_cards = select(Card.id, literal('due').label('kind'),
+                       func.row_number().over(order_by=due_order).label('position')) \
+        .where(Card.deck_id == deck.id) \
+        .where(Card.revision_due <= today) \
+        .where(or_(Card.knowledge_level != 0, Card.knowledge_level == None)) \
+        .order_by(*due_order) \
+        .limit(due_limit) \
+        .subquery()
+
+    queue = union_all(select(new_cards), select(due_cards)).subquery()
+
+    # Alternates due and new cards while both are left
+    cards = Card.query.join(queue, queue.c.id == Card.id) \
+                      .order_by(queue.c.position, queue.c.kind)
+
+    return jsonify({'data': [card.get_json() for card in cards]}), 200
+
+
+@card_bp.route('/api/cards/<int:card_id>', methods=['GET'])
+@token_required
+def get_card(principal, card_id):
     card = db.session.get(Card, card_id)
 
     if not card:
         return jsonify({'message': 'Card not found'}), 404
 
-    if not card.deck.shared and card.deck.user_id != user.id:
+    if not card.deck.shared and card.deck.user_id != principal.id:
         return jsonify({'message': 'You do not have the deck to which this card pertains'}), 403
 
     return jsonify({'data': card.get_json()}), 200
@@ -139,26 +225,24 @@ def get_card(jwt_data, card_id):
 
 @card_bp.route('/api/cards/<int:card_id>', methods=['PUT'])
 @token_required
-def update_card(jwt_data, card_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
-    card = db.session.get(Card, card_id)
+def update_card(principal, card_id):
+    # Locked until the commit, so that the counters are updated from the
+    # values being overwritten
+    card = db.session.get(Card, card_id, with_for_update=True)
 
     if not card:
         return jsonify({'message': 'Card not found'}), 404
 
-    if card.deck.user_id != user.id:
+    if card.deck.user_id != principal.id:
         return jsonify({'message': 'You do not have permission to update this card'}), 403
 
     data = request.json
     front = data.get('front', card.front)
     back = data.get('back', card.back)
     knowledge_level = data.get('knowledge_level', card.knowledge_level)
-    last_revised = data.get('last_revised', card.last_revised)
-    revision_due = data.get('revision_due', card.revision_due)
+    # Dates are parsed only when given, and left as they are otherwise
+    last_revised = data.get('last_revised')
+    revision_due = data.get('revision_due')
 
     if last_revised != None:
         try:
@@ -190,60 +274,71 @@ def update_card(jwt_data, card_id):
 
 @card_bp.route('/api/cards', methods=['PUT'])
 @token_required
-def update_cards(jwt_data):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def update_cards(principal):
     data = request.json
 
     if not isinstance(data, list):
         return jsonify({'message': 'Expected a list as body'}), 400
 
+    changes = {}
+
     for new_card in data:
+        if not isinstance(new_card, dict):
+            return jsonify({'message': 'Expected a card object'}), 400
+
         id = new_card.get('id')
 
         if not id:
             return jsonify({'message': 'Missing id field'}), 400
 
-        card = db.session.get(Card, id)
-
-        if not card:
-            return jsonify({'message': 'Card with id {} not found'.format(id)}), 404
-
-        if card.deck.user_id != user.id:
-            return jsonify({'message': 'You do not have permission to update card with id {}'.format(id)}), 403
+        try:
+            id = int(id)
+        except:
+            return jsonify({'message': 'Field "id" must be an integer'}), 400
 
-        front = new_card.get('front', card.front)
-        back = new_card.get('back', card.back)
-        knowledge_level = new_card.get('knowledge_level', card.knowledge_level)
-        last_revised = new_card.get('last_revised', card.last_revised)
-        revision_due = new_card.get('revision_due', card.revision_due)
+        fields = {key: new_card[key]
+                  for key in ('front', 'back') if key in new_card}
 
-        if last_revised != None:
-            try:
-                card.last_revised = date.normalize(
-                    datetime.fromisoformat(last_revised))
-            except:
-                return jsonify({'message': 'Field "last_revised" must be an isoformat date'}), 400
+        for key in ('last_revised', 'revision_due'):
+            if new_card.get(key) != None:
+                try:
+                    fields[key] = date.normalize(
+                        datetime.fromisoformat(new_card[key])).date()
+                except:
+                    return jsonify({'message': 'Field "{}" must be an isoformat date'.format(key)}), 400
 
-        if revision_due != None:
+        if new_card.get('knowledge_level') != None:
             try:
-                card.revision_due = date.normalize(
-                    datetime.fromisoformat(revision_due))
-            except:
-                return jsonify({'message': 'Field "revision_due" must be an isoformat date'}), 400
-
-        if knowledge_level != None:
-            try:
-                card.knowledge_level = int(knowledge_level)
+                fields['knowledge_level'] = int(new_card['knowledge_level'])
             except:
                 return jsonify({'message': 'Field "knowledge_level" must be an integer'}), 400
 
-        card.front = front
-        card.back = back
+        changes.setdefault(id, {}).update(fields)
+
+    # The cards stay locked until the commit, so that the counters are
+    # updated from the values being overwritten
+    rows = db.session.execute(
+        select(Card.id, Card.deck_id, Card.front, Card.back,
+               Card.knowledge_level, Card.last_revised, Card.revision_due,
+               Deck.user_id)
+        .join(Deck, Card.deck_id == Deck.id)
+        .where(Card.id.in_(changes))
+        .order_by(Card.id)
+        .with_for_update(of=Card)
+    ).mappings()
+    cards = {row['id']: row for row in rows}
+
+    for id in changes:
+        if id not in cards:
+            return jsonify({'message': 'Card with id {} not found'.format(id)}), 404
+
+        if cards[id]['user_id'] != principal.id:
+            return jsonify({'message': 'You do not have permission to update card with id {}'.format(id)}), 403
 
+    old = [cards[id] for id in changes]
+    # Only the fields each card was sent with are written
+    new = [dict(changes[id], id=id) for id in changes]
+    bulk.update_cards(db.session.connection(), old, new)
     db.session.commit()
 
     return jsonify({'message': 'Cards updated successfully'}), 200
@@ -251,18 +346,15 @@ def update_cards(jwt_data):
 
 @card_bp.route('/api/cards/<int:card_id>', methods=['DELETE'])
 @token_required
-def delete_card(jwt_data, card_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
-    card = db.session.get(Card, card_id)
+def delete_card(principal, card_id):
+    # Locked until the commit, so that the counters are updated from the
+    # values being removed
+    card = db.session.get(Card, card_id, with_for_update=True)
 
     if not card:
         return jsonify({'message': 'Card not found'}), 404
 
-    if card.deck.user_id != user.id:
+    if card.deck.user_id != principal.id:
         return jsonify({'message': 'You do not have permission to delete this card'}), 403
 
     db.session.delete(card)
@@ -1,47 +1,41 @@
-from datetime import datetime
+import time
+from datetime import datetime, timedelta
 from flask import Blueprint, request, jsonify, current_app
-from ..models import Deck, User
+from sqlalchemy import func
+from ..models import Deck, DeckDue, User, bulk, search
 from ..extensions import db
 from ..util.auth import token_required
+from ..util import etag, pagination
 
 deck_bp = Blueprint('deck', __name__)
 
 
 @deck_bp.route('/api/decks', methods=['POST'])
 @token_required
-def create_deck(jwt_data):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def create_deck(principal):
     data = request.json
     name = data.get('name')
 
     if not name:
         return jsonify({'message': 'Deck name is required'}), 400
 
-    deck = Deck(name=name, user=user)
+    deck = Deck(name=name, user_id=principal.id)
     db.session.add(deck)
     db.session.commit()
 
-    return jsonify({'data': deck.get_json(cards_count='all,new,due')}), 201
+    return jsonify({'data': deck.get_json(
+        cards_count='all,new,due', tzutcdelta=principal.tzutcdelta)}), 201
 
 
 @deck_bp.route('/api/decks/<int:deck_id>', methods=['GET'])
 @token_required
-def get_deck(jwt_data, deck_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def get_deck(principal, deck_id):
     deck = db.session.get(Deck, deck_id)
 
     if not deck:
         return jsonify({'message': 'Deck not found'}), 404
 
-    if not deck.shared and deck.user_id != user.id:
+    if not deck.shared and deck.user_id != principal.id:
         return jsonify({'message': 'You do not own this deck'}), 403
 
     cards_count = request.args.get('card_count')
@@ -49,25 +43,70 @@ def get_deck(jwt_data, deck_id):
     if cards_count != None:
         cards_count = cards_count.split(',')
 
-    return jsonify({
-        'data': deck.get_json(cards_count, tzutcdelta=user.tzutcdelta)
-    }), 200
+    # Due counts go up to the end of the requesting user's day
+    today = None
 
+    if cards_count and 'due' in cards_count:
+        today = (datetime.utcnow() +
+                 timedelta(seconds=principal.tzutcdelta)).date()
 
-@deck_bp.route('/api/decks/<int:deck_id>', methods=['PUT'])
+    tag = etag.compute(deck.id, deck.version, request.query_string, today)
+    response = etag.not_modified(tag)
+
+    if response:
+        return response
+
+    return etag.tag(jsonify({
+        'data': deck.get_json(cards_count, tzutcdelta=principal.tzutcdelta)
+    }), tag), 200
+
+
+@deck_bp.route('/api/decks/<int:deck_id>/forecast', methods=['GET'])
 @token_required
-def update_deck(jwt_data, deck_id):
-    user = db.session.get(User, jwt_data['user_id'])
+def get_deck_forecast(principal, deck_id):
+    deck = db.session.get(Deck, deck_id)
+
+    if not deck:
+        return jsonify({'message': 'Deck not found'}), 404
+
+    if not deck.shared and deck.user_id != principal.id:
+        return jsonify({'message': 'You do not own this deck'}), 403
+
+    try:
+        days = int(request.args.get('days', 30))
+    except:
+        return jsonify({'message': 'Days must be an integer'}), 400
+
+    days = min(max(days, 1), current_app.config.get('MAX_FORECAST_DAYS', 365))
+    today = (datetime.utcnow() + timedelta(seconds=principal.tzutcdelta)).date()
+    tag = etag.compute(deck.id, deck.version, today, days)
+    response = etag.not_modified(tag)
 
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
+    if response:
+        return response
 
+    cache = current_app.extensions['forecasts']
+    key = ('deck', deck.id, days)
+    entry = cache.get(key)
+
+    if entry is not None and entry[0] == (deck.version, today):
+        return etag.tag(jsonify({'data': entry[1]}), tag), 200
+
+    data = DeckDue.forecast(DeckDue.deck_id == deck.id, today, days)
+    cache.set(key, ((deck.version, today), data))
+
+    return etag.tag(jsonify({'data': data}), tag), 200
+
+
+@deck_bp.route('/api/decks/<int:deck_id>', methods=['PUT'])
+@token_required
+def update_deck(principal, deck_id):
     deck = db.session.get(Deck, deck_id)
 
     if not deck:
         return jsonify({'message': 'Deck not found'}), 404
 
-    if deck.user_id != user.id:
+    if deck.user_id != principal.id:
         return jsonify({'message': 'You do not own this deck'}), 403
 
     data = request.json
@@ -84,22 +123,17 @@ def update_deck(jwt_data, deck_id):
 
 @deck_bp.route('/api/decks/<int:deck_id>', methods=['DELETE'])
 @token_required
-def delete_deck(jwt_data, deck_id):
-    user = db.session.get(User, jwt_data['user_id'])
-
-    if not user:
-        return jsonify({'message': 'User not found'}), 404
-
+def delete_deck(principal, deck_id):
     deck = db.session.get(Deck, deck_id)
 
     if not deck:
         return jsonify({'message': 'Deck not found'}), 404
 
-    if deck.user_id != user.id:
+    if deck.user_id != principal.id:
         return jsonify({'message': 'You do not own this deck'}), 403
 
     data = deck.get_json()
-    db.session.delete(deck)
+    bulk.delete_decks(db.session.connection(), [deck.id])
     db.session.commit()
 
     return jsonify({'data': data}), 200
@@ -110,20 +144,54 @@ def search_decks():
     q = request.args.get('q')
     limit = request.args.get('limit')
     offset = request.args.get('offset')
+    cursor = request.args.get('cursor')
     total_count = request.args.get('total_count') != None
     card_count = request.args.get('card_count')
 
     if card_count != None:
         card_count = card_count.split(',')
 
-    query = Deck.query.filter(Deck.shared == True)
+    # Any write to a shared deck raises the highest version among them, and
+    # removing one without such a write lowers their number.
+    shared_count, latest_version = db.session.query(
+        func.count(Deck.id), func.max(Deck.version)) \
+        .filter(Deck.shared == True).one()
+    # Due counts go up to the end of each owner's day, and time zones are
+    # whole quarter hours apart from UTC.
+    quarter = None
+
+    if card_count and 'due' in card_count:
+        quarter = int(time.time() // 900)
+
+    tag = etag.compute(shared_count, latest_version, request.query_string, quarter)
+    response = etag.not_modified(tag)
+
+    if response:
+        return response
+
+    query = db.session.query(
+        Deck.id, Deck.name, User.username.label('user'), Deck.shared,
+        Deck.all_count, Deck.new_count,
+        User.tzutcdelta.label('owner_tzutcdelta')) \
+        .join(User, Deck.user_id == User.id) \
+        .filter(Deck.shared == True).order_by(Deck.id)
+
+    ranked = False
 
     if q is not None:
-        query = query.filter(Deck.name.ilike(f'%{q}%'))
+        query, ranked = search.filter(query, Deck.name, q)
 
     if total_count:
         total_count = query.count()
 
+    if cursor is not None:
+        try:
+            cursor = pagination.decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'message': 'Cursor is invalid'}), 400
+
+        query = pagination.seek(query, Deck.id, cursor)
+
     if limit is not None:
         try:
             limit = max(int(limit), 0)
@@ -140,13 +208,15 @@ def search_decks():
 
             query = query.offset(offset)
 
-    decks = query.all()
+    decks, next_cursor = pagination.fetch_page(
+        query, limit, pagination.page_offset(cursor, offset) if ranked else None)
 
-    deck_list = [deck.get_json(card_count) for deck in decks]
+    counts = Deck.count_cards(decks, card_count) if card_count else None
+    deck_list = [Deck.row_json(deck, counts) for deck in decks]
 
-    data = {'data': deck_list}
+    data = {'data': deck_list, 'next_cursor': next_cursor}
 
     if total_count:
         data['count'] = total_count
 
-    return jsonify(data), 200
+    return etag.tag(jsonify(data), tag), 200
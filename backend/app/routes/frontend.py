@@ -1,16 +1,111 @@
-from flask import Blueprint, send_from_directory, send_file
+import mimetypes
+import os
+from flask import Blueprint, current_app, request, send_from_directory
+from werkzeug.security import safe_join
+from ..util import etag
 
 frontend_bp = Blueprint('frontend', __name__)
 
+# Encodings of the variants written next to each file by the frontend
+# build, in order of preference
+ENCODINGS = [('br', '.br'), ('gzip', '.gz')]
+# Vite puts a hash of their content in the names of assets
+IMMUTABLE = 'public, max-age=31536000, immutable'
+
+
+def frontend_dir():
+    return current_app.config.get(
+        'FRONTEND_DIR', os.path.join(current_app.root_path, '..', 'frontend'))
+
+
+# The first encoding accepted by the client with a variant of path,
+# as an (encoding, path) pair, or None.
+def find_variant(directory, name):
+    for encoding, suffix in ENCODINGS:
+        if request.accept_encodings[encoding] <= 0:
+            continue
+
+        path = safe_join(directory, name + suffix)
+
+        if path and os.path.isfile(path):
+            return encoding, name + suffix
+
+    return None
+
+
+def send_static(directory, name):
+    variant = find_variant(directory, name)
+
+    if variant is None:
+        response = send_from_directory(directory, name)
+    else:
+        encoding, variant_name = variant
+        response = send_from_directory(
+            directory, variant_name, mimetype=mimetypes.guess_type(name)[0])
+        response.headers['Content-Encoding'] = encoding
+
+    response.vary.add('Accept-Encoding')
+    return response
+
+
+# index.html is read once per worker along with its compressed variants,
+# since every route of the single page app is answered with it. Returns
+# the content and entity tag of each encoding, by encoding.
+def load_index(directory):
+    index = {}
+
+    for encoding, suffix in [(None, '')] + ENCODINGS:
+        path = os.path.join(directory, 'index.html' + suffix)
+
+        if os.path.isfile(path):
+            with open(path, 'rb') as file:
+                content = file.read()
+
+            index[encoding] = (content, etag.compute(content))
+
+    return index
+
+
 @frontend_bp.route('/', defaults={'name': ''}, methods=['GET'])
 @frontend_bp.route('/<path:name>', methods=['GET'])
-def index(name): # pragma: no cover
-    return send_file('../frontend/index.html')
+def index(name):
+    directory = frontend_dir()
+    cache = current_app.extensions['frontend']
+
+    if directory not in cache:
+        variants = load_index(directory)
+
+        if None not in variants:
+            return current_app.response_class('Frontend is not built', status=404)
+
+        cache[directory] = variants
+
+    variants = cache[directory]
+    encoding = next((encoding for encoding, _ in ENCODINGS if encoding in variants
+                     and request.accept_encodings[encoding] > 0), None)
+    content, tag = variants[encoding]
+    response = etag.not_modified(tag)
+
+    if response is None:
+        response = current_app.response_class(content, mimetype='text/html')
+
+        if encoding:
+            response.headers['Content-Encoding'] = encoding
+
+        etag.tag(response, tag)
+
+    response.vary.add('Accept-Encoding')
+    return response
+
 
 @frontend_bp.route('/favicon.svg', methods=['GET'])
-def favicon(): # pragma: no cover
-    return send_file('../frontend/favicon.svg')
+def favicon():
+    return send_static(frontend_dir(), 'favicon.svg')
+
 
 @frontend_bp.route('/assets/<path:name>', methods=['GET'])
-def frontend(name): # pragma: no cover
-    return send_from_directory('../frontend/assets', name)
+def frontend(name):
+    response = send_static(os.path.join(frontend_dir(), 'assets'), name)
+    response.headers['Cache-Control'] = IMMUTABLE
+
+    return response
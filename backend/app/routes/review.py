@@ -0,0 +1,96 @@
+from datetime import datetime
+from flask import Blueprint, request, jsonify
+from sqlalchemy import select
+from ..models import Card, Deck, bulk
+from ..extensions import db
+from ..util.auth import token_required
+from ..util import date
+from .. import scheduler
+
+review_bp = Blueprint('review', __name__)
+
+
+@review_bp.route('/api/reviews', methods=['POST'])
+@token_required
+def create_reviews(principal):
+    data = request.json
+
+    if not isinstance(data, list):
+        return jsonify({'message': 'Expected a list as body'}), 400
+
+    reviews = []
+
+    for review in data:
+        if not isinstance(review, dict) or not isinstance(review.get('card_id'), int):
+            return jsonify({'message': 'Field "card_id" must be an integer'}), 400
+
+        grade = review.get('grade')
+
+        if grade not in scheduler.GRADES:
+            return jsonify({'message': 'Field "grade" must be one of {}'.format(
+                ', '.join(scheduler.GRADES))}), 400
+
+        reviewed_at = review.get('reviewed_at')
+
+        try:
+            if reviewed_at == None:
+                reviewed_at = datetime.utcnow()
+            else:
+                reviewed_at = date.normalize(datetime.fromisoformat(reviewed_at))
+        except:
+            return jsonify({'message': 'Field "reviewed_at" must be an isoformat date'}), 400
+
+        reviews.append((review['card_id'], grade, reviewed_at))
+
+    ids = {card_id for card_id, _, _ in reviews}
+    # The cards stay locked until the commit, so that concurrent reviews of
+    # a card are applied one after the other instead of losing grades
+    rows = db.session.execute(
+        select(Card.id, Card.deck_id, Card.front, Card.back,
+               Card.knowledge_level, Card.last_revised, Card.revision_due,
+               Deck.user_id)
+        .join(Deck, Card.deck_id == Deck.id)
+        .where(Card.id.in_(ids))
+        .order_by(Card.id)
+        .with_for_update(of=Card)
+    ).mappings()
+    cards = {}
+
+    for row in rows:
+        if row['user_id'] != principal.id:
+            return jsonify({'message': 'You do not have permission to review card with id {}'.format(row['id'])}), 403
+
+        cards[row['id']] = row
+
+    missing = ids - cards.keys()
+
+    if missing:
+        return jsonify({'message': 'Card with id {} not found'.format(min(missing))}), 404
+
+    new = {card_id: dict(card) for card_id, card in cards.items()}
+    times_reviewed = dict.fromkeys(cards, 0)
+
+    for card_id, grade, reviewed_at in sorted(reviews, key=lambda review: review[2]):
+        card = new[card_id]
+        card['knowledge_level'], card['revision_due'] = scheduler.schedule(
+            card['knowledge_level'], grade, times_reviewed[card_id], reviewed_at)
+        card['last_revised'] = reviewed_at.date()
+        times_reviewed[card_id] += 1
+
+    # Only the scheduling columns are written, the front and back are not
+    bulk.update_cards(db.session.connection(), list(cards.values()), [
+        {key: card[key] for key in ['id'] + bulk.SCHEDULING_COLUMNS}
+        for card in new.values()
+    ])
+    db.session.commit()
+
+    data = [{
+        'id': card['id'],
+        'front': card['front'],
+        'back': card['back'],
+        'revision_due': card['revision_due'].isoformat(),
+        'last_revised': card['last_revised'].isoformat(),
+        'knowledge_level': card['knowledge_level']
+    } for card in new.values()]
+
+    return jsonify({'message': 'Reviews applied successfully', 'data': data}), 200
@@ -0,0 +1,118 @@
+import csv
+from flask import Blueprint, Response, request, jsonify, stream_with_context, current_app
+from sqlalchemy import select
+from ..models import Deck, Card, bulk
+from ..extensions import db
+from ..util.auth import token_required
+from ..util import deck_file
+
+transfer_bp = Blueprint('transfer', __name__)
+
+EXPORT_BATCH_SIZE = 1000
+# Rejected rows reported back by an import, beyond which they are only counted
+MAX_IMPORT_ERRORS = 100
+
+
+@transfer_bp.route('/api/decks/<int:deck_id>/export', methods=['GET'])
+@token_required
+def export_deck(principal, deck_id):
+    deck = db.session.get(Deck, deck_id)
+
+    if not deck:
+        return jsonify({'message': 'Deck not found'}), 404
+
+    if not deck.shared and deck.user_id != principal.id:
+        return jsonify({'message': 'You do not own this deck'}), 403
+
+    format = request.args.get('format', 'csv')
+
+    if format not in deck_file.MIMETYPES:
+        return jsonify({'message': 'Format must be one of {}'.format(
+            ', '.join(deck_file.MIMETYPES))}), 400
+
+    # Rows are fetched in batches, from a server side cursor where the
+    # driver has one, so memory use does not grow with the deck.
+    result = db.session.execute(
+        select(*[getattr(Card, field) for field in deck_file.FIELDS])
+        .where(Card.deck_id == deck.id)
+        .order_by(Card.id)
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+    )
+    response = Response(
+        stream_with_context(deck_file.write(format, result.partitions())),
+        mimetype=deck_file.MIMETYPES[format])
+    response.headers['Content-Disposition'] = \
+        'attachment; filename=deck-{}.{}'.format(deck.id, format)
+
+    return response
+
+
+# Expects the file as the raw request body, in the format given by the
+# query or the content type, and not as a multipart form upload.
+@transfer_bp.route('/api/decks/<int:deck_id>/import', methods=['POST'])
+@token_required
+def import_deck(principal, deck_id):
+    deck = db.session.get(Deck, deck_id)
+
+    if not deck:
+        return jsonify({'message': 'Deck not found'}), 404
+
+    if deck.user_id != principal.id:
+        return jsonify({'message': 'You do not own this deck'}), 403
+
+    if request.mimetype.startswith('multipart/'):
+        return jsonify({'message': 'Expected the file as the request body, '
+                                   'not as a multipart form'}), 415
+
+    format = request.args.get('format')
+
+    if format == None:
+        format = 'tsv' if request.mimetype == deck_file.MIMETYPES['tsv'] else 'csv'
+
+    if format not in deck_file.DIALECTS:
+        return jsonify({'message': 'Format must be one of {}'.format(
+            ', '.join(deck_file.DIALECTS))}), 400
+
+    batch_size = current_app.config.get('IMPORT_BATCH_SIZE', 1000)
+    connection = db.session.connection()
+    batch = []
+    accepted = 0
+    rejected = 0
+    errors = []
+    line = 0
+
+    # The upload is parsed as it is received and written in batches,
+    # all within one transaction.
+    try:
+        for line, record in deck_file.read(format, request.stream):
+            try:
+                card = deck_file.to_card(record)
+            except ValueError as error:
+                rejected += 1
+
+                if len(errors) < MAX_IMPORT_ERRORS:
+                    errors.append({'line': line, 'message': str(error)})
+
+                continue
+
+            card['deck_id'] = deck.id
+            batch.append(card)
+
+            if len(batch) == batch_size:
+                bulk.insert_cards(connection, batch)
+                accepted += len(batch)
+                batch = []
+    except (ValueError, csv.Error) as error:
+        db.session.rollback()
+        return jsonify({'message': 'Line {}: {}'.format(line + 1, error)}), 400
+
+    bulk.insert_cards(connection, batch)
+    accepted += len(batch)
+    db.session.commit()
+
+    return jsonify({
+        'message': 'Deck imported successfully',
+        'accepted': accepted,
+        'rejected': rejected,
+        'errors': errors
+    }), 200
@@ -1,9 +1,11 @@
-from datetime import datetime
+from datetime import datetime, timedelta
 from numbers import Integral
-from flask import Blueprint, request, jsonify
-from ..models import User, Card, Deck
+from flask import Blueprint, current_app, request, jsonify
+from sqlalchemy import func, select
+from ..models import User, Deck, DeckDue, bulk, search
 from ..extensions import db
-from ..util.auth import token_required
+from ..util.auth import token_required, forget_principal
+from ..util import etag, pagination
 
 user_bp = Blueprint('user', __name__)
 
@@ -43,12 +45,21 @@ def search_users():
     q = request.args.get('q')
     limit = request.args.get('limit')
     offset = request.args.get('offset')
+    cursor = request.args.get('cursor')
 
-    query = db.session.query(User)
+    query = db.session.query(*User.json_columns()).order_by(User.id)
 
     if q is not None:
         query = query.filter(User.username.ilike(f'%{q}%'))
 
+    if cursor is not None:
+        try:
+            cursor = pagination.decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'message': 'Cursor is invalid'}), 400
+
+        query = pagination.seek(query, User.id, cursor)
+
     if limit is not None:
         try:
             limit = max(int(limit), 0)
@@ -65,26 +76,21 @@ def search_users():
 
             query = query.offset(offset)
 
-    users = query.all()
+    users, next_cursor = pagination.fetch_page(query, limit)
 
-    result = [user.get_json() for user in users]
-    return jsonify({'data': result}), 200
+    result = [user._asdict() for user in users]
+    return jsonify({'data': result, 'next_cursor': next_cursor}), 200
 
 
 @user_bp.route('/api/users/<int:user_id>', methods=['PUT'])
 @token_required
-def update_user(jwt_data, user_id):
+def update_user(principal, user_id):
     user = db.session.get(User, user_id)
 
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    request_user = db.session.get(User, jwt_data['user_id'])
-
-    if not request_user:
-        return jsonify({'message': 'Request user not found'}), 404
-
-    if user.id != request_user.id and not request_user.admin:
+    if user.id != principal.id and not principal.admin:
         return jsonify({'message': 'You do not have the right to update this user'}), 403
 
     data = request.get_json()
@@ -92,7 +98,7 @@ def update_user(jwt_data, user_id):
     admin = data.get('admin')
 
     if admin:
-        if not request_user.admin:
+        if not principal.admin:
             return jsonify({'message': 'You do not have the right to update the "admin" field'}), 403
 
         user.admin = admin
@@ -111,30 +117,33 @@ def update_user(jwt_data, user_id):
         user.set_password(password)
 
     username = data.get('username', user.username)
+
+    if username != user.username:
+        Deck.bump_versions(user.id)
+
     user.username = username
     db.session.commit()
+    forget_principal(user.id)
 
     return jsonify({'data': user.get_json()}), 200
 
 
 @user_bp.route('/api/users/<int:user_id>', methods=['DELETE'])
 @token_required
-def delete_user(jwt_data, user_id):
+def delete_user(principal, user_id):
     user = db.session.get(User, user_id)
 
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    request_user = db.session.get(User, jwt_data['user_id'])
-
-    if not request_user:
-        return jsonify({'message': 'Request user not found'}), 404
-
-    if user.id != request_user.id and not request_user.admin:
+    if user.id != principal.id and not principal.admin:
         return jsonify({'message': 'You do not have the right to delete this user'}), 403
 
+    bulk.delete_decks(db.session.connection(),
+                      select(Deck.id).where(Deck.user_id == user.id))
     db.session.delete(user)
     db.session.commit()
+    forget_principal(user.id)
 
     return jsonify({'data': user.get_json()}), 200
 
@@ -143,18 +152,13 @@ def delete_user(jwt_data, user_id):
 
 @user_bp.route('/api/users/<int:user_id>/decks/<int:deck_id>', methods=['POST'])
 @token_required
-def add_deck(jwt_data, user_id, deck_id):
+def add_deck(principal, user_id, deck_id):
     user = db.session.get(User, user_id)
 
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    request_user = db.session.get(User, jwt_data['user_id'])
-
-    if not request_user:
-        return jsonify({'message': 'Request user not found'}), 404
-
-    if user.id != request_user.id and not request_user.admin:
+    if user.id != principal.id and not principal.admin:
         return jsonify({'message': 'You do not have the right to update this user'}), 403
 
     deck = db.session.get(Deck, deck_id)
@@ -164,11 +168,9 @@ def add_deck(jwt_data, user_id, deck_id):
 
     new_deck = Deck(name=deck.name, user=user)
     db.session.add(new_deck)
-    db.session.commit()
-    db.session.refresh(new_deck)
+    db.session.flush()
 
-    db.session.add_all(Card(front=card.front, back=card.back,
-                       deck=new_deck) for card in deck.cards)
+    bulk.copy_cards(db.session.connection(), deck.id, new_deck.id)
     db.session.commit()
 
     return jsonify({'data': new_deck.get_json(cards_count='all,due,new')}), 201
@@ -176,32 +178,38 @@ def add_deck(jwt_data, user_id, deck_id):
 
 @user_bp.route('/api/users/<int:user_id>/decks', methods=['GET'])
 @token_required
-def search_user_decks(jwt_data, user_id):
+def search_user_decks(principal, user_id):
     user = db.session.get(User, user_id)
 
     if not user:
         return jsonify({'message': 'User not found'}), 404
 
-    request_user = db.session.get(User, jwt_data['user_id'])
-
-    if not request_user:
-        return jsonify({'message': 'Request user not found'}), 404
-
-    if user.id != request_user.id and not request_user.admin:
+    if user.id != principal.id and not principal.admin:
         return jsonify({'message': 'You do not have the right to view this user'}), 403
 
     q = request.args.get('q')
     limit = request.args.get('limit')
     offset = request.args.get('offset')
+    cursor = request.args.get('cursor')
     card_count = request.args.get('card_count')
 
     if card_count != None:
         card_count = card_count.split(',')
 
-    query = Deck.query.filter(Deck.user_id == user.id)
+    query = Deck.query.filter(Deck.user_id == user.id).order_by(Deck.id)
+
+    ranked = False
 
     if q is not None:
-        query = query.filter(Deck.name.ilike(f'%{q}%'))
+        query, ranked = search.filter(query, Deck.name, q)
+
+    if cursor is not None:
+        try:
+            cursor = pagination.decode_cursor(cursor)
+        except ValueError:
+            return jsonify({'message': 'Cursor is invalid'}), 400
+
+        query = pagination.seek(query, Deck.id, cursor)
 
     if limit is not None:
         try:
@@ -219,7 +227,97 @@ def search_user_decks(jwt_data, user_id):
 
             query = query.offset(offset)
 
-    decks = query.all()
+    decks, next_cursor = pagination.fetch_page(
+        query, limit, pagination.page_offset(cursor, offset) if ranked else None)
+
+    counts = Deck.count_cards(decks, card_count) if card_count else None
+    data = [deck.get_json(card_count, counts=counts) for deck in decks]
+    return jsonify({'data': data, 'next_cursor': next_cursor}), 200
+
+
+# The time zone offset of a user, the number of their decks and their
+# highest version, or None when there is no such user. Card writes bump
+# the versions of their decks, so whatever is drawn from the decks of a
+# user is still current while the last two stay the same.
+def deck_state(user_id):
+    return db.session.query(User.tzutcdelta, func.count(Deck.id),
+                            func.max(Deck.version)) \
+                     .outerjoin(Deck, Deck.user_id == User.id) \
+                     .filter(User.id == user_id) \
+                     .group_by(User.id) \
+                     .first()
+
+
+@user_bp.route('/api/users/<int:user_id>/summary', methods=['GET'])
+@token_required
+def get_user_summary(principal, user_id):
+    if user_id != principal.id and not principal.admin:
+        return jsonify({'message': 'You do not have the right to view this user'}), 403
+
+    state = deck_state(user_id)
+
+    if state is None:
+        return jsonify({'message': 'User not found'}), 404
+
+    tzutcdelta, deck_count, latest_version = state
+    today = (datetime.utcnow() + timedelta(seconds=tzutcdelta)).date()
+    key = (deck_count, latest_version, today)
+    tag = etag.compute(user_id, *key)
+    response = etag.not_modified(tag)
+
+    if response is not None:
+        return response
+
+    cache = current_app.extensions['summaries']
+    entry = cache.get(user_id)
+
+    if entry is not None and entry[0] == key:
+        return etag.tag(jsonify({'data': entry[1]}), tag), 200
+
+    decks = [row._asdict() for row in Deck.summarize(user_id, today)]
+    data = {name: sum(deck[name] for deck in decks) for name in
+            ('all_count', 'new_count', 'due_count', 'due_tomorrow_count',
+             'due_week_count')}
+    data['decks'] = decks
+    cache.set(user_id, (key, data))
+
+    return etag.tag(jsonify({'data': data}), tag), 200
+
+
+@user_bp.route('/api/users/<int:user_id>/forecast', methods=['GET'])
+@token_required
+def get_user_forecast(principal, user_id):
+    if user_id != principal.id and not principal.admin:
+        return jsonify({'message': 'You do not have the right to view this user'}), 403
+
+    try:
+        days = int(request.args.get('days', 30))
+    except:
+        return jsonify({'message': 'Days must be an integer'}), 400
+
+    days = min(max(days, 1), current_app.config.get('MAX_FORECAST_DAYS', 365))
+    state = deck_state(user_id)
+
+    if state is None:
+        return jsonify({'message': 'User not found'}), 404
+
+    tzutcdelta, deck_count, latest_version = state
+    today = (datetime.utcnow() + timedelta(seconds=tzutcdelta)).date()
+    tag = etag.compute(user_id, deck_count, latest_version, today, days)
+    response = etag.not_modified(tag)
+
+    if response is not None:
+        return response
+
+    cache = current_app.extensions['forecasts']
+    key = ('user', user_id, days)
+    entry = cache.get(key)
+
+    if entry is not None and entry[0] == (deck_count, latest_version, today):
+        return etag.tag(jsonify({'data': entry[1]}), tag), 200
+
+    deck_ids = select(Deck.id).where(Deck.user_id == user_id)
+    data = DeckDue.forecast(DeckDue.deck_id.in_(deck_ids), today, days)
+    cache.set(key, ((deck_count, latest_version, today), data))
 
-    data = [deck.get_json(card_count) for deck in decks]
-    return jsonify({'data': data}), 200
+    return etag.tag(jsonify({'data': data}), tag), 200
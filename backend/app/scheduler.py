@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+# Days until the next revision of a card, by knowledge level
+DAYS_TO_SUM = [1, 3, 10, 30, 90]
+MAX_KNOWLEDGE_LEVEL = len(DAYS_TO_SUM) - 1
+
+GRADES = ('fail', 'practice', 'good')
+
+
+# Returns the new knowledge level and revision date of a card graded
+# at reviewed_at, after being reviewed times_reviewed times in the same
+# session. Only 'good' ends the card's session, the other grades put it
+# back for another review.
+def schedule(knowledge_level, grade, times_reviewed, reviewed_at):
+    knowledge_level = knowledge_level or 0
+
+    if grade == 'fail' and times_reviewed < 2:
+        knowledge_level = max(knowledge_level - 1, 0)
+    elif grade == 'good':
+        knowledge_level = min(knowledge_level + 1, MAX_KNOWLEDGE_LEVEL)
+
+    if grade == 'good':
+        days = DAYS_TO_SUM[knowledge_level - 1]
+    else:
+        days = DAYS_TO_SUM[knowledge_level]
+
+    days = max(days / (1 + times_reviewed * 0.5), 1)
+    revision_due = reviewed_at + timedelta(days=int(days))
+
+    return knowledge_level, revision_due.date()
@@ -1,6 +1,40 @@
 import jwt
+from collections import namedtuple
 from flask import request, jsonify, current_app
 from functools import wraps
+from ..extensions import db
+from ..models import User
+
+# What routes need to know about the user making the request
+Principal = namedtuple('Principal', ['id', 'admin', 'tzutcdelta'])
+
+
+def resolve_principal(user_id):
+    cache = current_app.extensions['principals']
+    principal = cache.get(user_id)
+
+    if principal is None:
+        row = db.session.query(User.id, User.admin, User.tzutcdelta) \
+                        .filter(User.id == user_id).first()
+
+        if row is None:
+            return None
+
+        principal = Principal(*row)
+        cache.set(user_id, principal)
+
+    return principal
+
+
+def remember_principal(user):
+    current_app.extensions['principals'].set(
+        user.id, Principal(user.id, user.admin, user.tzutcdelta))
+
+
+# Must be called whenever a user is deleted or any of the
+# fields of Principal change.
+def forget_principal(user_id):
+    current_app.extensions['principals'].pop(user_id)
 
 
 def token_required(f):
@@ -19,6 +53,11 @@ def token_required(f):
         except jwt.DecodeError:
             return jsonify({'message': 'Token is invalid'}), 401
 
-        return f(data, *args, **kwargs)
+        principal = resolve_principal(data['user_id'])
+
+        if not principal:
+            return jsonify({'message': 'User not found'}), 404
+
+        return f(principal, *args, **kwargs)
 
     return decorated
@@ -0,0 +1,98 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+# Least recently used cache whose entries expire ttl seconds after being
+# set. Each worker process holds its own, so entries may be stale for up
+# to ttl seconds when another worker writes.
+class TTLCache:
+    def __init__(self, maxsize, ttl):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return default
+
+            value, expires = entry
+
+            if expires <= time.monotonic():
+                del self.entries[key]
+                return default
+
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+
+        with self.lock:
+            self.entries[key] = (value, time.monotonic() + self.ttl)
+            self.entries.move_to_end(key)
+
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def pop(self, key):
+        with self.lock:
+            self.entries.pop(key, None)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+# Least recently used cache holding values up to a total size of max_size,
+# where the size of each value is given when it is set. Values larger than
+# max_size are not kept.
+class SizedCache:
+    def __init__(self, max_size):
+        self.max_size = max_size
+        self.size = 0
+        self.lock = threading.Lock()
+        self.entries = OrderedDict()
+
+    def get(self, key, default=None):
+        with self.lock:
+            entry = self.entries.get(key)
+
+            if entry is None:
+                return default
+
+            self.entries.move_to_end(key)
+            return entry[0]
+
+    def set(self, key, value, size):
+        if size > self.max_size:
+            return
+
+        with self.lock:
+            self.remove(key)
+            self.entries[key] = (value, size)
+            self.size += size
+
+            while self.size > self.max_size:
+                _, (_, evicted) = self.entries.popitem(last=False)
+                self.size -= evicted
+
+    def remove(self, key):
+        entry = self.entries.pop(key, None)
+
+        if entry is not None:
+            self.size -= entry[1]
+
+    def pop(self, key):
+        with self.lock:
+            self.remove(key)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
@@ -1,7 +1,7 @@
 def normalize(date):
     offset = date.utcoffset()
 
-    if offset:
+    if offset is not None:
         date = date - offset
         return date.replace(tzinfo=None)
 
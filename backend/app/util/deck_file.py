@@ -0,0 +1,106 @@
+import csv
+import io
+import json
+from datetime import datetime
+from ..models import Card
+from ..scheduler import MAX_KNOWLEDGE_LEVEL
+from . import date
+
+# Columns of an exported deck, in order, which an import reads back
+FIELDS = ['front', 'back', 'knowledge_level', 'last_revised', 'revision_due']
+
+MIMETYPES = {
+    'csv': 'text/csv',
+    'tsv': 'text/tab-separated-values',
+    'ndjson': 'application/x-ndjson',
+}
+
+DIALECTS = {
+    'csv': csv.excel,
+    'tsv': csv.excel_tab,
+}
+
+
+def to_record(row):
+    return {
+        'front': row.front,
+        'back': row.back,
+        'knowledge_level': row.knowledge_level,
+        'last_revised': row.last_revised.isoformat() if row.last_revised else None,
+        'revision_due': row.revision_due.isoformat() if row.revision_due else None,
+    }
+
+
+# Yields the text of a deck file chunk by chunk, one chunk for each
+# batch of rows having the columns in FIELDS.
+def write(format, batches):
+    if format == 'ndjson':
+        for rows in batches:
+            yield ''.join(json.dumps(to_record(row)) + '\n' for row in rows)
+
+        return
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, FIELDS, dialect=DIALECTS[format])
+    writer.writeheader()
+
+    for rows in batches:
+        writer.writerows(to_record(row) for row in rows)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+# Yields the line number and fields of each row of a deck file read from a
+# binary stream, raising ValueError if it does not start with a header
+# naming at least the front and back columns.
+def read(format, stream):
+    text = io.TextIOWrapper(io.BufferedReader(stream),
+                            encoding='utf-8-sig', newline='')
+    reader = csv.DictReader(text, dialect=DIALECTS[format])
+
+    if not {'front', 'back'} <= set(reader.fieldnames or []):
+        raise ValueError('The first line must name the columns, '
+                         'including front and back')
+
+    for record in reader:
+        yield reader.line_num, record
+
+
+# Returns the card described by the fields of a row, or raises ValueError
+def to_card(record):
+    card = {}
+
+    for field in ('front', 'back'):
+        card[field] = record.get(field) or ''
+
+        if not card[field]:
+            raise ValueError('Field "{}" is required'.format(field))
+
+        if len(card[field]) > Card.__table__.c[field].type.length:
+            raise ValueError('Field "{}" must have at most {} characters'.format(
+                field, Card.__table__.c[field].type.length))
+
+    try:
+        card['knowledge_level'] = int(record.get('knowledge_level') or 0)
+    except ValueError:
+        card['knowledge_level'] = -1
+
+    if not 0 <= card['knowledge_level'] <= MAX_KNOWLEDGE_LEVEL:
+        raise ValueError('Field "knowledge_level" must be an integer from 0 to {}'.format(
+            MAX_KNOWLEDGE_LEVEL))
+
+    for field in ('last_revised', 'revision_due'):
+        card[field] = None
+
+        if record.get(field):
+            try:
+                card[field] = date.normalize(
+                    datetime.fromisoformat(record[field])).date()
+            except ValueError:
+                raise ValueError('Field "{}" must be an isoformat date'.format(field))
+
+    return card
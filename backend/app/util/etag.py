@@ -0,0 +1,24 @@
+import hashlib
+from flask import current_app, request
+
+
+# Strong entity tag of a response determined entirely by parts
+def compute(*parts):
+    return hashlib.sha1(repr(parts).encode('utf-8')).hexdigest()
+
+
+def tag(response, etag):
+    response.set_etag(etag)
+    # Caches must ask again each time, as the tag is all that says it changed
+    response.headers['Cache-Control'] = 'no-cache'
+
+    return response
+
+
+# Returns a 304 response when the client already holds the tagged
+# representation, or None when it must be sent.
+def not_modified(etag):
+    if not request.if_none_match.contains(etag):
+        return None
+
+    return tag(current_app.response_class(status=304), etag)
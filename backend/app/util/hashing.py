@@ -0,0 +1,67 @@
+import multiprocessing
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from werkzeug.security import check_password_hash
+
+# Pool processes are started afresh rather than forked from the worker,
+# whose other request threads may hold locks a forked child would inherit
+# held forever.
+START_METHOD = 'forkserver' \
+    if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+class Busy(Exception):
+    pass
+
+
+def timed_check(password_hash, password):
+    started = time.monotonic()
+    return check_password_hash(password_hash, password), started
+
+
+# Runs password checks in a pool of worker processes, so that they neither
+# hold the GIL of the request's process nor take more than workers cores.
+# At most max_pending checks may be running or waiting at once, after
+# which Busy is raised. With no workers, checks run in the calling thread.
+class HashingExecutor:
+    def __init__(self, workers, max_pending):
+        self.workers = workers
+        self.slots = threading.BoundedSemaphore(max_pending)
+        self.lock = threading.Lock()
+        self.pool = None
+
+    def get_pool(self):
+        # Created on first use, so that each gunicorn worker has its own
+        with self.lock:
+            if self.pool is None:
+                self.pool = ProcessPoolExecutor(
+                    self.workers, multiprocessing.get_context(START_METHOD))
+
+            return self.pool
+
+    # Returns whether the password matches and how many seconds
+    # the check waited for a worker.
+    def check_password(self, password_hash, password):
+        if not self.slots.acquire(blocking=False):
+            raise Busy()
+
+        try:
+            submitted = time.monotonic()
+
+            if self.workers > 0:
+                future = self.get_pool().submit(
+                    timed_check, password_hash, password)
+                result, started = future.result()
+            else:
+                result, started = timed_check(password_hash, password)
+
+            return result, started - submitted
+        finally:
+            self.slots.release()
+
+    def shutdown(self):
+        with self.lock:
+            if self.pool is not None:
+                self.pool.shutdown()
+                self.pool = None
@@ -0,0 +1,81 @@
+import time
+from contextlib import contextmanager
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+
+
+# Collects the statements run on engine, with their parameters, while
+# the context is open.
+@contextmanager
+def capture_queries(engine):
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters,
+                              context, executemany):
+        statements.append((statement, parameters))
+
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', before_cursor_execute)
+
+
+class QueryStats:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.count = 0
+        self.seconds = 0
+
+
+def before_cursor_execute(conn, cursor, statement, parameters,
+                          context, executemany):
+    context.query_started = time.perf_counter()
+
+
+def after_cursor_execute(conn, cursor, statement, parameters,
+                         context, executemany):
+    elapsed = time.perf_counter() - context.query_started
+
+    # Queries run outside of requests, by commands for one, are not counted
+    if not has_request_context() or 'queries' not in g:
+        return
+
+    g.queries.count += 1
+    g.queries.seconds += elapsed
+
+    if elapsed * 1000 >= current_app.config.get('SLOW_QUERY_MS', 100):
+        current_app.logger.warning('Slow query in %s %s (%.1f ms): %s',
+                                   request.method, request.path,
+                                   elapsed * 1000, statement)
+
+
+def start_request():
+    g.queries = QueryStats()
+
+
+def finish_request(response):
+    stats = g.queries
+    elapsed = time.perf_counter() - stats.started
+    response.headers.add('Server-Timing', 'db;dur={:.1f};desc="{} {}"'.format(
+        stats.seconds * 1000, stats.count,
+        'query' if stats.count == 1 else 'queries'))
+
+    if elapsed * 1000 >= current_app.config.get('SLOW_REQUEST_MS', 500):
+        current_app.logger.warning(
+            'Slow request %s %s (%.1f ms): %d queries taking %.1f ms',
+            request.method, request.path, elapsed * 1000,
+            stats.count, stats.seconds * 1000)
+
+    return response
+
+
+# Counts the queries of each request and the time spent in them, sent in
+# a Server-Timing header, and logs slow requests and queries. Responses
+# streamed after the view returns are sent before their queries run, so
+# these are left out.
+def init_app(app, engine):
+    event.listen(engine, 'before_cursor_execute', before_cursor_execute)
+    event.listen(engine, 'after_cursor_execute', after_cursor_execute)
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,59 @@
+import base64
+import binascii
+import json
+
+
+def encode_cursor(**position):
+    data = json.dumps(position).encode('utf-8')
+    return base64.urlsafe_b64encode(data).decode('ascii').rstrip('=')
+
+
+# A cursor holds either the id of the last row of the previous page or,
+# for results ranked by relevance, the offset of the next page.
+def decode_cursor(cursor):
+    try:
+        data = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        position = json.loads(data)
+        (key, value), = position.items()
+    except (binascii.Error, ValueError, TypeError, AttributeError):
+        raise ValueError('Invalid cursor')
+
+    if key not in ('id', 'offset') or not isinstance(value, int):
+        raise ValueError('Invalid cursor')
+
+    return position
+
+
+def seek(query, column, position):
+    if 'id' in position:
+        return query.filter(column > position['id'])
+
+    return query.offset(max(position['offset'], 0))
+
+
+# Offset of the page being fetched when results are ranked,
+# where an offset parameter takes precedence over the cursor.
+def page_offset(position, offset):
+    if isinstance(offset, int):
+        return offset
+
+    return (position or {}).get('offset', 0)
+
+
+# Fetches one extra row to know whether there is a next page,
+# returning the rows of the page and the cursor to the next one.
+def fetch_page(query, limit, offset=None):
+    if limit is None:
+        return query.all(), None
+
+    rows = query.limit(limit + 1).all()
+
+    if len(rows) <= limit or limit == 0:
+        return rows[:limit], None
+
+    rows = rows[:limit]
+
+    if offset is None:
+        return rows, encode_cursor(id=rows[-1].id)
+
+    return rows, encode_cursor(offset=offset + limit)
@@ -0,0 +1,54 @@
+"""Time taken to list the cards of a shared deck with and without the cache.
+
+Pages of each size are listed from a cold cache, after which the same
+request is answered from the cache.
+
+Run from the backend directory with python -m benchmarks.bench_card_cache
+"""
+from app.extensions import db
+from app.models import Card, Deck
+from app.util.instrumentation import capture_queries
+from .common import login, make_app, print_table, timed
+
+PAGE_SIZES = [10, 100, 1000, 5000]
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user, authorization = login(app)
+    deck = Deck(name='Benchmark', user=user, shared=True)
+    db.session.add(deck)
+    db.session.add_all([Card(front='front', back='back', deck=deck)
+                        for _ in range(max(PAGE_SIZES))])
+    db.session.commit()
+    cache = app.extensions['cards']
+    rows = []
+
+    for size in PAGE_SIZES:
+        path = '/api/decks/{}/cards?limit={}'.format(deck.id, size)
+
+        def get():
+            return client.get(path, headers=authorization)
+
+        def get_cold():
+            cache.clear()
+            return get()
+
+        _, cold = timed(get_cold)
+        get()
+
+        with capture_queries(db.engine) as statements:
+            response = get()
+
+        assert response.status_code == 200, response.json
+        _, warm = timed(get)
+        rows.append([size, '{:.1f}'.format(cold), '{:.1f}'.format(warm),
+                     len(statements), '{:.0f}'.format(cache.size / 1024)])
+
+    print_table(['cards', 'cold ms', 'cached ms', 'cached queries',
+                 'cache KB'], rows)
+
+
+if __name__ == '__main__':
+    main()
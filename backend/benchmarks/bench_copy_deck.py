@@ -0,0 +1,70 @@
+"""Time taken to copy a deck with INSERT ... SELECT, as done by
+POST /api/users/<id>/decks/<id>, against building a Card object per row.
+
+Run from the backend directory with python -m benchmarks.bench_copy_deck
+"""
+from app.extensions import db
+from app.models import Card, Deck, User
+from app.util.instrumentation import capture_queries
+from .common import login, make_app, print_table, timed
+
+DECK_SIZES = [100, 1000, 20000]
+
+
+# The copy as it was done before INSERT ... SELECT
+def orm_copy(deck, user):
+    new_deck = Deck(name=deck.name, user=user)
+    db.session.add(new_deck)
+    db.session.commit()
+    db.session.refresh(new_deck)
+
+    db.session.add_all(Card(front=card.front, back=card.back,
+                       deck=new_deck) for card in deck.cards)
+    db.session.commit()
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user, authorization = login(app)
+    owner = User(username='owner', password='benchpassword')
+    db.session.add(owner)
+    rows = []
+
+    for size in DECK_SIZES:
+        deck = Deck(name='Benchmark', user=owner, shared=True)
+        db.session.add(deck)
+        db.session.flush()
+        db.session.execute(Card.__table__.insert(), [
+            {'front': 'front {}'.format(i), 'back': 'back', 'deck_id': deck.id}
+            for i in range(size)])
+        db.session.commit()
+        deck_id, user_id = deck.id, user.id
+
+        def copy():
+            return client.post('/api/users/{}/decks/{}'.format(user_id, deck_id),
+                               headers=authorization)
+
+        with capture_queries(db.engine) as statements:
+            response = copy()
+
+        assert response.status_code == 201, response.json
+        queries = len(statements)
+        _, elapsed = timed(copy, repeat=3)
+
+        with capture_queries(db.engine) as statements:
+            orm_copy(db.session.get(Deck, deck_id), db.session.get(User, user_id))
+
+        orm_queries = len(statements)
+        _, orm_elapsed = timed(lambda: orm_copy(db.session.get(Deck, deck_id),
+                                                db.session.get(User, user_id)),
+                               repeat=3)
+        rows.append([size, orm_queries, '{:.1f}'.format(orm_elapsed),
+                     queries, '{:.1f}'.format(elapsed)])
+
+    print_table(['cards', 'orm queries', 'orm ms',
+                 'insert-select queries', 'insert-select ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
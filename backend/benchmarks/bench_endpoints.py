@@ -0,0 +1,303 @@
+"""Latency, queries and memory of every route on a seeded database.
+
+Seeds users owning decks of cards, then sends each route a number of
+requests through the Flask test client and reports the p50, p95 and p99
+of their latency, the median and highest number of queries and the peak
+memory allocated by one more request, traced by tracemalloc. Requests run
+one at a time in a fresh session, as they would in a worker, and every
+route must answer them successfully.
+
+The results can be written as JSON and compared with those of another
+commit by python -m benchmarks.compare.
+
+Run from the backend directory with python -m benchmarks.bench_endpoints,
+for instance with --cards-per-deck 1000 for a million cards, and see
+--help for the other options.
+"""
+import argparse
+import json
+import random
+import statistics
+import subprocess
+import time
+import tracemalloc
+from app.extensions import db
+from app.models import Card, Deck, User, bulk
+from app.util.instrumentation import capture_queries
+from .common import make_app, percentile, print_table, seed
+
+PASSWORD = 'benchpassword'
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--decks-per-user', type=int, default=10)
+    parser.add_argument('--cards-per-deck', type=int, default=100)
+    parser.add_argument('--requests', type=int, default=30,
+                        help='requests sent to each route')
+    parser.add_argument('--routes', nargs='*',
+                        help='names of the routes to run, all by default')
+    parser.add_argument('--output', help='file to write the results to as JSON')
+    return parser.parse_args()
+
+
+# The routes to run, each as a name and a function returning the given
+# number of requests, as (method, path, keyword arguments of the test
+# client). Rows the requests need are made by these functions, untimed.
+def routes(client, context):
+    generator = random.Random(0)
+    admin, token = context['admin'], context['token']
+    own_decks, shared_decks = context['own_decks'], context['shared_decks']
+    own_cards, users = context['own_cards'], context['users']
+    headers = {'Authorization': token}
+    created = iter(range(10 ** 9))
+
+    def each(n, make):
+        return [make(i) for i in range(n)]
+
+    def new_decks(n):
+        # Copies of one of the seeded decks, to be deleted
+        ids = []
+
+        for _ in range(n):
+            deck = Deck(name='Copy', user_id=admin)
+            db.session.add(deck)
+            db.session.flush()
+            bulk.copy_cards(db.session.connection(), own_decks[0], deck.id)
+            ids.append(deck.id)
+
+        db.session.commit()
+        return ids
+
+    def new_cards(n):
+        ids = bulk.insert_cards(db.session.connection(), [
+            {'deck_id': own_decks[0], 'front': 'front', 'back': 'back'}
+            for _ in range(n)])
+        db.session.commit()
+        return ids
+
+    def new_users(n):
+        users = [User('delete{}'.format(next(created)), PASSWORD) for _ in range(n)]
+        db.session.add_all(users)
+        db.session.commit()
+        return [user.id for user in users]
+
+    def cursors(n):
+        # Cursors of the pages after the first, walked through beforehand
+        found = []
+        response = client.get('/api/decks?limit=50')
+
+        while len(found) < n and response.json['next_cursor'] is not None:
+            found.append(response.json['next_cursor'])
+            response = client.get('/api/decks?limit=50&cursor={}'.format(found[-1]))
+
+        return [found[i % len(found)] for i in range(n)] if found else [None] * n
+
+    def csv_file(lines):
+        return 'front,back\n' + ''.join(
+            'imported {},back\n'.format(i) for i in range(lines))
+
+    return [
+        ('POST /api/auth', lambda n: each(n, lambda i: (
+            'POST', '/api/auth', {'json': {'username': 'user{}'.format(i % users),
+                                           'password': PASSWORD, 'tzutcdelta': 0}}))),
+        ('POST /api/users', lambda n: each(n, lambda i: (
+            'POST', '/api/users', {'json': {'username': 'new{}'.format(next(created)),
+                                            'password': PASSWORD}}))),
+        ('GET /api/users', lambda n: each(n, lambda i: (
+            'GET', '/api/users?limit=50', {}))),
+        ('GET /api/users?q', lambda n: each(n, lambda i: (
+            'GET', '/api/users?q=user1&limit=50', {}))),
+        ('GET /api/users/<id>', lambda n: each(n, lambda i: (
+            'GET', '/api/users/{}'.format(admin), {'headers': headers}))),
+        ('PUT /api/users/<id>', lambda n: each(n, lambda i: (
+            'PUT', '/api/users/{}'.format(admin),
+            {'json': {'username': 'user0'}, 'headers': headers}))),
+        ('DELETE /api/users/<id>', lambda n: [
+            ('DELETE', '/api/users/{}'.format(user_id), {'headers': headers})
+            for user_id in new_users(n)]),
+        ('GET /api/users/<id>/decks', lambda n: each(n, lambda i: (
+            'GET', '/api/users/{}/decks?card_count=all,new,due'.format(admin),
+            {'headers': headers}))),
+        ('GET /api/users/<id>/summary', lambda n: each(n, lambda i: (
+            'GET', '/api/users/{}/summary'.format(admin), {'headers': headers}))),
+        ('GET /api/users/<id>/forecast', lambda n: each(n, lambda i: (
+            'GET', '/api/users/{}/forecast'.format(admin), {'headers': headers}))),
+        ('POST /api/users/<id>/decks/<id>', lambda n: each(n, lambda i: (
+            'POST', '/api/users/{}/decks/{}'.format(
+                admin, generator.choice(shared_decks)), {'headers': headers}))),
+        ('POST /api/decks', lambda n: each(n, lambda i: (
+            'POST', '/api/decks', {'json': {'name': 'New'}, 'headers': headers}))),
+        ('GET /api/decks', lambda n: each(n, lambda i: (
+            'GET', '/api/decks?card_count=all,new,due&limit=50', {}))),
+        ('GET /api/decks?q', lambda n: each(n, lambda i: (
+            'GET', '/api/decks?q=Deck 1 of&limit=50', {}))),
+        ('GET /api/decks?cursor', lambda n: [
+            ('GET', '/api/decks?limit=50&total_count' +
+             ('&cursor={}'.format(cursor) if cursor else ''), {})
+            for cursor in cursors(n)]),
+        ('GET /api/decks/<id>', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}?card_count=all,new,due'.format(
+                generator.choice(shared_decks)), {'headers': headers}))),
+        ('GET /api/decks/<id>/forecast', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/forecast'.format(generator.choice(shared_decks)),
+            {'headers': headers}))),
+        ('PUT /api/decks/<id>', lambda n: each(n, lambda i: (
+            'PUT', '/api/decks/{}'.format(generator.choice(own_decks)),
+            {'json': {'name': 'Renamed {}'.format(i), 'shared': True},
+             'headers': headers}))),
+        ('DELETE /api/decks/<id>', lambda n: [
+            ('DELETE', '/api/decks/{}'.format(deck_id), {'headers': headers})
+            for deck_id in new_decks(n)]),
+        ('GET /api/decks/<id>/cards', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/cards?limit=50'.format(
+                generator.choice(shared_decks)), {'headers': headers}))),
+        ('GET /api/decks/<id>/cards?all', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/cards'.format(generator.choice(own_decks)),
+            {'headers': headers}))),
+        ('GET /api/decks/<id>/cards?q', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/cards?q=front 1&limit=50'.format(
+                generator.choice(own_decks)), {'headers': headers}))),
+        ('GET /api/decks/<id>/queue', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/queue'.format(generator.choice(own_decks)),
+            {'headers': headers}))),
+        ('POST /api/decks/<id>/cards', lambda n: each(n, lambda i: (
+            'POST', '/api/decks/{}/cards'.format(generator.choice(own_decks)),
+            {'json': {'front': 'front', 'back': 'back'}, 'headers': headers}))),
+        ('POST /api/decks/<id>/cards batch', lambda n: each(n, lambda i: (
+            'POST', '/api/decks/{}/cards'.format(generator.choice(own_decks)),
+            {'json': [{'front': 'front', 'back': 'back'}] * 100,
+             'headers': headers}))),
+        ('GET /api/cards/<id>', lambda n: each(n, lambda i: (
+            'GET', '/api/cards/{}'.format(generator.choice(own_cards)),
+            {'headers': headers}))),
+        ('PUT /api/cards/<id>', lambda n: each(n, lambda i: (
+            'PUT', '/api/cards/{}'.format(generator.choice(own_cards)),
+            {'json': {'front': 'edited'}, 'headers': headers}))),
+        ('PUT /api/cards', lambda n: each(n, lambda i: (
+            'PUT', '/api/cards', {'json': [
+                {'id': card_id, 'knowledge_level': 1, 'revision_due': '2999-01-01'}
+                for card_id in generator.sample(own_cards, 100)],
+                'headers': headers}))),
+        ('DELETE /api/cards/<id>', lambda n: [
+            ('DELETE', '/api/cards/{}'.format(card_id), {'headers': headers})
+            for card_id in new_cards(n)]),
+        ('POST /api/reviews', lambda n: each(n, lambda i: (
+            'POST', '/api/reviews', {'json': [
+                {'card_id': card_id, 'grade': generator.choice(['fail', 'practice', 'good'])}
+                for card_id in generator.sample(own_cards, 20)],
+                'headers': headers}))),
+        ('GET /api/decks/<id>/export', lambda n: each(n, lambda i: (
+            'GET', '/api/decks/{}/export?format=csv'.format(
+                generator.choice(own_decks)), {'headers': headers}))),
+        ('POST /api/decks/<id>/import', lambda n: each(n, lambda i: (
+            'POST', '/api/decks/{}/import?format=csv'.format(
+                generator.choice(own_decks)),
+            {'data': csv_file(1000), 'headers': headers}))),
+    ]
+
+
+def send(client, method, path, kwargs):
+    # Each request starts with an empty session, as it would in a worker
+    db.session.remove()
+
+    with capture_queries(db.engine) as statements:
+        started = time.perf_counter()
+        response = client.open(path, method=method, **kwargs)
+        response.get_data()
+        elapsed = time.perf_counter() - started
+
+    assert response.status_code < 400, (method, path, response.status_code,
+                                        response.get_data()[:200])
+    return elapsed * 1000, len(statements)
+
+
+def run(client, make_requests, n):
+    requests = make_requests(n + 1)
+    latencies = []
+    queries = []
+
+    for method, path, kwargs in requests[:-1]:
+        elapsed, count = send(client, method, path, kwargs)
+        latencies.append(elapsed)
+        queries.append(count)
+
+    tracemalloc.start()
+    send(client, *requests[-1])
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        'requests': n,
+        'p50': percentile(latencies, 0.5),
+        'p95': percentile(latencies, 0.95),
+        'p99': percentile(latencies, 0.99),
+        'queries': statistics.median(queries),
+        'max_queries': max(queries),
+        'peak_mb': peak / 2 ** 20,
+    }
+
+
+def commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def main():
+    args = parse_args()
+    app = make_app()
+    client = app.test_client()
+
+    started = time.perf_counter()
+    user_ids = seed(args.users, args.decks_per_user, args.cards_per_deck, PASSWORD)
+    print('Seeded {} cards in {:.1f} s'.format(
+        args.users * args.decks_per_user * args.cards_per_deck,
+        time.perf_counter() - started))
+
+    admin = user_ids[0]
+    db.session.get(User, admin).admin = True
+    db.session.commit()
+    token = client.post('/api/auth', json={
+        'username': 'user0', 'password': PASSWORD, 'tzutcdelta': 0}).json['token']
+    own_decks = [id for id, in db.session.query(Deck.id)
+                 .filter(Deck.user_id == admin).order_by(Deck.id)]
+    context = {
+        'admin': admin,
+        'token': token,
+        'users': len(user_ids),
+        'own_decks': own_decks,
+        'shared_decks': [id for id, in db.session.query(Deck.id)
+                         .filter(Deck.shared == True)],
+        'own_cards': [id for id, in db.session.query(Card.id)
+                      .filter(Card.deck_id.in_(own_decks))],
+    }
+    results = {}
+
+    for name, make_requests in routes(client, context):
+        if args.routes and name not in args.routes:
+            continue
+
+        results[name] = run(client, make_requests, args.requests)
+
+    print_table(['route', 'p50 ms', 'p95 ms', 'p99 ms', 'queries', 'max', 'peak MB'], [
+        [name, '{:.1f}'.format(result['p50']), '{:.1f}'.format(result['p95']),
+         '{:.1f}'.format(result['p99']), '{:g}'.format(result['queries']),
+         result['max_queries'], '{:.2f}'.format(result['peak_mb'])]
+        for name, result in results.items()])
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump({
+                'commit': commit(),
+                'scale': {'users': args.users, 'decks_per_user': args.decks_per_user,
+                          'cards_per_deck': args.cards_per_deck},
+                'routes': results,
+            }, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
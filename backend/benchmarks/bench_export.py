@@ -0,0 +1,56 @@
+"""Peak memory and time of exporting a deck as the deck grows, against
+listing all of its cards with GET /api/decks/<id>/cards.
+
+Run from the backend directory with python -m benchmarks.bench_export
+"""
+import time
+import tracemalloc
+from app.extensions import db
+from app.models import Card, Deck, recount_decks
+from .common import login, make_app, print_table
+
+DECK_SIZES = [1000, 10000, 100000]
+
+
+def measure(client, path, authorization):
+    db.session.expire_all()
+    tracemalloc.start()
+    start = time.perf_counter()
+    response = client.get(path, headers=authorization)
+    size = sum(len(chunk) for chunk in response.response)
+    elapsed = (time.perf_counter() - start) * 1000
+    peak = tracemalloc.get_traced_memory()[1] / 2 ** 20
+    tracemalloc.stop()
+    response.close()
+
+    return size, elapsed, peak
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user, authorization = login(app)
+    rows = []
+
+    for size in DECK_SIZES:
+        deck = Deck(name='Benchmark', user=user)
+        db.session.add(deck)
+        db.session.flush()
+        db.session.execute(Card.__table__.insert(), [
+            {'front': 'front {}'.format(i), 'back': 'back {}'.format(i),
+             'deck_id': deck.id, 'knowledge_level': 0} for i in range(size)])
+        recount_decks(db.session.connection(), [deck.id])
+        db.session.commit()
+
+        for name, path in [('export', '/api/decks/{}/export?format=csv'),
+                           ('list', '/api/decks/{}/cards')]:
+            _, elapsed, peak = measure(
+                client, path.format(deck.id), authorization)
+            rows.append([size, name, '{:.0f}'.format(elapsed),
+                         '{:.1f}'.format(peak)])
+
+    print_table(['cards', 'request', 'ms', 'peak MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""Time and peak memory of importing CSV files into a deck as they grow.
+
+The file is streamed from disk, so the peak is what the server holds.
+
+Run from the backend directory with python -m benchmarks.bench_import
+"""
+import os
+import tempfile
+import time
+import tracemalloc
+from app.extensions import db
+from app.models import Deck
+from .common import login, make_app, print_table
+
+FILE_SIZES = [1000, 10000, 100000]
+
+
+def write_file(path, size):
+    with open(path, 'w', newline='') as file:
+        file.write('front,back,knowledge_level,last_revised,revision_due\r\n')
+
+        for i in range(size):
+            file.write('front {0},back {0},{1},2023-11-06,2023-11-{2:02}\r\n'.format(
+                i, i % 5, i % 28 + 1))
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user, authorization = login(app)
+    path = os.path.join(tempfile.mkdtemp(), 'deck.csv')
+    rows = []
+
+    def post(size, traced):
+        deck = Deck(name='Benchmark', user=user)
+        db.session.add(deck)
+        db.session.commit()
+
+        with open(path, 'rb') as file:
+            if traced:
+                tracemalloc.start()
+
+            start = time.perf_counter()
+            response = client.post(
+                '/api/decks/{}/import'.format(deck.id), input_stream=file,
+                content_length=os.path.getsize(path), content_type='text/csv',
+                headers=authorization)
+            elapsed = time.perf_counter() - start
+
+            if traced:
+                elapsed = tracemalloc.get_traced_memory()[1] / 2 ** 20
+                tracemalloc.stop()
+
+        assert response.json['accepted'] == size, response.json
+        return elapsed
+
+    for size in FILE_SIZES:
+        write_file(path, size)
+        # Tracing slows the import down, so time and memory are measured apart
+        elapsed = post(size, traced=False)
+        peak = post(size, traced=True)
+        rows.append([size, '{:.2f}'.format(elapsed), '{:.1f}'.format(peak)])
+
+    print_table(['lines', 's', 'peak MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,124 @@
+"""Login and review latency while a burst of users logs in at once.
+
+Starts gunicorn with password checks done inside the request
+(HASHING_WORKERS=0), then with the hashing executor, unbounded and with a
+low admission limit, sends logins and card reviews concurrently and
+reports their p50 and p99 latency. Rejected logins count as errors.
+
+The executor only frees a worker to serve other requests when it has
+threads, so gunicorn runs with 4 workers of 8 threads unless
+BENCH_GUNICORN_ARGS says otherwise.
+
+Run from the backend directory with python -m benchmarks.bench_login_load
+"""
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from werkzeug.security import generate_password_hash
+from app.extensions import db
+from app.models import Card, Deck, User
+from .common import http_request, make_app, percentile, print_table, serve
+
+USERS = 64
+LOGIN_THREADS = 16
+REVIEW_THREADS = 8
+DURATION = 10
+# Name, HASHING_WORKERS and HASHING_MAX_PENDING of each run
+CONFIGURATIONS = [('inline', 0, 8), ('executor', 1, 8),
+                  ('executor, 2 pending', 1, 2)]
+
+
+def seed():
+    make_app(shared=True)
+    password_hash = generate_password_hash('benchpassword')
+    db.session.execute(User.__table__.insert(), [
+        {'username': 'user{}'.format(i), 'password_hash': password_hash,
+         'tzutcdelta': 0} for i in range(USERS)])
+
+    for user_id in range(1, USERS + 1):
+        deck = Deck(name='Deck', user_id=user_id)
+        db.session.add(deck)
+        db.session.add_all(Card(front='front', back='back', deck=deck)
+                           for _ in range(20))
+
+    db.session.commit()
+
+
+def login(i):
+    return http_request('POST', '/api/auth', {
+        'username': 'user{}'.format(i),
+        'password': 'benchpassword',
+        'tzutcdelta': 0
+    })
+
+
+def run(hashing_workers, max_pending):
+    env = {'FLASK_HASHING_WORKERS': str(hashing_workers),
+           'FLASK_HASHING_MAX_PENDING': str(max_pending)}
+
+    with serve(os.getenv('BENCH_GUNICORN_ARGS', '-w 4 --threads 8'), env):
+        # Reviews are sent by users already logged in, with their own cards
+        tokens = [login(i)[1]['token'] for i in range(REVIEW_THREADS)]
+        cards = [[card_id for card_id, in db.session.query(Card.id)
+                  .join(Deck).filter(Deck.user_id == i + 1)]
+                 for i in range(REVIEW_THREADS)]
+        latencies = {'login': [], 'review': []}
+        errors = {'login': 0, 'review': 0}
+        deadline = time.monotonic() + DURATION
+        lock = threading.Lock()
+
+        def record(kind, status, elapsed):
+            with lock:
+                if status >= 400:
+                    errors[kind] += 1
+                else:
+                    latencies[kind].append(elapsed)
+
+        def log_in(thread):
+            i = thread
+
+            while time.monotonic() < deadline:
+                status, _, elapsed = login(i % USERS)
+                record('login', status, elapsed)
+                i += LOGIN_THREADS
+
+        def review(thread):
+            i = 0
+
+            while time.monotonic() < deadline:
+                card_id = cards[thread][i % len(cards[thread])]
+                status, _, elapsed = http_request(
+                    'POST', '/api/reviews', [{'card_id': card_id, 'grade': 'good'}],
+                    {'Authorization': tokens[thread]})
+                record('review', status, elapsed)
+                i += 1
+
+        with ThreadPoolExecutor(LOGIN_THREADS + REVIEW_THREADS) as pool:
+            for thread in range(LOGIN_THREADS):
+                pool.submit(log_in, thread)
+
+            for thread in range(REVIEW_THREADS):
+                pool.submit(review, thread)
+
+        return latencies, errors
+
+
+def main():
+    seed()
+    rows = []
+
+    for name, hashing_workers, max_pending in CONFIGURATIONS:
+        latencies, errors = run(hashing_workers, max_pending)
+
+        for kind in ('login', 'review'):
+            values = latencies[kind]
+            rows.append([name, kind, len(latencies[kind]), errors[kind],
+                         '{:.1f}'.format(percentile(values, 0.5) * 1000),
+                         '{:.1f}'.format(percentile(values, 0.99) * 1000)])
+
+    print_table(['hashing', 'request', 'ok', 'errors', 'p50 ms', 'p99 ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,76 @@
+"""CPU time and peak memory of serializing a 10k card listing.
+
+Compares loading Card objects and calling get_json with selecting the
+columns of get_json as rows, each encoded by the default JSON provider
+and by the orjson one. Memory is the peak traced by tracemalloc while
+building the response, which also slows it down, so times are taken
+with tracing off.
+
+Run from the backend directory with python -m benchmarks.bench_serialization
+"""
+import time
+import tracemalloc
+from datetime import date
+from flask.json.provider import DefaultJSONProvider
+from app.extensions import db
+from app.models import Card, Deck
+from app.util.json_provider import ORJSONProvider
+from .common import login, make_app, print_table
+
+CARDS = 10000
+REPEAT = 5
+
+
+def objects(deck_id):
+    cards = Card.query.filter(Card.deck_id == deck_id).order_by(Card.id)
+    return [card.get_json() for card in cards]
+
+
+def rows(deck_id):
+    cards = db.session.query(*Card.json_columns()) \
+                      .filter(Card.deck_id == deck_id).order_by(Card.id)
+    return [card._asdict() for card in cards]
+
+
+def main():
+    app = make_app()
+    user, _ = login(app)
+    deck = Deck(name='Benchmark', user=user)
+    db.session.add(deck)
+    db.session.add_all([Card(front='front {}'.format(i), back='back',
+                             knowledge_level=1, last_revised=date.today(),
+                             revision_due=date.today(), deck=deck)
+                        for i in range(CARDS)])
+    db.session.commit()
+    deck_id = deck.id
+    providers = [('json', DefaultJSONProvider(app)), ('orjson', ORJSONProvider(app))]
+    results = []
+
+    for load in (objects, rows):
+        for provider_name, provider in providers:
+            def respond():
+                # Loaded objects would otherwise stay in the identity map
+                db.session.expunge_all()
+                return provider.response({'data': load(deck_id)})
+
+            respond()
+            cpu = min(timed_cpu(respond) for _ in range(REPEAT))
+            tracemalloc.start()
+            size = len(respond().get_data())
+            _, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            results.append([load.__name__, provider_name, '{:.1f}'.format(cpu),
+                            '{:.1f}'.format(peak / 2 ** 20),
+                            '{:.0f}'.format(size / 1024)])
+
+    print_table(['load', 'encoder', 'cpu ms', 'peak MB', 'KB'], results)
+
+
+def timed_cpu(f):
+    started = time.process_time()
+    f()
+    return (time.process_time() - started) * 1000
+
+
+if __name__ == '__main__':
+    main()
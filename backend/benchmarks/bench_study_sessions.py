@@ -0,0 +1,283 @@
+"""Throughput, latency and errors of concurrent learners studying.
+
+Seeds users owning decks of cards, starts gunicorn on the database and
+runs a number of virtual users, each a closed loop of study sessions as
+the frontend sends them: log in, list the own decks with their card
+counts, pick a deck with cards to learn, count the cards revised today
+and fetch the queue as the Practice page does, grade the cards and post
+the reviews, then list the decks again. Users wait a think time, drawn
+around --think-time, before each request, and log in again every
+--sessions-per-login sessions. A failed request ends the session.
+
+Reports the requests, errors, throughput and latency percentiles of each
+endpoint, and how many requests fell in each latency bucket.
+
+Run from the backend directory with python -m benchmarks.bench_study_sessions
+--virtual-users 200 --duration 60, and see --help for the other options.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from datetime import datetime, timezone
+from .common import PORT, make_app, percentile, print_table, seed, serve
+
+PASSWORD = 'benchpassword'
+# Upper bounds in milliseconds of the latency histogram buckets
+BUCKETS = [5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, float('inf')]
+# Chance of each grade, a card graded other than good is shown again
+GRADES = {'good': 0.7, 'practice': 0.2, 'fail': 0.1}
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--virtual-users', type=int, default=50)
+    parser.add_argument('--duration', type=float, default=30,
+                        help='seconds the virtual users run for')
+    parser.add_argument('--think-time', type=float, default=1.0,
+                        help='mean seconds waited before each request')
+    parser.add_argument('--sessions-per-login', type=int, default=10)
+    parser.add_argument('--users', type=int, default=100,
+                        help='seeded users, shared by the virtual users')
+    parser.add_argument('--decks-per-user', type=int, default=10)
+    parser.add_argument('--cards-per-deck', type=int, default=100)
+    parser.add_argument('--gunicorn-args', default='-w 4',
+                        help='arguments of the server, 4 workers by default')
+    parser.add_argument('--timeout', type=float, default=30,
+                        help='seconds after which a request is an error')
+    return parser.parse_args()
+
+
+class Stats:
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.sessions = 0
+
+    def record(self, endpoint, status, elapsed):
+        self.latencies.setdefault(endpoint, [])
+        self.errors.setdefault(endpoint, 0)
+
+        if status >= 400 or status == 0:
+            self.errors[endpoint] += 1
+        else:
+            self.latencies[endpoint].append(elapsed * 1000)
+
+
+class RequestFailed(Exception):
+    pass
+
+
+# One keep-alive HTTP/1.1 connection to the server started by serve,
+# opened again whenever the server closes it.
+class Connection:
+    def __init__(self, timeout):
+        self.timeout = timeout
+        self.reader = self.writer = None
+
+    async def close(self):
+        if self.writer is not None:
+            self.writer.close()
+            self.reader = self.writer = None
+
+    async def send(self, method, path, data, headers):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(
+                '127.0.0.1', PORT)
+
+        body = b'' if data is None else json.dumps(data).encode('utf-8')
+        head = ['{} {} HTTP/1.1'.format(method, path), 'Host: 127.0.0.1',
+                'Content-Type: application/json',
+                'Content-Length: {}'.format(len(body))]
+        head += ['{}: {}'.format(name, value) for name, value in headers.items()]
+        self.writer.write(('\r\n'.join(head) + '\r\n\r\n').encode('latin-1') + body)
+        await self.writer.drain()
+
+        status = int((await self.reader.readline()).split()[1])
+        response_headers = {}
+
+        while True:
+            line = (await self.reader.readline()).decode('latin-1').strip()
+
+            if not line:
+                break
+
+            name, _, value = line.partition(':')
+            response_headers[name.lower()] = value.strip()
+
+        if response_headers.get('transfer-encoding') == 'chunked':
+            body = b''
+
+            while True:
+                size = int(await self.reader.readline(), 16)
+                # Each chunk of data is followed by a CRLF, left out
+                body += (await self.reader.readexactly(size + 2))[:size]
+
+                if size == 0:
+                    break
+        else:
+            body = await self.reader.readexactly(
+                int(response_headers.get('content-length', 0)))
+
+        if response_headers.get('connection', '').lower() == 'close':
+            await self.close()
+
+        return status, json.loads(body) if body else None
+
+    # Sends a request, recording its latency under endpoint, and returns
+    # the decoded body, raising RequestFailed unless it succeeded.
+    async def request(self, stats, endpoint, method, path, data=None, headers={}):
+        started = time.perf_counter()
+
+        try:
+            status, body = await asyncio.wait_for(
+                self.send(method, path, data, headers), self.timeout)
+        except (OSError, ValueError, IndexError, asyncio.IncompleteReadError,
+                asyncio.TimeoutError):
+            await self.close()
+            status, body = 0, None
+
+        stats.record(endpoint, status, time.perf_counter() - started)
+
+        if status >= 400 or status == 0:
+            raise RequestFailed(endpoint)
+
+        return body
+
+
+def grade_cards(generator, cards):
+    reviews = []
+
+    for card in cards:
+        while True:
+            grade = generator.choices(list(GRADES), list(GRADES.values()))[0]
+            reviews.append({
+                'card_id': card['id'],
+                'grade': grade,
+                'reviewed_at': datetime.now(timezone.utc).isoformat()
+            })
+
+            if grade == 'good':
+                break
+
+    return reviews
+
+
+async def virtual_user(number, args, stats, deadline):
+    generator = random.Random(number)
+    connection = Connection(args.timeout)
+    username = 'user{}'.format(number % args.users)
+    session = 0
+    user = None
+
+    async def think():
+        await asyncio.sleep(generator.expovariate(1 / args.think_time)
+                            if args.think_time else 0)
+
+    try:
+        while time.monotonic() < deadline:
+            try:
+                if user is None or session % args.sessions_per_login == 0:
+                    await think()
+                    login = await connection.request(
+                        stats, 'POST /api/auth', 'POST', '/api/auth',
+                        {'username': username, 'password': PASSWORD,
+                         'tzutcdelta': 0})
+                    user = dict(login['user'], token=login['token'])
+
+                headers = {'Authorization': user['token']}
+                session += 1
+                await think()
+                decks = (await connection.request(
+                    stats, 'GET /api/users/<id>/decks', 'GET',
+                    '/api/users/{}/decks?card_count=all,new,due'.format(user['id']),
+                    headers=headers))['data']
+                decks = [deck for deck in decks
+                         if deck['new_count'] or deck['due_count']]
+
+                if not decks:
+                    continue
+
+                deck_id = generator.choice(decks)['id']
+                await think()
+                await connection.request(
+                    stats, 'GET /api/decks/<id>/cards?count', 'GET',
+                    '/api/decks/{}/cards?count&revised={}'.format(
+                        deck_id, datetime.now(timezone.utc).date().isoformat()),
+                    headers=headers)
+                cards = (await connection.request(
+                    stats, 'GET /api/decks/<id>/queue', 'GET',
+                    '/api/decks/{}/queue?new=10&due=20'.format(deck_id),
+                    headers=headers))['data']
+
+                if not cards:
+                    continue
+
+                await think()
+                await connection.request(
+                    stats, 'POST /api/reviews', 'POST', '/api/reviews',
+                    grade_cards(generator, cards), headers)
+                await connection.request(
+                    stats, 'GET /api/users/<id>/decks', 'GET',
+                    '/api/users/{}/decks?card_count=all,new,due'.format(user['id']),
+                    headers=headers)
+                stats.sessions += 1
+            except RequestFailed:
+                await think()
+    finally:
+        await connection.close()
+
+
+async def run(args, stats):
+    deadline = time.monotonic() + args.duration
+    await asyncio.gather(*(virtual_user(number, args, stats, deadline)
+                           for number in range(args.virtual_users)))
+
+
+def main():
+    args = parse_args()
+    make_app(shared=True)
+    seed(args.users, args.decks_per_user, args.cards_per_deck, PASSWORD)
+    stats = Stats()
+
+    with serve(args.gunicorn_args):
+        started = time.monotonic()
+        asyncio.run(run(args, stats))
+        elapsed = time.monotonic() - started
+
+    print('{} virtual users completed {} sessions in {:.0f} s, {:.2f} per second'
+          .format(args.virtual_users, stats.sessions, elapsed,
+                  stats.sessions / elapsed))
+    print()
+
+    rows = []
+
+    for endpoint, latencies in stats.latencies.items():
+        total = len(latencies) + stats.errors[endpoint]
+        rows.append([endpoint, total, stats.errors[endpoint],
+                     '{:.1f}%'.format(stats.errors[endpoint] / total * 100),
+                     '{:.1f}'.format(total / elapsed)] +
+                    ['{:.1f}'.format(percentile(latencies, p))
+                     for p in (0.5, 0.95, 0.99)])
+
+    print_table(['endpoint', 'requests', 'errors', 'error rate', 'req/s',
+                 'p50 ms', 'p95 ms', 'p99 ms'], rows)
+    print()
+
+    rows = []
+
+    for endpoint, latencies in stats.latencies.items():
+        counts = [0] * len(BUCKETS)
+
+        for latency in latencies:
+            counts[next(i for i, bound in enumerate(BUCKETS) if latency <= bound)] += 1
+
+        rows.append([endpoint] + counts)
+
+    print_table(['endpoint'] + ['<={:g} ms'.format(bound) for bound in BUCKETS[:-1]] +
+                ['more'], rows)
+
+
+if __name__ == '__main__':
+    main()
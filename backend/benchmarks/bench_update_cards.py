@@ -0,0 +1,43 @@
+"""Queries and time taken by PUT /api/cards as the batch grows.
+
+Run from the backend directory with python -m benchmarks.bench_update_cards
+"""
+from app.extensions import db
+from app.models import Card, Deck
+from app.util.instrumentation import capture_queries
+from .common import login, make_app, print_table, timed
+
+BATCH_SIZES = [1, 10, 100, 500, 2000]
+
+
+def main():
+    app = make_app()
+    client = app.test_client()
+    user, authorization = login(app)
+    deck = Deck(name='Benchmark', user=user)
+    db.session.add(deck)
+    db.session.add_all([Card(front='front', back='back', deck=deck)
+                        for _ in range(max(BATCH_SIZES))])
+    db.session.commit()
+    ids = [id for id, in db.session.query(Card.id).order_by(Card.id)]
+    rows = []
+
+    for size in BATCH_SIZES:
+        data = [{'id': id, 'knowledge_level': 1, 'revision_due': '2999-01-01',
+                 'last_revised': '2023-11-07'} for id in ids[:size]]
+
+        def put():
+            return client.put('/api/cards', json=data, headers=authorization)
+
+        with capture_queries(db.engine) as statements:
+            response = put()
+
+        assert response.status_code == 200, response.json
+        _, elapsed = timed(put)
+        rows.append([size, len(statements), '{:.1f}'.format(elapsed)])
+
+    print_table(['cards', 'queries', 'ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+"""Requests per second, p99 latency and memory use of gunicorn worker setups.
+
+Every setup runs the same number of worker processes, so they use about
+as much memory, which is measured and reported along with throughput.
+Clients list decks with their card counts and page through a deck's cards.
+The gevent setup only runs when gevent is installed.
+
+Against SQLite the database is rarely waited on, so set BENCH_DATABASE_URI
+to a PostgreSQL database to see the difference threads make.
+
+Run from the backend directory with python -m benchmarks.bench_workers
+"""
+import importlib.util
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from app.extensions import db
+from app.models import Card, Deck
+from .common import (http_request, login, make_app, memory_use, percentile,
+                     print_table, serve)
+
+CLIENTS = 32
+DURATION = 10
+SETUPS = [('sync', '-w 4'), ('gthread', '-w 4 --threads 8')]
+
+if importlib.util.find_spec('gevent'):
+    SETUPS.append(('gevent', '-w 4 -k gevent --worker-connections 100'))
+
+
+def main():
+    app = make_app(shared=True)
+    user, authorization = login(app)
+
+    for i in range(10):
+        deck = Deck(name='Deck {}'.format(i), user=user, shared=True)
+        db.session.add(deck)
+        db.session.add_all(Card(front='front', back='back', deck=deck)
+                           for _ in range(200))
+
+    db.session.commit()
+    paths = ['/api/decks?card_count=all,new,due&limit=10',
+             '/api/decks/1/cards?limit=50']
+    rows = []
+
+    for name, args in SETUPS:
+        with serve(args) as server:
+            latencies = []
+            errors = [0]
+            lock = threading.Lock()
+            deadline = time.monotonic() + DURATION
+
+            def client(thread):
+                i = thread
+
+                while time.monotonic() < deadline:
+                    status, _, elapsed = http_request(
+                        'GET', paths[i % len(paths)], headers=authorization)
+                    i += 1
+
+                    with lock:
+                        if status >= 400:
+                            errors[0] += 1
+                        else:
+                            latencies.append(elapsed)
+
+            with ThreadPoolExecutor(CLIENTS) as pool:
+                for thread in range(CLIENTS):
+                    pool.submit(client, thread)
+
+            memory = memory_use(server.pid)
+
+        rows.append([name, '{:.0f}'.format(len(latencies) / DURATION),
+                     '{:.1f}'.format(percentile(latencies, 0.99) * 1000),
+                     errors[0], '{:.0f}'.format(memory)])
+
+    print_table(['workers', 'requests/s', 'p99 ms', 'errors', 'memory MB'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,144 @@
+import json
+import os
+import shlex
+import subprocess
+import tempfile
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from app import create_app
+from app.extensions import db
+from app.models import User, synthetic
+
+
+# Benchmarks run against an in-memory SQLite database, or a file when the
+# database is shared with the processes started by serve, unless
+# BENCH_DATABASE_URI points somewhere else.
+def make_app(shared=False):
+    uri = os.getenv('BENCH_DATABASE_URI')
+
+    if uri is None and shared:
+        uri = 'sqlite:///{}'.format(
+            os.path.join(tempfile.mkdtemp(), 'bench.db'))
+
+    os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = uri or 'sqlite:///:memory:'
+    os.environ.setdefault('FLASK_SECRET_KEY', 'benchmark')
+
+    app = create_app()
+    app.app_context().push()
+    db.drop_all()
+    db.create_all()
+
+    return app
+
+
+def login(app, username='bench', password='benchpassword'):
+    user = User(username=username, password=password)
+    db.session.add(user)
+    db.session.commit()
+
+    response = app.test_client().post('/api/auth', json={
+        'username': username,
+        'password': password,
+        'tzutcdelta': 0
+    })
+
+    return user, {'Authorization': response.json['token']}
+
+
+# Adds users named user0, user1 and so on, with the given password, each
+# owning decks_per_user decks of cards_per_deck cards, as flask seed does.
+# Returns the ids of the users.
+def seed(users, decks_per_user, cards_per_deck, password='benchpassword',
+         batch_size=10000):
+    user_ids = synthetic.generate(db.session.connection(), users, decks_per_user,
+                                  cards_per_deck, password=password,
+                                  batch_size=batch_size)
+    db.session.commit()
+
+    return user_ids
+
+
+# Returns the result of the last call to f and the best time in
+# milliseconds out of repeat calls.
+def timed(f, repeat=5):
+    best = None
+
+    for _ in range(repeat):
+        db.session.expire_all()
+        start = time.perf_counter()
+        result = f()
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+
+    return result, best
+
+
+def print_table(headers, rows):
+    widths = [max(len(str(value)) for value in column)
+              for column in zip(headers, *rows)]
+
+    for row in [headers] + rows:
+        print('  '.join(str(value).rjust(width)
+                        for value, width in zip(row, widths)))
+
+
+def percentile(values, p):
+    values = sorted(values) or [0]
+    return values[min(int(len(values) * p), len(values) - 1)]
+
+
+PORT = 8765
+
+
+# Runs gunicorn with the given arguments until the block exits, waiting
+# for it to answer first.
+@contextmanager
+def serve(args, env={}):
+    server = subprocess.Popen(
+        ['gunicorn', '-b', '127.0.0.1:{}'.format(PORT)] + shlex.split(args) +
+        ['app:create_app()'], env=dict(os.environ, **env),
+        stderr=subprocess.DEVNULL)
+
+    try:
+        for _ in range(100):
+            try:
+                http_request('GET', '/api/users?limit=1')
+                break
+            except urllib.error.URLError:
+                time.sleep(0.1)
+
+        yield server
+    finally:
+        server.terminate()
+        server.wait()
+
+
+# Returns the status, decoded body and seconds taken by a request to the
+# server started by serve.
+def http_request(method, path, data=None, headers={}):
+    body = None if data is None else json.dumps(data).encode('utf-8')
+    request = urllib.request.Request(
+        'http://127.0.0.1:{}{}'.format(PORT, path), data=body, method=method,
+        headers=dict(headers, **{'Content-Type': 'application/json'}))
+    start = time.perf_counter()
+
+    try:
+        with urllib.request.urlopen(request) as response:
+            return response.status, json.load(response), \
+                time.perf_counter() - start
+    except urllib.error.HTTPError as error:
+        return error.code, None, time.perf_counter() - start
+
+
+# Resident memory in megabytes of a process and its children
+def memory_use(pid):
+    pids = [pid] + [int(child) for child in
+                    open('/proc/{}/task/{}/children'.format(pid, pid)).read().split()]
+    pages = 0
+
+    for pid in pids:
+        pages += int(open('/proc/{}/statm'.format(pid)).read().split()[1])
+
+    return pages * os.sysconf('SC_PAGE_SIZE') / 2 ** 20
@@ -0,0 +1,85 @@
+"""Compares two results of bench_endpoints and fails on regressions.
+
+A route regresses when its latency at the compared percentile grows by
+more than the threshold, and by more than --min-ms so that the noise of
+fast routes is ignored, or when its median number of queries grows.
+Routes missing from either file are listed but not compared.
+
+Run from the backend directory with
+python -m benchmarks.compare base.json new.json --threshold 0.2
+which exits with status 1 when any route regressed.
+"""
+import argparse
+import json
+import sys
+from .common import print_table
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('base')
+    parser.add_argument('new')
+    parser.add_argument('--threshold', type=float, default=0.2,
+                        help='relative latency growth allowed, 0.2 for 20%%')
+    parser.add_argument('--min-ms', type=float, default=1.0,
+                        help='latency growth in milliseconds always allowed')
+    parser.add_argument('--percentile', choices=['p50', 'p95', 'p99'],
+                        default='p95')
+    return parser.parse_args()
+
+
+# Returns whether new regressed from base, and why
+def regression(base, new, args):
+    reasons = []
+    growth = new[args.percentile] - base[args.percentile]
+
+    if growth > args.min_ms and growth > base[args.percentile] * args.threshold:
+        reasons.append('slower')
+
+    if new['queries'] > base['queries']:
+        reasons.append('more queries')
+
+    return reasons
+
+
+def main():
+    args = parse_args()
+
+    with open(args.base) as file:
+        base = json.load(file)
+
+    with open(args.new) as file:
+        new = json.load(file)
+
+    if base['scale'] != new['scale']:
+        print('Warning: the results were seeded at different scales')
+
+    rows = []
+    regressed = 0
+
+    for name in sorted(base['routes'].keys() | new['routes'].keys()):
+        if name not in base['routes'] or name not in new['routes']:
+            rows.append([name, '', '', '', '', '', 'only in {}'.format(
+                'base' if name in base['routes'] else 'new')])
+            continue
+
+        old, current = base['routes'][name], new['routes'][name]
+        reasons = regression(old, current, args)
+        regressed += bool(reasons)
+        change = (current[args.percentile] / old[args.percentile] - 1) * 100 \
+            if old[args.percentile] else 0
+        rows.append([name, '{:.1f}'.format(old[args.percentile]),
+                     '{:.1f}'.format(current[args.percentile]),
+                     '{:+.0f}%'.format(change), '{:g}'.format(old['queries']),
+                     '{:g}'.format(current['queries']),
+                     'REGRESSED: ' + ', '.join(reasons) if reasons else 'ok'])
+
+    print_table(['route', 'base ' + args.percentile, 'new ' + args.percentile,
+                 'change', 'base queries', 'new queries', ''], rows)
+    print('{} of {} routes regressed'.format(regressed, len(rows)))
+
+    sys.exit(1 if regressed else 0)
+
+
+if __name__ == '__main__':
+    main()
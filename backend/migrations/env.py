@@ -51,6 +51,17 @@ def get_metadata():
     return target_db.metadata
 
 
+# The full text search tables, with their shadow tables, and the trigram
+# indexes are made by raw SQL in a migration and are not in the metadata,
+# so autogenerate is kept from dropping them
+def include_name(name, type_, parent_names):
+    if type_ == 'table':
+        return '_fts' not in name
+    if type_ == 'index':
+        return not (name.startswith('ix_') and name.endswith('_trgm'))
+    return True
+
+
 def run_migrations_offline():
     """Run migrations in 'offline' mode.
 
@@ -65,7 +76,8 @@ def run_migrations_offline():
     """
     url = config.get_main_option("sqlalchemy.url")
     context.configure(
-        url=url, target_metadata=get_metadata(), literal_binds=True
+        url=url, target_metadata=get_metadata(), literal_binds=True,
+        include_name=include_name
     )
 
     with context.begin_transaction():
@@ -93,6 +105,8 @@ def run_migrations_online():
     conf_args = current_app.extensions['migrate'].configure_args
     if conf_args.get("process_revision_directives") is None:
         conf_args["process_revision_directives"] = process_revision_directives
+    if conf_args.get("include_name") is None:
+        conf_args["include_name"] = include_name
 
     connectable = get_engine()
 
@@ -0,0 +1,30 @@
+"""Add deck version sequence
+
+Revision ID: 3b9e4f1c7a2d
+Revises: 5d8d68cd305f
+Create Date: 2026-10-19 10:12:40.318254
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9e4f1c7a2d'
+down_revision = '5d8d68cd305f'
+branch_labels = None
+depends_on = None
+
+
+# Only PostgreSQL draws deck versions from a sequence, which starts above
+# the versions already given.
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE SEQUENCE deck_version_seq')
+        op.execute("SELECT setval('deck_version_seq', "
+                   "coalesce(max(version), 0) + 1, false) FROM deck")
+
+
+def downgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('DROP SEQUENCE deck_version_seq')
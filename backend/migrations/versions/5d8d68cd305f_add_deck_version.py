@@ -0,0 +1,32 @@
+"""Add deck version
+
+Revision ID: 5d8d68cd305f
+Revises: 6f06a56b2d4e
+Create Date: 2026-10-18 23:05:12.771403
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d8d68cd305f'
+down_revision = '6f06a56b2d4e'
+branch_labels = None
+depends_on = None
+
+
+# Plain operations, since a batch migration would recreate deck and drop
+# its text search triggers on SQLite.
+def upgrade():
+    op.add_column('deck', sa.Column('version', sa.Integer(),
+                                    server_default='0', nullable=False))
+    op.create_index('ix_deck_version', 'deck', ['version'], unique=False)
+    op.create_index('ix_deck_shared_version', 'deck',
+                    ['shared', 'version'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_deck_shared_version', table_name='deck')
+    op.drop_index('ix_deck_version', table_name='deck')
+    op.drop_column('deck', 'version')
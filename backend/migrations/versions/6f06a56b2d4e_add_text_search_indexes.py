@@ -0,0 +1,71 @@
+"""Add text search indexes
+
+Revision ID: 6f06a56b2d4e
+Revises: d6de7f31a745
+Create Date: 2026-10-18 22:03:51.660219
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f06a56b2d4e'
+down_revision = 'd6de7f31a745'
+branch_labels = None
+depends_on = None
+
+SEARCHABLE = [('card', 'front'), ('deck', 'name')]
+
+# Note that recreating card or deck in a batch migration on
+# SQLite drops these triggers, which must then be created again.
+SQLITE_DDL = [
+    "CREATE VIRTUAL TABLE {table}_fts USING fts5({column}, "
+    "content='{table}', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+    "INSERT INTO {table}_fts(rowid, {column}) "
+    "VALUES (new.id, new.{column}); END",
+    "CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, {column}) "
+    "VALUES ('delete', old.id, old.{column}); END",
+    "CREATE TRIGGER {table}_fts_update AFTER UPDATE OF {column} ON {table} BEGIN "
+    "INSERT INTO {table}_fts({table}_fts, rowid, {column}) "
+    "VALUES ('delete', old.id, old.{column}); "
+    "INSERT INTO {table}_fts(rowid, {column}) "
+    "VALUES (new.id, new.{column}); END",
+    "INSERT INTO {table}_fts({table}_fts) VALUES ('rebuild')",
+]
+
+POSTGRESQL_DDL = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX ix_{table}_{column}_trgm ON {table} "
+    "USING gin ({column} gin_trgm_ops)",
+]
+
+
+def upgrade():
+    dialect = op.get_bind().dialect.name
+
+    for table, column in SEARCHABLE:
+        if dialect == 'sqlite':
+            statements = SQLITE_DDL
+        elif dialect == 'postgresql':
+            statements = POSTGRESQL_DDL
+        else:
+            statements = []
+
+        for statement in statements:
+            op.execute(statement.format(table=table, column=column))
+
+
+def downgrade():
+    dialect = op.get_bind().dialect.name
+
+    for table, column in SEARCHABLE:
+        if dialect == 'sqlite':
+            for trigger in ('insert', 'delete', 'update'):
+                op.execute('DROP TRIGGER {}_fts_{}'.format(table, trigger))
+
+            op.execute('DROP TABLE {}_fts'.format(table))
+        elif dialect == 'postgresql':
+            op.execute('DROP INDEX ix_{}_{}_trgm'.format(table, column))
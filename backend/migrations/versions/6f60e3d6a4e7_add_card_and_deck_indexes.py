@@ -0,0 +1,42 @@
+"""Add card and deck indexes
+
+Revision ID: 6f60e3d6a4e7
+Revises: 108906988dc3
+Create Date: 2026-10-18 20:41:12.503817
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f60e3d6a4e7'
+down_revision = '108906988dc3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.create_index('ix_card_deck_id_revision_due',
+                              ['deck_id', 'revision_due'], unique=False)
+        batch_op.create_index('ix_card_deck_id_knowledge_level',
+                              ['deck_id', 'knowledge_level'], unique=False)
+        batch_op.create_index('ix_card_deck_id_last_revised',
+                              ['deck_id', 'last_revised'], unique=False)
+
+    with op.batch_alter_table('deck', schema=None) as batch_op:
+        batch_op.create_index('ix_deck_user_id', ['user_id'], unique=False)
+        batch_op.create_index('ix_deck_shared_id',
+                              ['shared', 'id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('deck', schema=None) as batch_op:
+        batch_op.drop_index('ix_deck_shared_id')
+        batch_op.drop_index('ix_deck_user_id')
+
+    with op.batch_alter_table('card', schema=None) as batch_op:
+        batch_op.drop_index('ix_card_deck_id_last_revised')
+        batch_op.drop_index('ix_card_deck_id_knowledge_level')
+        batch_op.drop_index('ix_card_deck_id_revision_due')
@@ -0,0 +1,56 @@
+"""Add deck card counters
+
+Revision ID: d6de7f31a745
+Revises: 6f60e3d6a4e7
+Create Date: 2026-10-18 21:12:40.118342
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd6de7f31a745'
+down_revision = '6f60e3d6a4e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('deck', schema=None) as batch_op:
+        batch_op.add_column(sa.Column('all_count', sa.Integer(),
+                                      server_default='0', nullable=False))
+        batch_op.add_column(sa.Column('new_count', sa.Integer(),
+                                      server_default='0', nullable=False))
+
+    op.create_table('deck_due',
+                    sa.Column('deck_id', sa.Integer(), nullable=False),
+                    sa.Column('revision_due', sa.Date(), nullable=False),
+                    sa.Column('card_count', sa.Integer(), nullable=False),
+                    sa.ForeignKeyConstraint(
+                        ['deck_id'], ['deck.id'], name='fk_deck_due_deck_id'),
+                    sa.PrimaryKeyConstraint('deck_id', 'revision_due')
+                    )
+
+    op.execute('''
+        UPDATE deck SET
+            all_count = (SELECT count(*) FROM card
+                         WHERE card.deck_id = deck.id),
+            new_count = (SELECT count(*) FROM card
+                         WHERE card.deck_id = deck.id
+                         AND card.knowledge_level = 0)
+    ''')
+    op.execute('''
+        INSERT INTO deck_due (deck_id, revision_due, card_count)
+        SELECT deck_id, revision_due, count(*) FROM card
+        WHERE revision_due IS NOT NULL
+        GROUP BY deck_id, revision_due
+    ''')
+
+
+def downgrade():
+    op.drop_table('deck_due')
+
+    with op.batch_alter_table('deck', schema=None) as batch_op:
+        batch_op.drop_column('new_count')
+        batch_op.drop_column('all_count')
@@ -1,12 +1,15 @@
 import unittest
 import os
+from contextlib import contextmanager
 from datetime import datetime, timedelta
 from app import create_app
 from app.extensions import db
+from app.util import instrumentation
 from app.models import User, Deck, Card
 
 
 class TestEnvironment(unittest.TestCase):
+    database_uri = 'sqlite:///:memory:'
 
     def add(self, obj):
         db.session.add(obj)
@@ -14,10 +17,26 @@ class TestEnvironment(unittest.TestCase):
         db.session.refresh(obj)
         return obj
 
+    def capture_queries(self):
+        return instrumentation.capture_queries(db.engine)
+
+    # Fails when the block runs more than limit queries, listing them
+    @contextmanager
+    def assert_max_queries(self, limit):
+        with self.capture_queries() as statements:
+            yield statements
+
+        if len(statements) > limit:
+            self.fail('{} queries run, at most {} expected:\n{}'.format(
+                len(statements), limit,
+                '\n'.join(statement for statement, _ in statements)))
+
     def setUp(self):
         os.environ['FLASK_DEBUG'] = '1'
         os.environ['FLASK_TESTING'] = '1'
-        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = 'sqlite:///:memory:'
+        os.environ['FLASK_SQLALCHEMY_DATABASE_URI'] = self.database_uri
+        os.environ['FLASK_HASHING_WORKERS'] = '0'
+        os.environ['FLASK_QUERY_TIMING'] = '1'
         os.environ['FLASK_SECRET_KEY'] = 'wajdlkawjdklawdn293io2njkWDANJKdlkdhawjkhdn%@AD!!@#!@$@'
 
         self.app = create_app()
@@ -0,0 +1,88 @@
+import os
+import unittest
+from datetime import date
+from decimal import Decimal
+from unittest import mock
+from flask.json.provider import DefaultJSONProvider
+from app import create_app
+from app.extensions import db
+from app.util.json_provider import ORJSONProvider
+
+
+class TestApp(unittest.TestCase):
+
+    def test_pool_options(self):
+        environ = {
+            'FLASK_SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:',
+            'FLASK_SQLALCHEMY_POOL_PRE_PING': 'true',
+            'FLASK_SQLALCHEMY_POOL_RECYCLE': '300',
+        }
+
+        with mock.patch.dict(os.environ, environ):
+            app = create_app()
+
+        self.assertEqual(app.config['SQLALCHEMY_ENGINE_OPTIONS'],
+                         {'pool_pre_ping': True, 'pool_recycle': 300})
+
+        with app.app_context():
+            self.assertEqual(db.engine.pool._recycle, 300)
+            self.assertTrue(db.engine.pool._pre_ping)
+
+    def test_json_provider(self):
+        environ = {'FLASK_SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}
+
+        with mock.patch.dict(os.environ, environ):
+            app = create_app()
+
+        self.assertIsInstance(app.json, ORJSONProvider)
+
+        with mock.patch.dict(os.environ, dict(environ, FLASK_ORJSON='false')):
+            app = create_app()
+
+        self.assertNotIsInstance(app.json, ORJSONProvider)
+
+
+class TestORJSONProvider(unittest.TestCase):
+    value = {'b': [1, 'ż'], 'a': date(2023, 11, 7), 'c': Decimal('1.5')}
+
+    def setUp(self):
+        with mock.patch.dict(os.environ, {
+                'FLASK_SQLALCHEMY_DATABASE_URI': 'sqlite:///:memory:'}):
+            self.app = create_app()
+
+        self.default = DefaultJSONProvider(self.app)
+
+    def test_dumps(self):
+        self.assertEqual(self.app.json.loads(self.app.json.dumps(self.value)),
+                         self.default.loads(self.default.dumps(self.value)))
+        self.assertEqual(self.app.json.dumps({'b': 1, 'a': 2}), '{"a":2,"b":1}')
+
+    def test_unsorted(self):
+        self.app.json.sort_keys = False
+        self.assertEqual(self.app.json.dumps({'b': 1, 'a': 2}), '{"b":1,"a":2}')
+
+    def test_json_module_arguments(self):
+        self.assertEqual(self.app.json.dumps([1], indent=1), '[\n 1\n]')
+        self.assertEqual(self.app.json.loads('[1.5]', parse_float=Decimal),
+                         [Decimal('1.5')])
+
+    def test_response(self):
+        with self.app.app_context():
+            response = self.app.json.response(self.value)
+
+        self.assertEqual(response.mimetype, 'application/json')
+        self.assertTrue(response.get_data().endswith(b'}\n'))
+        self.assertEqual(response.get_json(),
+                         self.default.loads(self.default.dumps(self.value)))
+
+    def test_response_indent(self):
+        self.app.debug = True
+
+        with self.app.app_context():
+            response = self.app.json.response(a=1)
+
+        self.assertEqual(response.get_data(), b'{\n  "a": 1\n}\n')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -1,7 +1,8 @@
 import unittest
 import json
 from app.extensions import db
-from app.models import Card
+from app.models import Card, User
+from app.util.hashing import HashingExecutor
 from .environment import TestEnvironment
 
 
@@ -65,5 +66,58 @@ class TestAuthRoutes(TestEnvironment):
         self.assertIsNone(card)
 
 
+    def test_principal_cached(self):
+        with self.capture_queries() as statements:
+            response = self.client.get(
+                '/api/cards/1', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse([statement for statement, _ in statements
+                          if 'FROM user' in statement])
+
+    def test_principal_not_cached(self):
+        self.app.extensions['principals'].clear()
+        response = self.client.get('/api/decks/4', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            self.app.extensions['principals'].get(2).tzutcdelta, 0)
+
+    def test_principal_updated(self):
+        self.client.put('/api/users/1', json={'admin': True},
+                        headers=self.authorization3)
+        response = self.client.get(
+            '/api/users/2/decks', headers=self.authorization1)
+        self.assertEqual(response.status_code, 200)
+
+
+    def test_auth_busy(self):
+        self.app.extensions['hashing'] = HashingExecutor(0, 0)
+        login = {'username': 'Alfred',
+                 'password': 'testpassword', 'tzutcdelta': 0}
+        response = self.client.post('/api/auth', json=login)
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.headers['Retry-After'], '1')
+
+    def test_auth_queue_time(self):
+        login = {'username': 'Alfred',
+                 'password': 'testpassword', 'tzutcdelta': 0}
+        response = self.client.post('/api/auth', json=login)
+        self.assertTrue(
+            response.headers['Server-Timing'].startswith('hash-queue;dur='))
+
+    def test_auth_same_tzutcdelta(self):
+        login = {'username': 'Alfred',
+                 'password': 'testpassword', 'tzutcdelta': 0}
+        with self.capture_queries() as statements:
+            self.client.post('/api/auth', json=login)
+        self.assertFalse([statement for statement, _ in statements
+                          if statement.startswith('UPDATE')])
+
+    def test_auth_new_tzutcdelta(self):
+        login = {'username': 'Alfred',
+                 'password': 'testpassword', 'tzutcdelta': 3600}
+        self.client.post('/api/auth', json=login)
+        self.assertEqual(db.session.get(User, 1).tzutcdelta, 3600)
+
+
 if __name__ == '__main__':
     unittest.main()
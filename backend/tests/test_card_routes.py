@@ -2,6 +2,8 @@ import unittest
 import json
 from flask import Flask
 from datetime import date, datetime, timedelta
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
 from app.extensions import db
 from app.models import Card, Deck
 from .environment import TestEnvironment
@@ -76,6 +78,69 @@ class TestCardRoutes(TestEnvironment):
         self.assertEqual(card2.front, 'Back of Card')
         self.assertEqual(card2.back, 'Front of Card')
 
+    def test_create_cards(self):
+        data = [{'front': 'hund', 'back': 'dog', 'reverse': True},
+                {'front': 'katze', 'back': 'cat'}]
+        response = self.client.post(
+            '/api/decks/1/cards', json=data, headers=self.authorization1)
+        self.assertEqual(response.status_code, 201)
+        data = response.get_json()['data']
+        self.assertEqual([card['id'] for card in data], [4, 5, 6])
+        self.assertEqual([card['front'] for card in data],
+                         ['hund', 'dog', 'katze'])
+        self.assertEqual(db.session.get(Card, 6).back, 'cat')
+        self.assertEqual(db.session.get(Deck, 1).new_count, 3)
+
+    def test_create_cards_empty(self):
+        response = self.client.post(
+            '/api/decks/1/cards', json=[], headers=self.authorization1)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.get_json()['data'], [])
+
+    def test_create_cards_invalid_card(self):
+        data = [{'front': 'hund', 'back': 'dog'}, {'front': 'katze'}]
+        response = self.client.post(
+            '/api/decks/1/cards', json=data, headers=self.authorization1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_create_cards_not_objects(self):
+        for data in ([{'front': 'hund', 'back': 'dog'}, 1], ['hund'], 'hund'):
+            response = self.client.post(
+                '/api/decks/1/cards', json=data, headers=self.authorization1)
+            self.assertEqual(response.status_code, 400)
+
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_create_cards_too_many(self):
+        self.app.config['MAX_CARD_BATCH'] = 2
+        data = [{'front': 'front', 'back': 'back'}] * 3
+        response = self.client.post(
+            '/api/decks/1/cards', json=data, headers=self.authorization1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_create_cards_too_many_reversed(self):
+        self.app.config['MAX_CARD_BATCH'] = 3
+        data = [{'front': 'front', 'back': 'back', 'reverse': True}] * 2
+        response = self.client.post(
+            '/api/decks/1/cards', json=data, headers=self.authorization1)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_create_cards_queries(self):
+        counts = []
+
+        for size in (1, 50):
+            data = [{'front': 'front', 'back': 'back', 'reverse': True}] * size
+            with self.capture_queries() as statements:
+                response = self.client.post(
+                    '/api/decks/1/cards', json=data, headers=self.authorization1)
+            self.assertEqual(response.status_code, 201)
+            counts.append(len(statements))
+
+        self.assertEqual(counts[0], counts[1])
+
     def test_search_cards(self):
         response = self.client.get(
             '/api/decks/3/cards', headers=self.authorization2)
@@ -87,6 +152,108 @@ class TestCardRoutes(TestEnvironment):
         self.assertEqual(data[0]['front'], 'apfel')
         self.assertEqual(data[1]['front'], 'frau')
 
+    def test_search_cards_not_modified(self):
+        response = self.client.get(
+            '/api/decks/3/cards', headers=self.authorization2)
+        tag = response.headers['ETag']
+
+        with self.capture_queries() as statements:
+            response = self.client.get('/api/decks/3/cards', headers=dict(
+                self.authorization2, **{'If-None-Match': tag}))
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], tag)
+        self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+        self.assertFalse([statement for statement, _ in statements
+                          if 'FROM card' in statement])
+
+    def test_search_cards_etag_changes(self):
+        def get_tag():
+            return self.client.get('/api/decks/3/cards?new',
+                                   headers=self.authorization2).headers['ETag']
+
+        tags = [get_tag()]
+        self.client.post('/api/reviews', json=[{'card_id': 2, 'grade': 'good'}],
+                         headers=self.authorization2)
+        tags.append(get_tag())
+        self.client.put('/api/cards', json=[{'id': 1, 'front': 'Apfel'}],
+                        headers=self.authorization2)
+        tags.append(get_tag())
+        self.client.delete('/api/cards/1', headers=self.authorization2)
+        tags.append(get_tag())
+
+        self.assertEqual(len(set(tags)), 4)
+
+    def test_search_cards_etag_other_deck(self):
+        first = self.client.get('/api/decks/3/cards',
+                                headers=self.authorization2).headers['ETag']
+        self.client.put('/api/cards/3', json={'front': 'Frau'},
+                        headers=self.authorization2)
+        second = self.client.get('/api/decks/3/cards',
+                                 headers=self.authorization2).headers['ETag']
+
+        self.assertEqual(first, second)
+
+    def test_search_cards_cached(self):
+        first = self.client.get('/api/decks/3/cards?limit=1',
+                                headers=self.authorization1)
+
+        with self.capture_queries() as statements:
+            second = self.client.get('/api/decks/3/cards?limit=1',
+                                     headers=self.authorization1)
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.get_json(), first.get_json())
+        self.assertEqual(second.headers['ETag'], first.headers['ETag'])
+        self.assertFalse([statement for statement, _ in statements
+                          if 'FROM card' in statement])
+
+    def test_search_cards_cached_written(self):
+        self.client.get('/api/decks/3/cards', headers=self.authorization1)
+        self.client.put('/api/cards/1', json={'front': 'Apfel'},
+                        headers=self.authorization2)
+        response = self.client.get('/api/decks/3/cards', headers=self.authorization1)
+
+        self.assertEqual(response.get_json()['data'][0]['front'], 'Apfel')
+
+    def test_search_cards_private_not_cached(self):
+        self.client.get('/api/decks/4/cards', headers=self.authorization2)
+
+        with self.capture_queries() as statements:
+            self.client.get('/api/decks/4/cards', headers=self.authorization2)
+
+        self.assertTrue([statement for statement, _ in statements
+                         if 'FROM card' in statement])
+
+    def test_search_cards_same_as_card(self):
+        response = self.client.get(
+            '/api/decks/3/cards', headers=self.authorization2)
+
+        for card in response.get_json()['data']:
+            single = self.client.get('/api/cards/{}'.format(card['id']),
+                                     headers=self.authorization2)
+            self.assertEqual(card, single.get_json()['data'])
+
+    def test_card_json_columns_postgresql(self):
+        statement = select(*Card.json_columns())
+        sql = str(statement.compile(dialect=postgresql.dialect()))
+
+        self.assertIn('to_char(card.revision_due, ', sql)
+        self.assertIn('to_char(card.last_revised, ', sql)
+
+    def test_search_cards_max_queries(self):
+        for i in range(50):
+            db.session.add(Card(front='front', back='back', deck=self.deck3))
+
+        db.session.commit()
+        db.session.expire_all()
+
+        with self.assert_max_queries(2):
+            response = self.client.get('/api/decks/3/cards',
+                                       headers=self.authorization2)
+
+        self.assertEqual(len(response.get_json()['data']), 52)
+
     def test_search_cards_count(self):
         response = self.client.get(
             '/api/decks/3/cards?count', headers=self.authorization2)
@@ -207,6 +374,85 @@ class TestCardRoutes(TestEnvironment):
             '/api/decks/3/cards?limit=1&offset=invalid', headers=self.authorization2)
         self.assertEqual(response.status_code, 400)
 
+    def test_search_cards_cursor(self):
+        response = self.client.get(
+            '/api/decks/3/cards?limit=1', headers=self.authorization2)
+        next_cursor = response.get_json()['next_cursor']
+        self.assertIsNotNone(next_cursor)
+
+        response = self.client.get(
+            '/api/decks/3/cards?limit=1&cursor={}'.format(next_cursor),
+            headers=self.authorization2)
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(data['data']), 1)
+        self.assertEqual(data['data'][0]['front'], 'frau')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_search_cards_invalid_cursor(self):
+        response = self.client.get(
+            '/api/decks/3/cards?limit=1&cursor=invalid', headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_queue(self):
+        for i in range(3):
+            self.add(Card(front='new {}'.format(i), back='back', deck=self.deck3))
+        self.add(Card(front='due', back='back', deck=self.deck3, knowledge_level=2,
+                      revision_due=datetime.now() - timedelta(days=3)))
+        self.add(Card(front='failed', back='back', deck=self.deck3, knowledge_level=0,
+                      revision_due=datetime.now() - timedelta(days=3)))
+        self.add(Card(front='later', back='back', deck=self.deck3, knowledge_level=2,
+                      revision_due=datetime.now() + timedelta(days=3)))
+
+        with self.capture_queries() as statements:
+            response = self.client.get(
+                '/api/decks/3/queue?new=3&due=20', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['front'] for card in data],
+                         ['due', 'apfel', 'frau', 'new 0', 'new 1'])
+        self.assertEqual(
+            len([s for s, _ in statements if 'FROM card' in s]), 1)
+
+    def test_get_queue_defaults(self):
+        response = self.client.get(
+            '/api/decks/3/queue', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['front'] for card in data], ['frau', 'apfel'])
+
+    def test_get_queue_no_new(self):
+        response = self.client.get(
+            '/api/decks/3/queue?new=0', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([card['front'] for card in data], ['frau'])
+
+    def test_get_queue_invalid_limit(self):
+        response = self.client.get(
+            '/api/decks/3/queue?due=invalid', headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_queue_user_deleted(self):
+        self.client.delete('/api/users/2', headers=self.authorization2)
+        response = self.client.get(
+            '/api/decks/3/queue', headers=self.authorization2)
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_queue_nonexistent_deck(self):
+        response = self.client.get(
+            '/api/decks/5/queue', headers=self.authorization2)
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_queue_others_deck(self):
+        response = self.client.get(
+            '/api/decks/4/queue', headers=self.authorization1)
+        self.assertEqual(response.status_code, 403)
+
     def test_get_card(self):
         response = self.client.get('/api/cards/1', headers=self.authorization2)
         self.assertEqual(response.status_code, 200)
@@ -250,6 +496,15 @@ class TestCardRoutes(TestEnvironment):
                          date.fromisoformat(data['revision_due'])),
         self.assertEqual(card.knowledge_level, data['knowledge_level'])
 
+    def test_update_card_keeps_dates(self):
+        response = self.client.put(
+            '/api/cards/2', json={'front': 'Frau'}, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        card = db.session.get(Card, 2)
+        self.assertEqual(card.front, 'Frau')
+        self.assertIsNotNone(card.last_revised)
+        self.assertIsNotNone(card.revision_due)
+
     def test_update_card_invalid_last_revised(self):
         data = {
             'last_revised': True
@@ -362,6 +617,22 @@ class TestCardRoutes(TestEnvironment):
             '/api/cards', json=data, headers=self.authorization2)
         self.assertEqual(response.status_code, 400)
 
+    def test_update_cards_string_id(self):
+        data = [{'id': '1', 'front': 'Updated Front'}]
+        response = self.client.put(
+            '/api/cards', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(db.session.get(Card, 1).front, 'Updated Front')
+
+    def test_update_cards_invalid_id(self):
+        for data in ([{'id': 'one', 'front': 'Updated Front'}],
+                     [{'id': [1], 'front': 'Updated Front'}], [1]):
+            response = self.client.put(
+                '/api/cards', json=data, headers=self.authorization2)
+            self.assertEqual(response.status_code, 400)
+
+        self.assertEqual(db.session.get(Card, 1).front, 'apfel')
+
     def test_update_cards_nonexistent_card(self):
         data = [{
             'id': 999,
@@ -428,6 +699,71 @@ class TestCardRoutes(TestEnvironment):
             '/api/cards', json=data, headers=self.authorization2)
         self.assertEqual(response.status_code, 400)
 
+    def test_update_cards_keeps_omitted_fields(self):
+        data = [{'id': 2, 'knowledge_level': 2}]
+        response = self.client.put(
+            '/api/cards', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        card = db.session.get(Card, 2)
+        self.assertEqual(card.front, 'frau')
+        self.assertEqual(card.knowledge_level, 2)
+        self.assertEqual(card.last_revised,
+                         (datetime.now() - timedelta(days=1)).date())
+
+    def test_update_cards_sets_sent_fields(self):
+        data = [{'id': 1, 'front': 'Apfel'}, {'id': 2, 'knowledge_level': 2},
+                {'id': 1, 'back': 'Apple'}]
+
+        with self.capture_queries() as statements:
+            response = self.client.put(
+                '/api/cards', json=data, headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 200)
+        updates = sorted(statement for statement, _ in statements
+                         if statement.startswith('UPDATE card '))
+        self.assertEqual(len(updates), 2)
+        self.assertIn('front=', updates[0])
+        self.assertIn('back=', updates[0])
+        self.assertNotIn('knowledge_level=', updates[0])
+        self.assertIn('knowledge_level=', updates[1])
+        self.assertNotIn('front=', updates[1])
+
+    def test_update_cards_empty(self):
+        response = self.client.put(
+            '/api/cards', json=[], headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+    def test_update_cards_repeated_id(self):
+        data = [{'id': 1, 'front': 'birne'}, {'id': 1, 'back': 'pear'}]
+        response = self.client.put(
+            '/api/cards', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        card = db.session.get(Card, 1)
+        self.assertEqual((card.front, card.back), ('birne', 'pear'))
+
+    def test_update_cards_unauthorized_unchanged(self):
+        data = [{'id': 1, 'front': 'birne'}, {'id': 3, 'front': 'birne'}]
+        self.client.put('/api/cards', json=data, headers=self.authorization1)
+        self.assertEqual(db.session.get(Card, 1).front, 'apfel')
+
+    def test_update_cards_queries(self):
+        for i in range(20):
+            self.add(Card(front='front', back='back', deck=self.deck3))
+
+        counts = []
+
+        for size in (1, 20):
+            data = [{'id': id, 'knowledge_level': 1, 'revision_due': '2999-01-01'}
+                    for id in range(4, 4 + size)]
+            db.session.expire_all()
+            with self.capture_queries() as statements:
+                response = self.client.put(
+                    '/api/cards', json=data, headers=self.authorization2)
+            self.assertEqual(response.status_code, 200)
+            counts.append(len(statements))
+
+        self.assertEqual(counts[0], counts[1])
+
     def test_delete_card(self):
         response = self.client.delete('/api/cards/1', headers=self.authorization2)
         self.assertEqual(response.status_code, 200)
@@ -0,0 +1,97 @@
+import unittest
+from app.commands import recount_decks_command
+from app.extensions import db
+from app.models import Deck, DeckDue
+from .environment import TestEnvironment
+
+
+class TestCounters(TestEnvironment):
+
+    def get_counts(self, deck_id=3):
+        response = self.client.get(
+            '/api/decks/{}?card_count=all,new,due'.format(deck_id),
+            headers=self.authorization2)
+        data = response.get_json()['data']
+        return data['all_count'], data['new_count'], data['due_count']
+
+    def test_initial_counts(self):
+        self.assertEqual(self.get_counts(), (2, 1, 1))
+        self.assertEqual(self.get_counts(4), (1, 1, 0))
+
+    def test_create_card(self):
+        data = {'front': 'Front', 'back': 'Back', 'reverse': True}
+        self.client.post('/api/decks/3/cards', json=data,
+                         headers=self.authorization2)
+        self.assertEqual(self.get_counts(), (4, 3, 1))
+
+    def test_update_card(self):
+        data = {'knowledge_level': 1, 'revision_due': '2023-11-07'}
+        self.client.put('/api/cards/1', json=data,
+                        headers=self.authorization2)
+        self.assertEqual(self.get_counts(), (2, 0, 2))
+
+    def test_update_card_postpone(self):
+        data = {'knowledge_level': 3, 'revision_due': '2999-01-01',
+                'last_revised': '2023-11-07'}
+        self.client.put('/api/cards/2', json=data,
+                        headers=self.authorization2)
+        self.assertEqual(self.get_counts(), (2, 1, 0))
+        self.assertEqual([(due.revision_due.year, due.card_count)
+                          for due in DeckDue.query], [(2999, 1)])
+
+    def test_update_cards(self):
+        data = [
+            {'id': 1, 'knowledge_level': 1, 'revision_due': '2999-01-01'},
+            {'id': 2, 'knowledge_level': 0, 'revision_due': '2999-01-01',
+             'last_revised': '2023-11-07'}
+        ]
+        self.client.put('/api/cards', json=data, headers=self.authorization2)
+        self.assertEqual(self.get_counts(), (2, 1, 0))
+
+    def test_delete_card(self):
+        self.client.delete('/api/cards/2', headers=self.authorization2)
+        self.assertEqual(self.get_counts(), (1, 1, 0))
+        self.assertEqual(DeckDue.query.count(), 0)
+
+    def test_delete_deck(self):
+        self.client.delete('/api/decks/3', headers=self.authorization2)
+        self.assertEqual(DeckDue.query.count(), 0)
+        self.assertEqual(self.get_counts(4), (1, 1, 0))
+
+    def test_delete_deck_session(self):
+        db.session.delete(db.session.get(Deck, 3))
+        db.session.commit()
+        self.assertEqual(DeckDue.query.count(), 0)
+
+    def test_delete_user(self):
+        self.client.delete('/api/users/2', headers=self.authorization2)
+        self.assertEqual(DeckDue.query.count(), 0)
+
+    def test_recount_decks_command(self):
+        deck = db.session.get(Deck, 3)
+        deck.all_count = 10
+        deck.new_count = 10
+        DeckDue.query.delete()
+        db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(recount_decks_command)
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.get_counts(), (2, 1, 1))
+
+    def test_recount_decks_command_some_decks(self):
+        for deck in Deck.query:
+            deck.all_count = 10
+        db.session.commit()
+
+        runner = self.app.test_cli_runner()
+        result = runner.invoke(recount_decks_command, ['3'])
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual(self.get_counts(), (2, 1, 1))
+        self.assertEqual(self.get_counts(4)[0], 10)
+
+
+if __name__ == '__main__':
+    unittest.main()
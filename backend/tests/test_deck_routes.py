@@ -2,7 +2,11 @@ import unittest
 import json
 from flask import Flask
 from app.extensions import db
-from app.models import Deck
+from datetime import date, datetime, timedelta
+from sqlalchemy import update
+from sqlalchemy.dialects import postgresql
+from app.models import Card, Deck
+from app.models.deck import next_version
 from .environment import TestEnvironment
 
 
@@ -39,6 +43,78 @@ class TestDeckRoutes(TestEnvironment):
         data = response.get_json()['data']
         self.assertEqual(data['name'], 'Javanese')
 
+    def test_get_deck_card_count_values(self):
+        response = self.client.get(
+            '/api/decks/3?card_count=all,due,new', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertEqual(data['all_count'], 2)
+        self.assertEqual(data['due_count'], 1)
+        self.assertEqual(data['new_count'], 1)
+
+    def test_get_deck_card_count_unknown(self):
+        response = self.client.get(
+            '/api/decks/3?card_count=invalid', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        self.assertNotIn('all_count', data)
+
+    def test_get_deck_not_modified(self):
+        response = self.client.get('/api/decks/1', headers=self.authorization1)
+        tag = response.headers['ETag']
+
+        with self.capture_queries() as statements:
+            response = self.client.get(
+                '/api/decks/1', headers=dict(self.authorization1, **{'If-None-Match': tag}))
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], tag)
+        self.assertEqual(response.get_data(), b'')
+        self.assertFalse([statement for statement, _ in statements
+                          if 'FROM user' in statement])
+
+    def test_get_deck_etag_changes(self):
+        def get_tag():
+            return self.client.get(
+                '/api/decks/1', headers=self.authorization1).headers['ETag']
+
+        tags = [get_tag()]
+        self.client.post('/api/decks/1/cards', json={'front': 'a', 'back': 'b'},
+                         headers=self.authorization1)
+        tags.append(get_tag())
+        self.client.put('/api/decks/1', json={'name': 'Sundanese', 'shared': True},
+                        headers=self.authorization1)
+        tags.append(get_tag())
+        self.client.put('/api/users/1', json={'username': 'Alfredo'},
+                        headers=self.authorization1)
+        tags.append(get_tag())
+
+        self.assertEqual(len(set(tags)), 4)
+
+    def test_deck_versions_increase(self):
+        versions = [db.session.get(Deck, 3).version]
+
+        for _ in range(3):
+            self.client.post('/api/decks/3/cards', json={'front': 'a', 'back': 'b'},
+                             headers=self.authorization2)
+            db.session.expire_all()
+            versions.append(db.session.get(Deck, 3).version)
+
+        self.assertEqual(versions, sorted(set(versions)))
+
+    def test_deck_version_sequence_postgresql(self):
+        statement = update(Deck).values(name='German')
+
+        self.assertIn("version=nextval('deck_version_seq')",
+                      str(statement.compile(dialect=postgresql.dialect())))
+
+    def test_get_deck_etag_query(self):
+        first = self.client.get('/api/decks/3', headers=self.authorization2)
+        second = self.client.get('/api/decks/3?card_count=all,due',
+                                 headers=self.authorization2)
+
+        self.assertNotEqual(first.headers['ETag'], second.headers['ETag'])
+
     def test_get_deck_user_deleted(self):
         self.client.delete('/api/users/1', headers=self.authorization1)
         response = self.client.get('/api/decks/1', headers=self.authorization1)
@@ -52,6 +128,85 @@ class TestDeckRoutes(TestEnvironment):
         response = self.client.get('/api/decks/4', headers=self.authorization1)
         self.assertEqual(response.status_code, 403)
 
+    def get_forecast(self, deck_id=3, days=3, headers=None):
+        response = self.client.get(
+            '/api/decks/{}/forecast?days={}'.format(deck_id, days),
+            headers=headers or self.authorization2)
+        return [day['due_count'] for day in response.get_json()['data']]
+
+    def test_get_deck_forecast(self):
+        response = self.client.get('/api/decks/3/forecast?days=3',
+                                   headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+        today = date.today()
+        self.assertEqual(response.get_json()['data'], [
+            {'date': today.isoformat(), 'due_count': 1},
+            {'date': (today + timedelta(days=1)).isoformat(), 'due_count': 0},
+            {'date': (today + timedelta(days=2)).isoformat(), 'due_count': 0}])
+
+    def test_get_deck_forecast_days(self):
+        today = date.today()
+
+        for days in (-3, -1, 1, 2, 2, 3, 10):
+            self.add(Card(front='front', back='back', deck=self.deck3,
+                          knowledge_level=1,
+                          revision_due=today + timedelta(days=days)))
+
+        self.assertEqual(self.get_forecast(days=4), [3, 1, 2, 1])
+        self.assertEqual(self.get_forecast(days=1), [3])
+
+    def test_get_deck_forecast_default_days(self):
+        response = self.client.get('/api/decks/3/forecast',
+                                   headers=self.authorization2)
+        self.assertEqual(len(response.get_json()['data']), 30)
+
+    def test_get_deck_forecast_days_bounds(self):
+        self.assertEqual(len(self.get_forecast(days=0)), 1)
+        self.assertEqual(len(self.get_forecast(days=1000)), 365)
+
+    def test_get_deck_forecast_invalid_days(self):
+        response = self.client.get('/api/decks/3/forecast?days=week',
+                                   headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_deck_forecast_cached(self):
+        self.assertEqual(self.get_forecast(), [1, 0, 0])
+
+        with self.assert_max_queries(1):
+            self.assertEqual(self.get_forecast(), [1, 0, 0])
+
+        self.client.put('/api/cards/2', json={
+            'revision_due': (date.today() + timedelta(days=1)).isoformat()},
+            headers=self.authorization2)
+        self.assertEqual(self.get_forecast(), [0, 1, 0])
+
+    def test_get_deck_forecast_not_modified(self):
+        response = self.client.get('/api/decks/3/forecast',
+                                   headers=self.authorization2)
+        tag = response.headers['ETag']
+
+        response = self.client.get('/api/decks/3/forecast', headers=dict(
+            self.authorization2, **{'If-None-Match': tag}))
+        self.assertEqual(response.status_code, 304)
+
+        response = self.client.get('/api/decks/3/forecast?days=7', headers=dict(
+            self.authorization2, **{'If-None-Match': tag}))
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_deck_forecast_shared(self):
+        self.assertEqual(self.get_forecast(headers=self.authorization1), [1, 0, 0])
+
+    def test_get_deck_forecast_others_deck(self):
+        response = self.client.get('/api/decks/4/forecast',
+                                   headers=self.authorization1)
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_deck_forecast_nonexistent_deck(self):
+        response = self.client.get('/api/decks/5/forecast',
+                                   headers=self.authorization1)
+        self.assertEqual(response.status_code, 404)
+
     def test_update_deck(self):
         data = {'name': 'Updated Deck', 'shared': False}
         response = self.client.put(
@@ -86,6 +241,18 @@ class TestDeckRoutes(TestEnvironment):
         deleted_deck = db.session.get(Deck, 1)
         self.assertIsNone(deleted_deck)
 
+    def test_delete_deck_max_queries(self):
+        db.session.add_all(Card(front='front', back='back', deck=self.deck3)
+                           for _ in range(50))
+        db.session.commit()
+
+        with self.assert_max_queries(5):
+            response = self.client.delete('/api/decks/3', headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Card.query.filter(Card.deck_id == 3).count(), 0)
+        self.assertEqual(Card.query.count(), 1)
+
     def test_delete_deck_user_deleted(self):
         self.client.delete('/api/users/1', headers=self.authorization1)
         response = self.client.delete('/api/decks/1', headers=self.authorization1)
@@ -130,6 +297,99 @@ class TestDeckRoutes(TestEnvironment):
         self.assertEqual(data[2]['due_count'], 1)
         self.assertEqual(data[2]['all_count'], 2)
 
+    def test_search_decks_count_cards_timezones(self):
+        self.user1.tzutcdelta = -86400
+        db.session.commit()
+
+        deck = Deck(name='Latin', user=self.user1, shared=True)
+        self.add(deck)
+        self.add(Card(front='aqua', back='water', deck=deck,
+                      revision_due=datetime.utcnow()))
+
+        response = self.client.get('/api/decks?card_count=due')
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data[2]['name'], 'German')
+        self.assertEqual(data[2]['due_count'], 1)
+        self.assertEqual(data[3]['name'], 'Latin')
+        self.assertEqual(data[3]['due_count'], 0)
+
+    def test_search_decks_count_cards_queries(self):
+        for i in range(10):
+            deck = self.add(Deck(name='Deck {}'.format(i),
+                                 user=self.user2, shared=True))
+            self.add(Card(front='front', back='back', deck=deck))
+
+        db.session.expire_all()
+        with self.capture_queries() as statements:
+            self.client.get('/api/decks?card_count=all,new,due&limit=2')
+        page_queries = len(statements)
+
+        db.session.expire_all()
+        with self.capture_queries() as statements:
+            response = self.client.get('/api/decks?card_count=all,new,due')
+        all_queries = len(statements)
+
+        self.assertEqual(len(response.get_json()['data']), 13)
+        self.assertEqual(page_queries, all_queries)
+
+    def test_search_decks_not_modified(self):
+        response = self.client.get('/api/decks?card_count=all,new,due')
+        tag = response.headers['ETag']
+
+        with self.capture_queries() as statements:
+            response = self.client.get('/api/decks?card_count=all,new,due',
+                                       headers={'If-None-Match': tag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.headers['ETag'], tag)
+        self.assertEqual(len(statements), 1)
+
+    def test_search_decks_etag_changes(self):
+        def get_tag():
+            return self.client.get('/api/decks').headers['ETag']
+
+        tags = [get_tag()]
+        self.client.put('/api/decks/2', json={'shared': False},
+                        headers=self.authorization1)
+        tags.append(get_tag())
+        self.client.delete('/api/decks/3', headers=self.authorization2)
+        tags.append(get_tag())
+        self.client.put('/api/users/1', json={'username': 'Alfredo'},
+                        headers=self.authorization1)
+        tags.append(get_tag())
+        self.client.post('/api/auth', json={
+            'username': 'Alfredo', 'password': 'testpassword', 'tzutcdelta': 7200})
+        tags.append(get_tag())
+
+        self.assertEqual(len(set(tags)), 5)
+
+    def test_search_decks_etag_private_deck(self):
+        first = self.client.get('/api/decks').headers['ETag']
+        self.client.put('/api/decks/4', json={'name': 'Polski'},
+                        headers=self.authorization2)
+        second = self.client.get('/api/decks').headers['ETag']
+
+        # Deck 4 is not shared, so the public listing stays the same
+        self.assertEqual(first, second)
+
+    def test_search_decks_max_queries(self):
+        for i in range(20):
+            deck = Deck(name='Deck {}'.format(i), user=self.user2, shared=True)
+            db.session.add(deck)
+            db.session.add_all(Card(front='front', back='back', deck=deck)
+                               for _ in range(5))
+
+        db.session.commit()
+        db.session.expire_all()
+
+        # The fingerprint of shared decks, the decks and their due counts
+        with self.assert_max_queries(3):
+            response = self.client.get('/api/decks?card_count=all,new,due')
+
+        self.assertEqual(len(response.get_json()['data']), 23)
+
     def test_search_decks_count(self):
         response = self.client.get('/api/decks?total_count')
         data = response.get_json()['count']
@@ -169,6 +429,25 @@ class TestDeckRoutes(TestEnvironment):
 
         self.assertEqual(data[0]['name'], 'Japanese')
 
+    def test_search_decks_cursor(self):
+        names = []
+        next_cursor = ''
+
+        while next_cursor is not None:
+            response = self.client.get(
+                '/api/decks?limit=2&total_count&cursor={}'.format(next_cursor)
+                if next_cursor else '/api/decks?limit=2&total_count')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_json()['count'], 3)
+            names += [deck['name'] for deck in response.get_json()['data']]
+            next_cursor = response.get_json()['next_cursor']
+
+        self.assertEqual(names, ['Javanese', 'Japanese', 'German'])
+
+    def test_search_decks_invalid_cursor(self):
+        response = self.client.get('/api/decks?limit=1&cursor=eyJpZCI6ICJ4In0')
+        self.assertEqual(response.status_code, 400)
+
     def test_search_decks_search_limit_invalid_offset(self):
         response = self.client.get('/api/decks?q=nese&limit=1&offset=invalid')
         self.assertEqual(response.status_code, 400)
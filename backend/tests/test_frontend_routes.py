@@ -0,0 +1,109 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+from .environment import TestEnvironment
+
+INDEX = b'<!doctype html><title>Cardmaster</title>'
+SCRIPT = b'console.log("cardmaster");' * 100
+
+
+class TestFrontendRoutes(TestEnvironment):
+
+    def setUp(self):
+        super().setUp()
+        self.directory = tempfile.mkdtemp()
+        self.app.config['FRONTEND_DIR'] = self.directory
+        os.mkdir(os.path.join(self.directory, 'assets'))
+
+        self.write('index.html', INDEX)
+        self.write('favicon.svg', b'<svg></svg>')
+        self.write('assets/index-4f3a2b1c.js', SCRIPT)
+        self.write('assets/index-4f3a2b1c.js.gz', gzip.compress(SCRIPT))
+        self.write('assets/index-4f3a2b1c.js.br', b'brotli')
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+        super().tearDown()
+
+    def write(self, name, content):
+        with open(os.path.join(self.directory, name), 'wb') as file:
+            file.write(content)
+
+    def test_index(self):
+        for path in ('/', '/decks/1'):
+            response = self.client.get(path)
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(response.get_data(), INDEX)
+            self.assertEqual(response.mimetype, 'text/html')
+            self.assertEqual(response.headers['Cache-Control'], 'no-cache')
+            self.assertIn('ETag', response.headers)
+
+    def test_index_not_modified(self):
+        tag = self.client.get('/').headers['ETag']
+        response = self.client.get('/decks', headers={'If-None-Match': tag})
+
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.get_data(), b'')
+
+    def test_index_cached(self):
+        self.client.get('/')
+        self.write('index.html', b'changed')
+
+        self.assertEqual(self.client.get('/').get_data(), INDEX)
+
+    def test_index_compressed(self):
+        self.write('index.html.gz', gzip.compress(INDEX))
+        plain = self.client.get('/')
+        response = self.client.get('/', headers={'Accept-Encoding': 'br, gzip'})
+
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), INDEX)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        self.assertNotEqual(response.headers['ETag'], plain.headers['ETag'])
+
+    def test_index_not_built(self):
+        os.remove(os.path.join(self.directory, 'index.html'))
+        self.assertEqual(self.client.get('/').status_code, 404)
+
+    def test_asset(self):
+        response = self.client.get('/assets/index-4f3a2b1c.js')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), SCRIPT)
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertNotIn('Content-Encoding', response.headers)
+        self.assertEqual(response.headers['Cache-Control'],
+                         'public, max-age=31536000, immutable')
+        response.close()
+
+    def test_asset_compressed(self):
+        response = self.client.get('/assets/index-4f3a2b1c.js',
+                                   headers={'Accept-Encoding': 'gzip, br'})
+        self.assertEqual(response.headers['Content-Encoding'], 'br')
+        self.assertEqual(response.mimetype, 'text/javascript')
+        self.assertEqual(response.get_data(), b'brotli')
+        response.close()
+
+        response = self.client.get('/assets/index-4f3a2b1c.js',
+                                   headers={'Accept-Encoding': 'gzip, br;q=0'})
+        self.assertEqual(response.headers['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(response.get_data()), SCRIPT)
+        self.assertEqual(response.headers['Vary'], 'Accept-Encoding')
+        response.close()
+
+    def test_asset_not_found(self):
+        response = self.client.get('/assets/missing.js',
+                                   headers={'Accept-Encoding': 'gzip'})
+        self.assertEqual(response.status_code, 404)
+
+    def test_favicon(self):
+        response = self.client.get('/favicon.svg')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_data(), b'<svg></svg>')
+        response.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
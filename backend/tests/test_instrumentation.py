@@ -0,0 +1,73 @@
+import unittest
+from app.extensions import db
+from app.models import Deck
+from .environment import TestEnvironment
+
+
+class TestInstrumentation(TestEnvironment):
+
+    def test_server_timing(self):
+        with self.capture_queries() as statements:
+            response = self.client.get('/api/decks/3/cards',
+                                       headers=self.authorization2)
+
+        timing, = response.headers.getlist('Server-Timing')
+        self.assertTrue(timing.startswith('db;dur='))
+        self.assertTrue(timing.endswith(';desc="{} queries"'.format(len(statements))))
+
+    def test_server_timing_one_query(self):
+        response = self.client.get('/api/users')
+        self.assertTrue(response.headers['Server-Timing'].endswith(';desc="1 query"'))
+
+    def test_server_timing_no_queries(self):
+        response = self.client.get('/api/decks/3/cards')
+        self.assertTrue(response.headers['Server-Timing'].endswith(';desc="0 queries"'))
+
+    def test_server_timing_added(self):
+        response = self.client.post('/api/auth', json={
+            'username': 'Alfred', 'password': 'testpassword', 'tzutcdelta': 0})
+        hash_queue, database = response.headers.getlist('Server-Timing')
+
+        self.assertTrue(hash_queue.startswith('hash-queue;dur='))
+        self.assertTrue(database.startswith('db;dur='))
+
+    def test_slow_query(self):
+        self.app.config['SLOW_QUERY_MS'] = 0
+
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/api/users')
+
+        self.assertIn('Slow query in GET /api/users', logs.output[0])
+        self.assertIn('FROM user', logs.output[0])
+
+    def test_slow_request(self):
+        self.app.config['SLOW_REQUEST_MS'] = 0
+
+        with self.assertLogs(self.app.logger, 'WARNING') as logs:
+            self.client.get('/api/users')
+
+        self.assertIn('Slow request GET /api/users', logs.output[-1])
+        self.assertIn('1 queries', logs.output[-1])
+
+    def test_not_slow(self):
+        with self.assertNoLogs(self.app.logger, 'WARNING'):
+            self.client.get('/api/users')
+
+    def test_outside_request(self):
+        self.client.get('/api/users')
+
+        with self.assertNoLogs(self.app.logger, 'WARNING'):
+            self.app.config['SLOW_QUERY_MS'] = 0
+            db.session.query(Deck).all()
+
+    def test_assert_max_queries(self):
+        with self.assertRaises(AssertionError) as context:
+            with self.assert_max_queries(0):
+                self.client.get('/api/users')
+
+        self.assertIn('1 queries run, at most 0 expected', str(context.exception))
+        self.assertIn('FROM user', str(context.exception))
+
+
+if __name__ == '__main__':
+    unittest.main()
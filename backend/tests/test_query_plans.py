@@ -0,0 +1,75 @@
+import os
+import re
+import unittest
+from datetime import datetime
+from app.extensions import db
+from .environment import TestEnvironment
+
+ROUTES = [
+    ('/api/decks/3/cards', 2),
+    ('/api/decks/3/cards?new', 2),
+    ('/api/decks/3/cards?due={now}', 2),
+    ('/api/decks/3/cards?revised={now}', 2),
+    ('/api/decks/3/cards?q=fr', 2),
+    ('/api/decks/3/cards?q=frau', 2),
+    ('/api/decks/3/queue', 2),
+    ('/api/decks/3?card_count=all,new,due', 2),
+    ('/api/decks?card_count=all,new,due', 2),
+    ('/api/decks?q=Ja&total_count', 2),
+    ('/api/decks?q=nese&total_count', 2),
+    ('/api/users/1/decks?card_count=all,new,due', 1),
+]
+
+
+class TestQueryPlans(TestEnvironment):
+    explain = 'EXPLAIN QUERY PLAN '
+    full_scan = re.compile(r'^SCAN (TABLE )?(card|deck)\b')
+
+    def prepare(self, connection):
+        pass
+
+    def plan(self, connection, statement, parameters):
+        rows = connection.exec_driver_sql(
+            self.explain + statement, parameters).fetchall()
+        return [row[-1] for row in rows]
+
+    def capture(self, url, headers):
+        with self.capture_queries() as statements:
+            response = self.client.get(url, headers=headers)
+
+        self.assertEqual(response.status_code, 200)
+        return [(statement, parameters) for statement, parameters in statements
+                if statement.lstrip().upper().startswith('SELECT')]
+
+    def test_no_full_scans(self):
+        authorizations = {1: self.authorization1, 2: self.authorization2}
+        now = datetime.now().isoformat()
+
+        for url, user in ROUTES:
+            url = url.format(now=now)
+
+            with self.subTest(url=url):
+                statements = self.capture(url, authorizations[user])
+                self.assertTrue(statements)
+
+                with db.engine.connect() as connection:
+                    self.prepare(connection)
+
+                    for statement, parameters in statements:
+                        for line in self.plan(connection, statement, parameters):
+                            self.assertIsNone(
+                                self.full_scan.search(line.strip()),
+                                '{}\n{}'.format(statement, line))
+
+
+@unittest.skipUnless(os.getenv('TEST_POSTGRES_URI'),
+                     'TEST_POSTGRES_URI is not set')
+class TestPostgresQueryPlans(TestQueryPlans):  # pragma: no cover
+    database_uri = os.getenv('TEST_POSTGRES_URI')
+    explain = 'EXPLAIN '
+    full_scan = re.compile(r'Seq Scan on "?(card|deck)"?\b')
+
+    def prepare(self, connection):
+        # The fixture tables are tiny, so without this the planner would
+        # always prefer a sequential scan even when an index is usable.
+        connection.exec_driver_sql('SET enable_seqscan = off')
@@ -0,0 +1,136 @@
+import unittest
+from datetime import date, datetime
+from app.extensions import db
+from app.models import Card
+from .environment import TestEnvironment
+
+
+class TestReviewRoutes(TestEnvironment):
+
+    def test_create_reviews(self):
+        data = [
+            {'card_id': 1, 'grade': 'fail', 'reviewed_at': '2023-11-07T10:00:00'},
+            {'card_id': 2, 'grade': 'good', 'reviewed_at': '2023-11-07T10:01:00'},
+            {'card_id': 1, 'grade': 'good', 'reviewed_at': '2023-11-07T10:02:00'}
+        ]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['data']), 2)
+
+        card = db.session.get(Card, 1)
+        self.assertEqual(card.knowledge_level, 1)
+        self.assertEqual(card.revision_due, date(2023, 11, 8))
+        self.assertEqual(card.last_revised, date(2023, 11, 7))
+
+        card = db.session.get(Card, 2)
+        self.assertEqual(card.knowledge_level, 2)
+        self.assertEqual(card.revision_due, date(2023, 11, 10))
+
+    def test_create_reviews_max_queries(self):
+        cards = [Card(front='front', back='back', deck=self.deck3) for _ in range(20)]
+        db.session.add_all(cards)
+        db.session.commit()
+        data = [{'card_id': card.id, 'grade': grade}
+                for card in cards for grade in ('fail', 'good')]
+
+        with self.assert_max_queries(4):
+            response = self.client.post(
+                '/api/reviews', json=data, headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.get_json()['data']), 20)
+        self.assertEqual(Card.query.filter(Card.knowledge_level == 1).count(), 21)
+
+    def test_create_reviews_sets_scheduling_only(self):
+        with self.capture_queries() as statements:
+            response = self.client.post('/api/reviews', json=[{'card_id': 1, 'grade': 'good'}],
+                                        headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 200)
+        updates = [statement for statement, _ in statements
+                   if statement.startswith('UPDATE card ')]
+        self.assertEqual(len(updates), 1)
+        self.assertIn('knowledge_level=', updates[0])
+        self.assertNotIn('front=', updates[0])
+        self.assertNotIn('back=', updates[0])
+
+    def test_create_reviews_out_of_order(self):
+        data = [
+            {'card_id': 1, 'grade': 'good', 'reviewed_at': '2023-11-07T10:02:00+00:00'},
+            {'card_id': 1, 'grade': 'practice', 'reviewed_at': '2023-11-07T11:00:00+01:00'}
+        ]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+        card = db.session.get(Card, 1)
+        self.assertEqual(card.knowledge_level, 1)
+        self.assertEqual(card.revision_due, date(2023, 11, 8))
+
+    def test_create_reviews_default_date(self):
+        data = [{'card_id': 1, 'grade': 'good'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+        card = db.session.get(Card, 1)
+        self.assertEqual(card.last_revised, datetime.utcnow().date())
+
+    def test_create_reviews_updates_counts(self):
+        data = [{'card_id': 1, 'grade': 'good', 'reviewed_at': '2023-11-07'}]
+        self.client.post('/api/reviews', json=data, headers=self.authorization2)
+
+        response = self.client.get(
+            '/api/decks/3?card_count=all,new,due', headers=self.authorization2)
+        data = response.get_json()['data']
+        self.assertEqual(data['new_count'], 0)
+        self.assertEqual(data['due_count'], 2)
+
+    def test_create_reviews_user_deleted(self):
+        self.client.delete('/api/users/2', headers=self.authorization2)
+        data = [{'card_id': 1, 'grade': 'good'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 404)
+
+    def test_create_reviews_not_list(self):
+        data = {'card_id': 1, 'grade': 'good'}
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_reviews_no_card_id(self):
+        data = [{'grade': 'good'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_reviews_invalid_grade(self):
+        data = [{'card_id': 1, 'grade': 'great'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_reviews_invalid_date(self):
+        data = [{'card_id': 1, 'grade': 'good', 'reviewed_at': 'invalid'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 400)
+
+    def test_create_reviews_nonexistent_card(self):
+        data = [{'card_id': 1, 'grade': 'good'}, {'card_id': 10, 'grade': 'good'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization2)
+        self.assertEqual(response.status_code, 404)
+        self.assertIsNone(db.session.get(Card, 1).last_revised)
+
+    def test_create_reviews_others_card(self):
+        data = [{'card_id': 1, 'grade': 'good'}]
+        response = self.client.post(
+            '/api/reviews', json=data, headers=self.authorization1)
+        self.assertEqual(response.status_code, 403)
+
+
+if __name__ == '__main__':
+    unittest.main()
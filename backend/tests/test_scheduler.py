@@ -0,0 +1,40 @@
+import unittest
+from datetime import date, datetime
+from app.scheduler import schedule
+
+
+class TestScheduler(unittest.TestCase):
+    reviewed_at = datetime(2023, 11, 7, hour=13)
+
+    def test_good(self):
+        self.assertEqual(schedule(0, 'good', 0, self.reviewed_at),
+                         (1, date(2023, 11, 8)))
+        self.assertEqual(schedule(2, 'good', 0, self.reviewed_at),
+                         (3, date(2023, 11, 17)))
+
+    def test_good_max_level(self):
+        self.assertEqual(schedule(4, 'good', 0, self.reviewed_at),
+                         (4, date(2023, 12, 7)))
+
+    def test_good_after_reviews(self):
+        # 10 days divided by 1 + 2 * 0.5, truncated
+        self.assertEqual(schedule(2, 'good', 2, self.reviewed_at),
+                         (3, date(2023, 11, 12)))
+
+    def test_fail(self):
+        self.assertEqual(schedule(2, 'fail', 0, self.reviewed_at),
+                         (1, date(2023, 11, 10)))
+        self.assertEqual(schedule(0, 'fail', 0, self.reviewed_at),
+                         (0, date(2023, 11, 8)))
+
+    def test_fail_after_reviews(self):
+        self.assertEqual(schedule(2, 'fail', 2, self.reviewed_at),
+                         (2, date(2023, 11, 12)))
+
+    def test_practice(self):
+        self.assertEqual(schedule(1, 'practice', 0, self.reviewed_at),
+                         (1, date(2023, 11, 10)))
+
+    def test_no_knowledge_level(self):
+        self.assertEqual(schedule(None, 'good', 0, self.reviewed_at),
+                         (1, date(2023, 11, 8)))
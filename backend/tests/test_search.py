@@ -0,0 +1,104 @@
+import unittest
+from app.extensions import db
+from app.models import Card, Deck
+from .environment import TestEnvironment
+
+
+class TestSearch(TestEnvironment):
+
+    def search_cards(self, q, params=''):
+        response = self.client.get(
+            '/api/decks/3/cards?q={}{}'.format(q, params),
+            headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()
+
+    def test_search_cards_ranked(self):
+        self.add(Card(front='Frauenkirche in der Stadt', back='church',
+                      deck=self.deck3))
+        self.add(Card(front='Frau!', back='woman', deck=self.deck3))
+
+        data = self.search_cards('frau')['data']
+
+        self.assertEqual([card['front'] for card in data],
+                         ['frau', 'Frau!', 'Frauenkirche in der Stadt'])
+
+    def test_search_cards_ranked_cursor(self):
+        self.add(Card(front='Frauenkirche in der Stadt', back='church',
+                      deck=self.deck3))
+        self.add(Card(front='Frau!', back='woman', deck=self.deck3))
+
+        fronts = []
+        data = self.search_cards('frau', '&limit=2')
+
+        while True:
+            fronts += [card['front'] for card in data['data']]
+
+            if data['next_cursor'] is None:
+                break
+
+            data = self.search_cards(
+                'frau', '&limit=2&cursor={}'.format(data['next_cursor']))
+
+        self.assertEqual(fronts, ['frau', 'Frau!', 'Frauenkirche in der Stadt'])
+
+    def test_search_cards_ranked_offset(self):
+        self.add(Card(front='Frau!', back='woman', deck=self.deck3))
+
+        data = self.search_cards('frau', '&limit=1&offset=1')
+
+        self.assertEqual(data['data'][0]['front'], 'Frau!')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_search_cards_updated(self):
+        card = db.session.get(Card, 1)
+        card.front = 'birne'
+        db.session.commit()
+
+        self.assertEqual(self.search_cards('apfel')['data'], [])
+        self.assertEqual(len(self.search_cards('birne')['data']), 1)
+
+    def test_search_cards_deleted(self):
+        self.client.delete('/api/cards/2', headers=self.authorization2)
+        self.assertEqual(self.search_cards('frau')['data'], [])
+
+    def test_search_cards_quotes(self):
+        self.add(Card(front='say "hallo"', back='say hello', deck=self.deck3))
+        data = self.search_cards('"hallo"')['data']
+        self.assertEqual(len(data), 1)
+
+    def test_search_cards_short_query(self):
+        data = self.search_cards('fr')['data']
+        self.assertEqual(len(data), 1)
+
+    def test_search_decks_like_backend(self):
+        self.app.config['SEARCH_BACKEND'] = 'like'
+
+        response = self.client.get('/api/decks?q=nese&limit=1')
+        data = response.get_json()
+        self.assertEqual(data['data'][0]['name'], 'Javanese')
+
+        response = self.client.get(
+            '/api/decks?q=nese&limit=1&cursor={}'.format(data['next_cursor']))
+        data = response.get_json()
+        self.assertEqual(data['data'][0]['name'], 'Japanese')
+
+    def test_search_user_decks_ranked(self):
+        self.add(Deck(name='Java', user=self.user1))
+
+        response = self.client.get(
+            '/api/users/1/decks?q=java&limit=1', headers=self.authorization1)
+        data = response.get_json()
+        self.assertEqual(data['data'][0]['name'], 'Java')
+
+        response = self.client.get(
+            '/api/users/1/decks?q=java&limit=1&cursor={}'.format(
+                data['next_cursor']),
+            headers=self.authorization1)
+        data = response.get_json()
+        self.assertEqual(data['data'][0]['name'], 'Javanese')
+        self.assertIsNone(data['next_cursor'])
+
+
+if __name__ == '__main__':
+    unittest.main()
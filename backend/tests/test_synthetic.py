@@ -0,0 +1,119 @@
+import random
+import unittest
+from datetime import date
+from app.commands import seed_command
+from app.extensions import db
+from app.models import Card, Deck, DeckDue, User, recount_decks, synthetic
+from app.scheduler import DAYS_TO_SUM
+from .environment import TestEnvironment
+
+
+class TestSynthetic(TestEnvironment):
+
+    def seed(self, *args):
+        runner = self.app.test_cli_runner()
+        return runner.invoke(seed_command, list(args))
+
+    def test_seed_command(self):
+        result = self.seed('--users', '3', '--decks', '2', '--cards', '5',
+                           '--batch-size', '4')
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertIn('Added 3 users, 6 decks and 30 cards', result.output)
+        self.assertEqual(User.query.count(), 6)
+        self.assertEqual(Deck.query.count(), 10)
+        self.assertEqual(Card.query.count(), 33)
+        self.assertEqual(
+            [user.username for user in User.query.filter(User.id > 3)],
+            ['user3', 'user4', 'user5'])
+        self.assertEqual(Deck.query.filter(
+            Deck.user_id > 3, Deck.shared == True).count(), 3)
+
+    def test_seed_command_password(self):
+        self.seed('--users', '1', '--decks', '0', '--password', 'secret')
+
+        response = self.client.post('/api/auth', json={
+            'username': 'user3', 'password': 'secret', 'tzutcdelta': 0})
+        self.assertEqual(response.status_code, 200)
+
+    def test_seed_command_after_delete(self):
+        self.seed('--users', '2', '--decks', '1')
+        db.session.delete(db.session.get(User, 4))
+        db.session.commit()
+
+        result = self.seed('--users', '2', '--decks', '1')
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual([user.username for user in User.query.filter(User.id > 3)],
+                         ['user4', 'user5', 'user6'])
+
+    def test_seed_command_skips_taken_names(self):
+        self.add(User('user4', 'password'))
+
+        result = self.seed('--users', '2', '--decks', '1')
+
+        self.assertEqual(result.exit_code, 0)
+        self.assertEqual([user.username for user in User.query.filter(User.id > 4)],
+                         ['user5', 'user6'])
+        self.assertEqual([deck.name for deck in Deck.query.filter(Deck.user_id > 4)],
+                         ['Deck 0 of user5', 'Deck 0 of user6'])
+
+    def test_seed_counters(self):
+        self.seed('--users', '2', '--decks', '3', '--cards', '20')
+        counts = [(deck.id, deck.all_count, deck.new_count) for deck in Deck.query]
+        due = [(row.deck_id, row.revision_due, row.card_count) for row in
+               DeckDue.query.order_by(DeckDue.deck_id, DeckDue.revision_due)]
+
+        recount_decks(db.session.connection())
+        db.session.commit()
+
+        self.assertEqual(
+            [(deck.id, deck.all_count, deck.new_count) for deck in Deck.query],
+            counts)
+        self.assertEqual(
+            [(row.deck_id, row.revision_due, row.card_count) for row in
+             DeckDue.query.order_by(DeckDue.deck_id, DeckDue.revision_due)], due)
+
+    def test_seed_searchable(self):
+        self.seed('--users', '1', '--decks', '1', '--cards', '20')
+        deck_id = Deck.query.filter(Deck.user_id == 4).one().id
+        self.add(Card(deck_id=deck_id, front='added afterwards', back='back'))
+
+        response = self.client.get(
+            '/api/decks/{}/cards?q=front 13'.format(deck_id),
+            headers=self.authorization3)
+        self.assertEqual([card['front'] for card in response.json['data']],
+                         ['front 13 of deck {}'.format(deck_id)])
+
+        response = self.client.get(
+            '/api/decks/{}/cards?q=afterwards'.format(deck_id),
+            headers=self.authorization3)
+        self.assertEqual(len(response.json['data']), 1)
+
+    def test_generate_cards_deterministic(self):
+        today = date(2023, 11, 7)
+        cards = list(synthetic.generate_cards(random.Random(1), [1, 2], 50, today))
+
+        self.assertEqual(len(cards), 100)
+        self.assertEqual(
+            list(synthetic.generate_cards(random.Random(1), [1, 2], 50, today)),
+            cards)
+        self.assertNotEqual(
+            list(synthetic.generate_cards(random.Random(2), [1, 2], 50, today)),
+            cards)
+
+    def test_generate_cards_dates(self):
+        today = date(2023, 11, 7)
+
+        for _, _, _, level, last_revised, revision_due in synthetic.generate_cards(
+                random.Random(0), [1], 500, today):
+            if level == 0:
+                self.assertEqual((last_revised, revision_due), (None, None))
+            else:
+                self.assertEqual((revision_due - last_revised).days,
+                                 DAYS_TO_SUM[level - 1])
+                self.assertLessEqual(last_revised, today)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,185 @@
+import io
+import unittest
+import json
+from datetime import date
+from unittest import mock
+from app.extensions import db
+from app.models import Card, Deck
+from .environment import TestEnvironment
+
+
+class TestTransferRoutes(TestEnvironment):
+
+    def export(self, deck_id, format, headers=None):
+        return self.client.get(
+            '/api/decks/{}/export?format={}'.format(deck_id, format),
+            headers=headers or self.authorization2)
+
+    def test_export_csv(self):
+        self.add(Card(front='hund, der', back='"dog"', deck=self.deck3,
+                      knowledge_level=2, last_revised=date(2023, 11, 6),
+                      revision_due=date(2023, 11, 9)))
+        response = self.export(3, 'csv')
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.is_streamed)
+        self.assertEqual(response.mimetype, 'text/csv')
+        self.assertEqual(response.headers['Content-Disposition'],
+                         'attachment; filename=deck-3.csv')
+
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[0], 'front,back,knowledge_level,last_revised,revision_due')
+        self.assertEqual(lines[1], 'apfel,apple,0,,')
+        self.assertEqual(lines[3], '"hund, der","""dog""",2,2023-11-06,2023-11-09')
+
+    def test_export_tsv(self):
+        response = self.export(3, 'tsv')
+        lines = response.get_data(as_text=True).splitlines()
+        self.assertEqual(lines[1], 'apfel\tapple\t0\t\t')
+
+    def test_export_ndjson(self):
+        response = self.export(3, 'ndjson')
+        self.assertEqual(response.mimetype, 'application/x-ndjson')
+
+        records = [json.loads(line) for line in
+                   response.get_data(as_text=True).splitlines()]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0], {
+            'front': 'apfel', 'back': 'apple', 'knowledge_level': 0,
+            'last_revised': None, 'revision_due': None})
+        self.assertEqual(records[1]['knowledge_level'], 1)
+
+    @mock.patch('app.routes.transfer.EXPORT_BATCH_SIZE', 1)
+    def test_export_batches(self):
+        chunks = list(self.export(3, 'csv').response)
+        self.assertEqual(len(chunks), 2)
+        self.assertEqual(b''.join(chunks).count(b'\r\n'), 3)
+
+    def test_export_empty_deck(self):
+        response = self.export(1, 'csv', self.authorization1)
+        self.assertEqual(response.get_data(as_text=True),
+                         'front,back,knowledge_level,last_revised,revision_due\r\n')
+
+    def test_export_shared_deck(self):
+        response = self.export(3, 'csv', self.authorization1)
+        self.assertEqual(response.status_code, 200)
+
+    def test_export_private_deck(self):
+        response = self.export(4, 'csv', self.authorization1)
+        self.assertEqual(response.status_code, 403)
+
+    def test_export_nonexistent_deck(self):
+        response = self.export(10, 'csv')
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_invalid_format(self):
+        response = self.export(3, 'xml')
+        self.assertEqual(response.status_code, 400)
+
+
+    def import_deck(self, data, query='', content_type='text/csv', deck_id=3):
+        return self.client.post(
+            '/api/decks/{}/import{}'.format(deck_id, query), data=data,
+            content_type=content_type, headers=self.authorization2)
+
+    def test_import_csv(self):
+        data = ('front,back,knowledge_level,last_revised,revision_due\r\n'
+                'hund,dog,,,\r\n'
+                '"katze, die","""cat""",2,2023-11-06,2023-11-09\r\n')
+        response = self.import_deck(data.encode('utf-8'))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['accepted'], 2)
+        self.assertEqual(response.get_json()['rejected'], 0)
+
+        card = db.session.get(Card, 5)
+        self.assertEqual((card.front, card.back, card.knowledge_level),
+                         ('katze, die', '"cat"', 2))
+        self.assertEqual(card.revision_due, date(2023, 11, 9))
+        deck = db.session.get(Deck, 3)
+        self.assertEqual((deck.all_count, deck.new_count), (4, 2))
+
+    def test_import_tsv(self):
+        data = 'front\tback\nhund\tdog\n'.encode('utf-8')
+        response = self.import_deck(data, content_type='text/tab-separated-values')
+        self.assertEqual(response.get_json()['accepted'], 1)
+        self.assertEqual(db.session.get(Card, 4).back, 'dog')
+
+    def test_import_round_trip(self):
+        self.add(Card(front='hund', back='dog', deck=self.deck3,
+                      knowledge_level=2, revision_due=date(2023, 11, 9)))
+        exported = self.export(3, 'tsv').get_data()
+        deck = self.add(Deck(name='Copy', user=self.user2))
+        response = self.import_deck(exported, '?format=tsv', deck_id=deck.id)
+        self.assertEqual(response.get_json()['accepted'], 3)
+        self.assertEqual(self.export(deck.id, 'tsv').get_data(), exported)
+
+    def test_import_rejected_rows(self):
+        data = ('front,back,knowledge_level,revision_due\n'
+                'hund,dog\n'
+                ',cat\n'
+                'maus,mouse,5\n'
+                'vogel,bird,x\n'
+                'fisch,fish,1,tomorrow\n'
+                '{},long\n').format('x' * 101)
+        response = self.import_deck(data.encode('utf-8'))
+        data = response.get_json()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['accepted'], 1)
+        self.assertEqual(data['rejected'], 5)
+        self.assertEqual([error['line'] for error in data['errors']],
+                         [3, 4, 5, 6, 7])
+        self.assertEqual(data['errors'][0]['message'], 'Field "front" is required')
+
+    @mock.patch('app.routes.transfer.MAX_IMPORT_ERRORS', 1)
+    def test_import_errors_limit(self):
+        data = 'front,back\n,a\n,b\n'.encode('utf-8')
+        data = self.import_deck(data).get_json()
+        self.assertEqual(data['rejected'], 2)
+        self.assertEqual(len(data['errors']), 1)
+
+    def test_import_batches(self):
+        self.app.config['IMPORT_BATCH_SIZE'] = 2
+        data = 'front,back\n' + 'front,back\n' * 5
+        with self.capture_queries() as statements:
+            response = self.import_deck(data.encode('utf-8'))
+        self.assertEqual(response.get_json()['accepted'], 5)
+        self.assertEqual(len([statement for statement, _ in statements
+                              if statement.startswith('INSERT INTO card ')]), 3)
+
+    def test_import_no_header(self):
+        response = self.import_deck(b'hund,dog\n')
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_import_invalid_encoding(self):
+        data = 'front,back\nhund,dog\n'.encode('utf-8') + b'\xff,x\n'
+        response = self.import_deck(data)
+        self.assertEqual(response.status_code, 400)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_import_multipart(self):
+        response = self.client.post(
+            '/api/decks/3/import', data={'file': (io.BytesIO(b'front,back\nhund,dog\n'),
+                                                  'deck.csv')},
+            content_type='multipart/form-data', headers=self.authorization2)
+        self.assertEqual(response.status_code, 415)
+        self.assertIsNone(db.session.get(Card, 4))
+
+    def test_import_invalid_format(self):
+        response = self.import_deck(b'front,back\n', '?format=ndjson')
+        self.assertEqual(response.status_code, 400)
+
+    def test_import_others_deck(self):
+        response = self.client.post(
+            '/api/decks/3/import', data=b'front,back\n',
+            content_type='text/csv', headers=self.authorization1)
+        self.assertEqual(response.status_code, 403)
+
+    def test_import_nonexistent_deck(self):
+        response = self.client.post(
+            '/api/decks/10/import', data=b'front,back\n',
+            content_type='text/csv', headers=self.authorization1)
+        self.assertEqual(response.status_code, 404)
+
+
+if __name__ == '__main__':
+    unittest.main()
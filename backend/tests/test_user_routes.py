@@ -2,6 +2,7 @@ from .environment import TestEnvironment
 from app.models import User, Deck, Card
 from app.extensions import db
 from flask import Flask, jsonify
+from datetime import date, timedelta
 import unittest
 import sys
 print(sys.path)
@@ -52,6 +53,17 @@ class TestUserRoutes(TestEnvironment):
         self.assertEqual(response.status_code, 404)
         self.assertEqual(data['message'], 'User not found')
 
+    def test_search_users_max_queries(self):
+        for i in range(20):
+            db.session.add(User(username='user{}'.format(i), password='password'))
+
+        db.session.commit()
+
+        with self.assert_max_queries(1):
+            response = self.client.get('/api/users')
+
+        self.assertEqual(len(response.get_json()['data']), 23)
+
     def test_search_users(self):
         user1 = User(username='test_user1', password='testpassword')
         user2 = User(username='test_user2', password='testpassword')
@@ -152,6 +164,24 @@ class TestUserRoutes(TestEnvironment):
         response = self.client.get('/api/users?q=test_user&limit=1&offset=invalid')
         self.assertEqual(response.status_code, 400)
 
+    def test_search_users_cursor(self):
+        response = self.client.get('/api/users?limit=2')
+        data = response.get_json()
+        self.assertEqual([user['username'] for user in data['data']],
+                         ['Alfred', 'John'])
+
+        response = self.client.get(
+            '/api/users?limit=2&cursor={}'.format(data['next_cursor']))
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([user['username'] for user in data['data']], ['Admin'])
+        self.assertIsNone(data['next_cursor'])
+
+    def test_search_users_invalid_cursor(self):
+        response = self.client.get('/api/users?limit=2&cursor=e30')
+        self.assertEqual(response.status_code, 400)
+
     def test_update_user(self):
         request_data = {
             'username': 'updateduser',
@@ -229,6 +259,22 @@ class TestUserRoutes(TestEnvironment):
 
         self.assertEqual(response.status_code, 401)
 
+    def test_delete_user_max_queries(self):
+        for i in range(5):
+            deck = Deck(name='Deck {}'.format(i), user=self.user2)
+            db.session.add(deck)
+            db.session.add_all(Card(front='front', back='back', deck=deck)
+                               for _ in range(10))
+
+        db.session.commit()
+
+        with self.assert_max_queries(6):
+            response = self.client.delete('/api/users/2', headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Deck.query.count(), 2)
+        self.assertEqual(Card.query.count(), 0)
+
     def test_delete_user(self):
         response = self.client.delete('/api/users/1', headers=self.authorization1)
         response = self.client.delete('/api/users/2', headers=self.authorization2)
@@ -271,6 +317,36 @@ class TestUserRoutes(TestEnvironment):
         deck = db.session.get(Deck, 4)
         self.assertNotEqual(deck, None)
 
+    def test_add_deck_copies_cards(self):
+        self.add(Card(front='hund', back='dog', deck=self.deck3,
+                      knowledge_level=3, revision_due=date(2023, 11, 7)))
+        response = self.client.post(
+            '/api/users/1/decks/3', headers=self.authorization1)
+        data = response.get_json()['data']
+        self.assertEqual(data['all_count'], 3)
+        self.assertEqual(data['new_count'], 3)
+        self.assertEqual(data['due_count'], 0)
+
+        cards = Card.query.filter_by(deck_id=data['id']).order_by(Card.id)
+        self.assertEqual([(card.front, card.knowledge_level, card.revision_due)
+                          for card in cards],
+                         [('apfel', 0, None), ('frau', 0, None), ('hund', 0, None)])
+
+    def test_add_deck_queries(self):
+        counts = []
+
+        for size in (0, 50):
+            for i in range(size):
+                self.add(Card(front='front', back='back', deck=self.deck3))
+
+            db.session.expire_all()
+            with self.capture_queries() as statements:
+                self.client.post('/api/users/1/decks/3',
+                                 headers=self.authorization1)
+            counts.append(len(statements))
+
+        self.assertEqual(counts[0], counts[1])
+
     def test_add_deck_nonxistent_user(self):
         response = self.client.post(
             '/api/users/4/decks/1', headers=self.authorization1)
@@ -304,6 +380,22 @@ class TestUserRoutes(TestEnvironment):
         deck = db.session.get(Deck, 5)
         self.assertIsNone(deck)
 
+    def test_search_user_decks_max_queries(self):
+        for i in range(20):
+            deck = Deck(name='Deck {}'.format(i), user=self.user2)
+            db.session.add(deck)
+            db.session.add_all(Card(front='front', back='back', deck=deck)
+                               for _ in range(5))
+
+        db.session.commit()
+        db.session.expire_all()
+
+        with self.assert_max_queries(3):
+            response = self.client.get('/api/users/2/decks?card_count=all,new,due',
+                                       headers=self.authorization2)
+
+        self.assertEqual(len(response.get_json()['data']), 22)
+
     def test_search_user_decks(self):
         response = self.client.get(
             '/api/users/1/decks', headers=self.authorization1)
@@ -315,6 +407,26 @@ class TestUserRoutes(TestEnvironment):
         self.assertEqual(data[0]['name'], 'Javanese')
         self.assertEqual(data[1]['name'], 'Japanese')
 
+    def test_search_user_decks_count_cards_queries(self):
+        for i in range(10):
+            deck = self.add(Deck(name='Deck {}'.format(i), user=self.user1))
+            self.add(Card(front='front', back='back', deck=deck))
+
+        db.session.expire_all()
+        with self.capture_queries() as statements:
+            self.client.get('/api/users/1/decks?card_count=all,new,due&limit=2',
+                            headers=self.authorization1)
+        page_queries = len(statements)
+
+        db.session.expire_all()
+        with self.capture_queries() as statements:
+            response = self.client.get('/api/users/1/decks?card_count=all,new,due',
+                                       headers=self.authorization1)
+        all_queries = len(statements)
+
+        self.assertEqual(len(response.get_json()['data']), 12)
+        self.assertEqual(page_queries, all_queries)
+
     def test_search_user_decks_count_cards(self):
         response = self.client.get(
             '/api/users/1/decks?card_count=all,new,due', headers=self.authorization1)
@@ -363,6 +475,34 @@ class TestUserRoutes(TestEnvironment):
         self.assertEqual(len(data), 1)
         self.assertEqual(data[0]['name'], 'Japanese')
 
+    def test_search_user_decks_cursor(self):
+        response = self.client.get(
+            '/api/users/1/decks?limit=1', headers=self.authorization1)
+        next_cursor = response.get_json()['next_cursor']
+
+        response = self.client.get(
+            '/api/users/1/decks?limit=1&cursor={}'.format(next_cursor),
+            headers=self.authorization1)
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data'][0]['name'], 'Japanese')
+        self.assertIsNone(data['next_cursor'])
+
+    def test_search_user_decks_invalid_cursor(self):
+        response = self.client.get(
+            '/api/users/1/decks?cursor=%%%', headers=self.authorization1)
+        self.assertEqual(response.status_code, 400)
+
+    def test_search_user_decks_limit_zero(self):
+        response = self.client.get(
+            '/api/users/1/decks?limit=0', headers=self.authorization1)
+        data = response.get_json()
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['data'], [])
+        self.assertIsNone(data['next_cursor'])
+
     def test_search_user_decks_limit_invalid_offset(self):
         response = self.client.get(
             '/api/users/1/decks?limit=1&offset=invalid', headers=self.authorization1)
@@ -387,6 +527,203 @@ class TestUserRoutes(TestEnvironment):
 
         self.assertEqual(response.status_code, 403)
 
+    def test_get_user_summary(self):
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+        data = response.get_json()['data']
+        self.assertEqual(
+            {key: value for key, value in data.items() if key != 'decks'},
+            {'all_count': 3, 'new_count': 2, 'due_count': 1,
+             'due_tomorrow_count': 0, 'due_week_count': 0})
+        self.assertEqual(data['decks'], [
+            {'id': 3, 'name': 'German', 'all_count': 2, 'new_count': 1,
+             'due_count': 1, 'due_tomorrow_count': 0, 'due_week_count': 0},
+            {'id': 4, 'name': 'Polish', 'all_count': 1, 'new_count': 1,
+             'due_count': 0, 'due_tomorrow_count': 0, 'due_week_count': 0}])
+
+    def test_get_user_summary_upcoming(self):
+        today = date.today()
+
+        for days in (1, 1, 5, 7, 8):
+            self.add(Card(front='front', back='back', deck=self.deck4,
+                          knowledge_level=1,
+                          revision_due=today + timedelta(days=days)))
+
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual((data['due_count'], data['due_tomorrow_count'],
+                          data['due_week_count']), (1, 2, 4))
+        self.assertEqual((data['decks'][1]['all_count'],
+                          data['decks'][1]['due_tomorrow_count'],
+                          data['decks'][1]['due_week_count']), (6, 2, 4))
+
+    def test_get_user_summary_no_decks(self):
+        response = self.client.get(
+            '/api/users/3/summary', headers=self.authorization3)
+        data = response.get_json()['data']
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(data['decks'], [])
+        self.assertEqual(data['all_count'], 0)
+
+    def test_get_user_summary_max_queries(self):
+        for i in range(20):
+            deck = Deck(name='Deck {}'.format(i), user=self.user2)
+            db.session.add(deck)
+            db.session.add_all(Card(front='front', back='back', deck=deck)
+                               for _ in range(5))
+
+        db.session.commit()
+
+        with self.assert_max_queries(2):
+            response = self.client.get(
+                '/api/users/2/summary', headers=self.authorization2)
+
+        self.assertEqual(len(response.get_json()['data']['decks']), 22)
+
+    def test_get_user_summary_cached(self):
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+
+        with self.assert_max_queries(1):
+            cached = self.client.get(
+                '/api/users/2/summary', headers=self.authorization2)
+
+        self.assertEqual(cached.get_json(), response.get_json())
+
+    def test_get_user_summary_card_written(self):
+        self.client.get('/api/users/2/summary', headers=self.authorization2)
+        self.client.post('/api/decks/4/cards', json={
+            'front': 'Front', 'back': 'Back'}, headers=self.authorization2)
+
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual((data['all_count'], data['new_count']), (4, 3))
+
+    def test_get_user_summary_deck_deleted(self):
+        self.client.get('/api/users/2/summary', headers=self.authorization2)
+        self.client.delete('/api/decks/3', headers=self.authorization2)
+
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+        data = response.get_json()['data']
+
+        self.assertEqual([deck['id'] for deck in data['decks']], [4])
+        self.assertEqual(data['due_count'], 0)
+
+    def test_get_user_summary_not_modified(self):
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization2)
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/users/2/summary', headers=dict(
+            self.authorization2, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+        self.client.post('/api/decks/4/cards', json={
+            'front': 'Front', 'back': 'Back'}, headers=self.authorization2)
+        response = self.client.get('/api/users/2/summary', headers=dict(
+            self.authorization2, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+    def test_get_user_summary_admin(self):
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization3)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()['data']['all_count'], 3)
+
+    def test_get_user_summary_unauthorized_user(self):
+        response = self.client.get(
+            '/api/users/2/summary', headers=self.authorization1)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_user_summary_nonexistent_user(self):
+        response = self.client.get(
+            '/api/users/10/summary', headers=self.authorization3)
+
+        self.assertEqual(response.status_code, 404)
+
+    def test_get_user_forecast(self):
+        self.add(Card(front='front', back='back', deck=self.deck4,
+                      knowledge_level=1,
+                      revision_due=date.today() + timedelta(days=1)))
+        self.add(Card(front='front', back='back', deck=self.deck1,
+                      knowledge_level=1,
+                      revision_due=date.today() + timedelta(days=1)))
+
+        response = self.client.get(
+            '/api/users/2/forecast?days=2', headers=self.authorization2)
+        self.assertEqual(response.status_code, 200)
+
+        today = date.today()
+        self.assertEqual(response.get_json()['data'], [
+            {'date': today.isoformat(), 'due_count': 1},
+            {'date': (today + timedelta(days=1)).isoformat(), 'due_count': 1}])
+
+    def test_get_user_forecast_default_days(self):
+        response = self.client.get(
+            '/api/users/2/forecast', headers=self.authorization2)
+
+        self.assertEqual(len(response.get_json()['data']), 30)
+
+    def test_get_user_forecast_invalid_days(self):
+        response = self.client.get(
+            '/api/users/2/forecast?days=week', headers=self.authorization2)
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_get_user_forecast_cached(self):
+        response = self.client.get(
+            '/api/users/2/forecast?days=2', headers=self.authorization2)
+
+        with self.assert_max_queries(1):
+            cached = self.client.get(
+                '/api/users/2/forecast?days=2', headers=self.authorization2)
+
+        self.assertEqual(cached.get_json(), response.get_json())
+
+        self.client.delete('/api/cards/2', headers=self.authorization2)
+        response = self.client.get(
+            '/api/users/2/forecast?days=2', headers=self.authorization2)
+        self.assertEqual([day['due_count'] for day in response.get_json()['data']],
+                         [0, 0])
+
+    def test_get_user_forecast_not_modified(self):
+        response = self.client.get(
+            '/api/users/2/forecast', headers=self.authorization2)
+        etag = response.headers['ETag']
+
+        response = self.client.get('/api/users/2/forecast', headers=dict(
+            self.authorization2, **{'If-None-Match': etag}))
+        self.assertEqual(response.status_code, 304)
+
+    def test_get_user_forecast_admin(self):
+        response = self.client.get(
+            '/api/users/2/forecast', headers=self.authorization3)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_get_user_forecast_unauthorized_user(self):
+        response = self.client.get(
+            '/api/users/2/forecast', headers=self.authorization1)
+
+        self.assertEqual(response.status_code, 403)
+
+    def test_get_user_forecast_nonexistent_user(self):
+        response = self.client.get(
+            '/api/users/10/forecast', headers=self.authorization3)
+
+        self.assertEqual(response.status_code, 404)
+
 
 if __name__ == '__main__':
     unittest.main()
@@ -1,6 +1,10 @@
 import unittest
 from datetime import datetime, timezone, timedelta
+from unittest import mock
+from app.util.cache import SizedCache, TTLCache
 from app.util.date import normalize
+from app.util.hashing import Busy, HashingExecutor
+from werkzeug.security import generate_password_hash
 
 
 class TestUtil(unittest.TestCase):
@@ -10,3 +14,124 @@ class TestUtil(unittest.TestCase):
         pre_normalized = datetime(2023, 11, 7, hour=12, minute=51)
         normalized = normalize(date)
         self.assertEqual(normalized, pre_normalized)
+
+    def test_normalize_utc(self):
+        date = datetime(2023, 11, 7, hour=13, minute=51, tzinfo=timezone.utc)
+        normalized = normalize(date)
+        self.assertIsNone(normalized.tzinfo)
+        self.assertEqual(normalized, datetime(2023, 11, 7, hour=13, minute=51))
+
+
+class TestTTLCache(unittest.TestCase):
+    def test_get(self):
+        cache = TTLCache(2, 60)
+        cache.set('a', 1)
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+
+    def test_expired(self):
+        cache = TTLCache(2, 60)
+
+        with mock.patch('time.monotonic', return_value=0):
+            cache.set('a', 1)
+
+        with mock.patch('time.monotonic', return_value=60):
+            self.assertIsNone(cache.get('a'))
+
+    def test_least_recently_used(self):
+        cache = TTLCache(2, 60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), 1)
+
+    def test_pop_and_clear(self):
+        cache = TTLCache(2, 60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.pop('a')
+        self.assertIsNone(cache.get('a'))
+        cache.clear()
+        self.assertIsNone(cache.get('b'))
+
+    def test_disabled(self):
+        cache = TTLCache(2, 0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+
+
+class TestSizedCache(unittest.TestCase):
+    def test_get(self):
+        cache = SizedCache(10)
+        cache.set('a', b'aaa', 3)
+        self.assertEqual(cache.get('a'), b'aaa')
+        self.assertIsNone(cache.get('b'))
+
+    def test_least_recently_used(self):
+        cache = SizedCache(10)
+        cache.set('a', b'aaaa', 4)
+        cache.set('b', b'bbbb', 4)
+        cache.get('a')
+        cache.set('c', b'cccc', 4)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('a'), b'aaaa')
+        self.assertEqual(cache.size, 8)
+
+    def test_replace(self):
+        cache = SizedCache(10)
+        cache.set('a', b'aaaa', 4)
+        cache.set('a', b'aaaaaa', 6)
+        cache.set('b', b'bbbb', 4)
+        self.assertEqual(cache.get('a'), b'aaaaaa')
+        self.assertEqual(cache.size, 10)
+
+    def test_too_large(self):
+        cache = SizedCache(10)
+        cache.set('a', b'a' * 11, 11)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 0)
+
+    def test_pop_and_clear(self):
+        cache = SizedCache(10)
+        cache.set('a', b'a', 1)
+        cache.set('b', b'b', 1)
+        cache.pop('a')
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.size, 1)
+        cache.clear()
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.size, 0)
+
+
+class TestHashingExecutor(unittest.TestCase):
+    password_hash = generate_password_hash('password')
+
+    def test_check_password_inline(self):
+        executor = HashingExecutor(0, 1)
+        self.assertTrue(executor.check_password(self.password_hash, 'password')[0])
+        self.assertFalse(executor.check_password(self.password_hash, 'other')[0])
+
+    def test_check_password_pool(self):
+        executor = HashingExecutor(1, 1)
+
+        try:
+            valid, queue_time = executor.check_password(
+                self.password_hash, 'password')
+            self.assertTrue(valid)
+            self.assertGreaterEqual(queue_time, 0)
+            self.assertEqual(
+                executor.pool._mp_context.get_start_method(), 'forkserver')
+        finally:
+            executor.shutdown()
+
+        executor.shutdown()
+        self.assertIsNone(executor.pool)
+
+    def test_busy(self):
+        executor = HashingExecutor(0, 0)
+
+        with self.assertRaises(Busy):
+            executor.check_password(self.password_hash, 'password')
+
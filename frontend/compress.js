@@ -0,0 +1,32 @@
+// Writes brotli and gzip variants next to the files of a build, which the
+// backend sends to clients accepting them. Run with node compress.js dist
+import fs from 'fs';
+import path from 'path';
+import zlib from 'zlib';
+
+const COMPRESSIBLE = ['.html', '.js', '.css', '.svg', '.json', '.txt', '.map'];
+// Smaller files gain too little for the extra request header
+const MIN_SIZE = 1024;
+
+const compress = (directory) => {
+  for (const entry of fs.readdirSync(directory, { withFileTypes: true })) {
+    const file = path.join(directory, entry.name);
+
+    if (entry.isDirectory()) {
+      compress(file);
+    } else if (COMPRESSIBLE.includes(path.extname(file))) {
+      const content = fs.readFileSync(file);
+
+      if (content.length < MIN_SIZE) {
+        continue;
+      }
+
+      fs.writeFileSync(file + '.br', zlib.brotliCompressSync(content, {
+        params: { [zlib.constants.BROTLI_PARAM_QUALITY]: zlib.constants.BROTLI_MAX_QUALITY }
+      }));
+      fs.writeFileSync(file + '.gz', zlib.gzipSync(content, { level: zlib.constants.Z_BEST_COMPRESSION }));
+    }
+  }
+};
+
+compress(process.argv[2] ?? 'dist');
@@ -7,8 +7,7 @@ import {
 
 import CardFlipper from './CardFlipper';
 import type { Action } from './CardFlipper';
-import type { Card as CardType } from '../../services/cardService';
-import { addDays } from '../../services/util';
+import type { Card as CardType, Grade } from '../../services/cardService';
 
 export type ExtendedCard = CardType & {
   timesReviewed: number
@@ -16,7 +15,7 @@ export type ExtendedCard = CardType & {
 
 export interface IProps {
   card: ExtendedCard
-  advanceCard: (card: ExtendedCard, review: boolean) => void
+  advanceCard: (card: ExtendedCard, grade: Grade) => void
 }
 
 const CardSide = styled(Stack)(() => ({
@@ -29,51 +28,22 @@ const CardSide = styled(Stack)(() => ({
   alignItems: 'center'
 }));
 
-const daysToSum = [1, 3, 10, 30, 90];
-
 const Card = ({ card, advanceCard }: IProps): React.JSX.Element => {
   const [showBack, setShowBack] = useState(false);
 
   const handleAction = (action: Action): void => {
-    let newKnowledgeLevel = card.knowledge_level;
-    let review = false;
-
-    switch (action) {
-      case 'flip':
-        setShowBack(true);
-        return;
-      case 'fail':
-        if (card.timesReviewed < 2) {
-          newKnowledgeLevel = Math.max(newKnowledgeLevel - 1, 0);
-        }
-        review = true;
-        break;
-      case 'practice':
-        review = true;
-        break;
-      case 'good':
-        newKnowledgeLevel = Math.min(newKnowledgeLevel + 1, 4);
-        break;
-    }
-
-    let plusDays = 0;
-
-    if (review) {
-      plusDays = Math.max(daysToSum[newKnowledgeLevel] / (1 + card.timesReviewed * 0.5), 1);
-    } else {
-      plusDays = Math.max(daysToSum[newKnowledgeLevel - 1] / (1 + card.timesReviewed * 0.5), 1);
+    if (action === 'flip') {
+      setShowBack(true);
+      return;
     }
 
     const newCard = {
       ...card,
-      knowledge_level: newKnowledgeLevel,
-      revision_due: addDays(new Date(), plusDays).toISOString(),
-      last_revised: new Date().toISOString(),
       timesReviewed: card.timesReviewed + 1
     };
 
     setShowBack(false);
-    advanceCard(newCard, review);
+    advanceCard(newCard, action);
   };
 
   return (
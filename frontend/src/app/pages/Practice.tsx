@@ -8,6 +8,7 @@ import {
 import { useAppDispatch, useAppSelector, useLoad } from '../hooks';
 import Loading from './Loading';
 import cardService from '../services/cardService';
+import type { Grade, IReview } from '../services/cardService';
 import Fullscreen from '../components/Layout/Fullscreen';
 import { setError } from '../slices/messageSlice';
 import Welcome from '../components/Practice/Welcome';
@@ -23,7 +24,7 @@ const Practice = (): React.JSX.Element => {
   const [showClose, setShowClose] = useState(false);
   const [cards, setCards] = useState<ExtendedCard[]>([]);
   const [reviewCards, setReviewCards] = useState<ExtendedCard[]>([]);
-  const [cardsToUpdate, setCardsToUpdate] = useState<ExtendedCard[]>([]);
+  const [reviews, setReviews] = useState<IReview[]>([]);
   const navigate = useNavigate();
   const dispatch = useAppDispatch();
   const decks = useAppSelector(store => store.decks);
@@ -41,51 +42,32 @@ const Practice = (): React.JSX.Element => {
       : null,
   deck != null);
 
-  const [newCards] = useLoad(async () =>
+  const [queue] = useLoad(async () =>
     user.entity !== null && deck != null
-      ? await cardService.getCards(
+      ? await cardService.getQueue(
         deck.id,
         user.entity.token,
         {
-          new: true,
-          limit: 10
-        }
-      )
-      : null,
-  deck != null);
-
-  const [dueCards] = useLoad(async () =>
-    user.entity !== null && deck != null
-      ? await cardService.getCards(
-        deck.id,
-        user.entity.token,
-        {
-          due: new Date().toISOString(),
-          limit: 20
+          new: 10,
+          due: 20
         }
       )
       : null,
   deck != null);
 
   useEffect(() => {
-    if (
-      newCards.entity?.length === 0 &&
-      dueCards.entity?.length === 0
-    ) {
+    if (queue.entity?.length === 0) {
       dispatch(setError('No cards to review or learn'));
       navigate('/decks');
-    } else if (
-      newCards.entity !== null && dueCards.entity !== null
-    ) {
-      setCards(newCards.entity.concat(dueCards.entity).map(card => (
+    } else if (queue.entity !== null) {
+      setCards(queue.entity.map(card => (
         { ...card, timesReviewed: 0 }
       )));
     }
-  }, [newCards.entity, dueCards.entity]);
+  }, [queue.entity]);
 
   if (
-    newCards.entity === null ||
-    dueCards.entity === null ||
+    queue.entity === null ||
     revisedCardsCount.entity === null ||
     deck === undefined ||
     user.entity === null ||
@@ -94,13 +76,18 @@ const Practice = (): React.JSX.Element => {
     return <Loading />;
   }
 
-  const advanceCard = (card: ExtendedCard, review: boolean): void => {
+  const newCardsCount = queue.entity.filter(card => card.knowledge_level === 0).length;
+
+  const advanceCard = (card: ExtendedCard, grade: Grade): void => {
+    const review = grade !== 'good';
     const newCards = [...cards];
     newCards.shift();
 
-    if (!review) {
-      setCardsToUpdate(cardsToUpdate.concat(card));
-    }
+    setReviews(reviews.concat({
+      card_id: card.id,
+      grade,
+      reviewed_at: new Date().toISOString()
+    }));
 
     if (newCards.length === 0) {
       if (review) {
@@ -123,7 +110,7 @@ const Practice = (): React.JSX.Element => {
 
   const handleClose = async (saveCards: boolean): Promise<void> => {
     if (saveCards) {
-      await cardService.updateCards(cardsToUpdate, user.entity?.token ?? '');
+      await cardService.createReviews(reviews, user.entity?.token ?? '');
       void dispatch(loadDecks(true));
     }
     navigate('/decks');
@@ -146,8 +133,8 @@ const Practice = (): React.JSX.Element => {
           <Welcome
             deckName={deck.name}
             revisedCardsCount={revisedCardsCount.entity}
-            newCardsCount={newCards.entity.length}
-            dueCardsCount={dueCards.entity.length}
+            newCardsCount={newCardsCount}
+            dueCardsCount={queue.entity.length - newCardsCount}
             onContinue={() => { setStage(1); }}
           />
         )}
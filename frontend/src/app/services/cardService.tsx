@@ -1,6 +1,6 @@
 import axios from 'axios';
 import { AuthHeader } from './util';
-import { decksUri, cardsUri } from './uri';
+import { decksUri, cardsUri, reviewsUri } from './uri';
 
 export interface ICard {
   front: string
@@ -16,6 +16,7 @@ export type Card = ICard & {
 
 export interface ICardsResponse {
   data: Card[]
+  next_cursor?: string | null
 };
 
 export interface ICardResponse {
@@ -30,11 +31,25 @@ export interface IGetCardsParams {
   q?: string
   limit?: number
   offset?: number
+  cursor?: string
   new?: boolean
   due?: string
   revised?: string
 };
 
+export type Grade = 'fail' | 'practice' | 'good';
+
+export interface IReview {
+  card_id: number
+  grade: Grade
+  reviewed_at: string
+};
+
+export interface IGetQueueParams {
+  new?: number
+  due?: number
+};
+
 const getCards = async (deckId: number, token: string, params?: IGetCardsParams): Promise<ICardsResponse> => {
   const response = await axios.get(
     `${decksUri}/${deckId}/cards`,
@@ -43,6 +58,14 @@ const getCards = async (deckId: number, token: string, params?: IGetCardsParams)
   return response.data;
 };
 
+const getQueue = async (deckId: number, token: string, params?: IGetQueueParams): Promise<ICardsResponse> => {
+  const response = await axios.get(
+    `${decksUri}/${deckId}/queue`,
+    { ...AuthHeader(token), params }
+  );
+  return response.data;
+};
+
 const countCards = async (deckId: number, token: string, params?: IGetCardsParams): Promise<INumberResponse> => {
   const response = await axios.get(
     `${decksUri}/${deckId}/cards`,
@@ -77,6 +100,15 @@ const updateCards = async (cards: Card[], token: string): Promise<void> => {
   );
 };
 
+const createReviews = async (reviews: IReview[], token: string): Promise<ICardsResponse> => {
+  const response = await axios.post(
+    reviewsUri,
+    reviews,
+    AuthHeader(token)
+  );
+  return response.data;
+};
+
 const deleteCard = async (cardId: number, token: string): Promise<ICardResponse> => {
   const response = await axios.delete(
     `${cardsUri}/${cardId}`,
@@ -87,9 +119,11 @@ const deleteCard = async (cardId: number, token: string): Promise<ICardResponse>
 
 export default {
   getCards,
+  getQueue,
   countCards,
   createCard,
   updateCard,
   updateCards,
+  createReviews,
   deleteCard
 };
@@ -15,6 +15,7 @@ export interface IDeck {
 export interface IDecksResponse {
   data: IDeck[]
   count?: number
+  next_cursor?: string | null
 }
 
 export interface IDeckResponse {
@@ -29,6 +30,7 @@ export interface IGetUserDecksParams {
   q?: string
   limit?: number
   offset?: number
+  cursor?: string
   card_count?: string
 };
 
@@ -40,6 +42,7 @@ export interface IGetDecksParams {
   q?: string
   limit?: number
   offset?: number
+  cursor?: string
   total_count?: boolean
   card_count?: string
 };
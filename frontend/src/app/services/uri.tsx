@@ -1,4 +1,5 @@
 export const decksUri = '/api/decks';
 export const cardsUri = '/api/cards';
+export const reviewsUri = '/api/reviews';
 export const usersUri = '/api/users';
 export const authUri = '/api/auth';
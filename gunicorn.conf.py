@@ -0,0 +1,30 @@
+import os
+
+# Workers spend most of their time waiting on the database, so each one
+# serves several requests at once, either in threads (gthread) or in
+# greenlets (gevent, which must be installed along with psycogreen).
+# Every thread or greenlet may hold a database connection, so keep
+# FLASK_SQLALCHEMY_POOL_SIZE plus FLASK_SQLALCHEMY_MAX_OVERFLOW at or
+# above threads, and workers times that within the database's limit.
+workers = int(os.getenv('WEB_CONCURRENCY', 4))
+worker_class = os.getenv('GUNICORN_WORKER_CLASS', 'gthread')
+threads = int(os.getenv('GUNICORN_THREADS', 8))
+worker_connections = int(os.getenv('GUNICORN_WORKER_CONNECTIONS', 100))
+
+if worker_class == 'gevent':
+    # Process pools do not mix with monkey patched threads
+    os.environ.setdefault('FLASK_HASHING_WORKERS', '0')
+
+
+def post_fork(server, worker):
+    if worker_class != 'gevent':
+        return
+
+    try:
+        from psycogreen.gevent import patch_psycopg
+    except ImportError:
+        server.log.warning('psycogreen is not installed, database calls '
+                           'will block the gevent worker')
+        return
+
+    patch_psycopg()